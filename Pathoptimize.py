@@ -4,121 +4,52 @@ from collections import defaultdict
 import random
 import itertools
 import os
-import math
-
-# กำหนดพิกัดของแต่ละอาคารที่ชมรมตั้งอยู่ (building_id: [latitude, longitude])
-# ใช้ค่าพิกัดจริงเพื่อความแม่นยำในการคำนวณระยะทาง
-building_locations = {
-    'อาคาร 1': [18.790902, 98.972707],  # Coverdance/Devil location
-    'อาคาร 2': [18.792078, 98.971493],  # Chorus location
-    'อาคาร 3': [18.790902, 98.972707],  # Devil location (same as Coverdance)
-    'อาคาร 4': [18.791527, 98.972063],  # Pingpong location
-    'อาคาร 5': [18.789980, 98.973104],  # Art location
-    'อาคาร 6': [18.790933, 98.972240],  # Bridge location
-    'อาคาร 7': [18.789990, 98.972625],  # E-Sport location
-    'อาคาร 8': [18.789990, 98.972625],  # IMSU location (same as E-Sport)
-    'อาคาร 9': [18.789990, 98.972625],  # Libir/Research location (same as E-Sport)
-    'สนามกีฬา': [18.791656, 98.971530],  # Tennis, Basketball, Football, etc.
-    'สระว่ายน้ำ': [18.790549, 98.972482]   # Swimming location
-}
-
-# กำหนดชมรมอยู่ที่อาคารไหน (club_name: building_id)
-club_buildings = {
-    # ชมรมช่วงเช้า
-    'บาสเก็ตบอล': { 'lat': 18.791278, 'lng': 98.971319 },
-    'แชร์บอล': { 'lat': 18.791527, 'lng': 98.972063 },
-    'CHORUS': { 'lat': 18.792078, 'lng': 98.971493 },
-    'DEVIL': { 'lat': 18.790902, 'lng': 98.972707 },
-    'ฟุตบอล': { 'lat': 18.789815, 'lng': 98.971550 },
-    'เทนนิส': { 'lat': 18.791656, 'lng': 98.971530 },  
-    'ดนตรีไทย': { 'lat': 18.790943, 'lng': 98.971439 },
-    'วิ่ง': { 'lat': 18.789815, 'lng': 98.971550 },
-    'วอลเลย์บอล': { 'lat': 18.791283, 'lng': 98.971479 },
-    'MUAN': { 'lat': 18.789980, 'lng': 98.973104 },
-    'ART': { 'lat': 18.789980, 'lng': 98.973104 },
-    'เปตอง': { 'lat': 18.789815, 'lng': 98.971550 },    
-    'Swimming (ชมรมว่ายน้ำและโปโลน้ำ)': { 'lat': 18.790549, 'lng': 98.972482 },
-    # ชมรมช่วงบ่าย
-    'Bridge': { 'lat': 18.790933, 'lng': 98.972240 },
-    'E-sport': { 'lat': 18.789990, 'lng': 98.972625 },
-    'IMSU': { 'lat': 18.789990, 'lng': 98.972625 },
-    'Libir': { 'lat': 18.789990, 'lng': 98.972625 },
-    'MCCC': { 'lat': 18.789990, 'lng': 98.972625 }, 
-    'พอช.': { 'lat': 18.789980, 'lng': 98.973104 },
-    'Research': { 'lat': 18.789990, 'lng': 98.972625 },
-    'หมอน้อย': { 'lat': 18.789980, 'lng': 98.973104 },
-    'ปิงปอง': { 'lat': 18.791527, 'lng': 98.972063 },
-    'แบตมินตัน': { 'lat': 18.791527, 'lng': 98.972063 },
-    'ดนตรีสากล': { 'lat': 18.790943, 'lng': 98.971439 },
-    'cheerleader': { 'lat': 18.790549, 'lng': 98.972482 },
-    'CMSO': { 'lat': 18.790257, 'lng': 98.972933 },
-    'coverdance': { 'lat': 18.790902, 'lng': 98.972707 },
-}
-
-# คำนวณระยะทางระหว่างสองอาคาร
-def calculate_distance(building1, building2):
-    """
-    คำนวณระยะทางระหว่างสองตำแหน่งโดยใช้ Haversine formula (สำหรับคำนวณระยะทางบนพื้นผิวโลก)
-    ผลลัพธ์เป็นระยะทางในหน่วยกิโลเมตร
-    สามารถรับ parameter ได้ทั้งชื่ออาคารหรือ dict ที่มี keys 'lat' และ 'lng'
-    """
-    # กรณีที่รับชื่ออาคารมา
-    if isinstance(building1, str) and isinstance(building2, str):
-        if building1 not in building_locations or building2 not in building_locations:
-            return float('inf')  # ถ้าไม่พบอาคาร ให้ถือว่าระยะทางเป็นอนันต์
-        
-        lat1, lon1 = building_locations[building1]
-        lat2, lon2 = building_locations[building2]
-    # กรณีที่รับ dict ที่มี keys 'lat' และ 'lng' มา
-    elif isinstance(building1, dict) and isinstance(building2, dict):
-        lat1 = building1['lat']
-        lon1 = building1['lng']
-        lat2 = building2['lat']
-        lon2 = building2['lng']
-    else:
-        return float('inf')  # ถ้าข้อมูลไม่ถูกต้อง ให้ถือว่าระยะทางเป็นอนันต์
-    
-    # แปลงเป็นเรเดียน
-    lat1 = math.radians(lat1)
-    lon1 = math.radians(lon1)
-    lat2 = math.radians(lat2)
-    lon2 = math.radians(lon2)
-    
-    # Haversine formula
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    r = 6371  # รัศมีของโลกในกิโลเมตร
-    
-    return c * r  # ระยะทางในหน่วยกิโลเมตร
+import argparse
+import logging
+
+from student_store import StudentStore
+from checkpoint import save_checkpoint, load_checkpoint, pack_students, unpack_students
+from result_io import read_results
+from allocation_log import LOG_LEVELS, LOGGER_NAME, configure_logging
+from profiling import profiled, record, start_profiling, stop_profiling, print_profile
+from convergence import ConvergenceTrace
+from club_locations import UNKNOWN_DISTANCE, ClubDistanceMatrix, club_buildings
+
+logger = logging.getLogger(LOGGER_NAME + '.paths')
+
+PATH_STAGES = ('paths',)  # ขั้นตอนที่บันทึก snapshot ได้ (หลังการสลับเพื่อลดระยะทาง)
+
+# ตารางระยะทางระหว่างชมรมทั้งหมดใน club_buildings (คำนวณครั้งเดียวตอน import)
+club_distances = ClubDistanceMatrix(club_buildings)
 
 # คำนวณระยะทางระหว่างสองชมรม
 def calculate_club_distance(club1, club2):
     """
-    คำนวณระยะทางระหว่างสองชมรม
+    คำนวณระยะทางระหว่างสองชมรม (ค้นจาก club_distances)
     """
-    if club1 not in club_buildings or club2 not in club_buildings:
-        return float('inf')  # ถ้าไม่พบชมรม ให้ถือว่าระยะทางเป็นอนันต์
-    
-    building1 = club_buildings[club1]
-    building2 = club_buildings[club2]
-    
-    return calculate_distance(building1, building2)
+    return club_distances.distance(club1, club2)
 
-# อ่านข้อมูลการจัดสรรชมรมจากไฟล์ CSV
+# อ่านข้อมูลการจัดสรรชมรมจากไฟล์ CSV (หรือ Parquet/Feather)
+@profiled
 def read_assignment_data(file_path):
     """
-    อ่านข้อมูลการจัดสรรชมรมจากไฟล์ CSV
+    อ่านข้อมูลการจัดสรรชมรมจากไฟล์ผลการจัดสรร (CSV / Parquet / Feather) โดยตัดแถวหัวกลุ่มของ CSV ออก
     """
-    df = pd.read_csv(file_path)
+    df = read_results(file_path)
+    record(rows=len(df))
     return df
 
 # สร้างโครงสร้างข้อมูลนักศึกษาและการจัดสรรชมรม
-def create_student_data(df):
+@profiled
+def create_student_data(df, compact=False):
     """
     สร้างโครงสร้างข้อมูลที่เก็บการจัดสรรชมรมของนักศึกษาแต่ละคน
+    compact=True เก็บข้อมูลใน StudentStore (รหัสชมรมใน NumPy array) แต่ใช้งานผ่าน key เดิมได้เหมือนกัน
     """
+    record(students=len(df))
+    if compact:
+        return StudentStore.from_assignments(df)
+    
     students = {}
     
     # คอลัมน์ที่เก็บข้อมูลชมรมช่วงเช้าและบ่าย
@@ -147,25 +78,29 @@ def create_student_data(df):
 def calculate_student_total_distance(student_data):
     """
     คำนวณระยะทางรวมในการเดินของนักศึกษาแต่ละคน
+    ค้นระยะทางจาก club_distances ด้วยเลขประจำชมรม โดยบวกตามลำดับเดิม (ผลรวมจึงเท่าเดิมทุกบิต)
     """
+    index = club_distances.index
+    rows = club_distances.rows
+    morning = student_data['assignments']['morning']
+    afternoon = student_data['assignments']['afternoon']
+    # เลขประจำชมรมของเช้าช่วง 1-4 แล้วบ่ายช่วง 1-4 (None ถ้าไม่มีพิกัด)
+    codes = [index.get(morning[i]) for i in range(1, 5)] + [index.get(afternoon[i]) for i in range(1, 5)]
+    if None in codes:
+        return UNKNOWN_DISTANCE  # ถ้าไม่พบชมรม ให้ถือว่าระยะทางเป็นอนันต์
+    
     total_distance = 0
     
     # คำนวณระยะทางช่วงเช้า (slots 1-4)
-    for i in range(1, 4):  # เฉพาะ 1-3 เพราะต้องเดินไปอีกช่วงเวลา
-        club1 = student_data['assignments']['morning'][i]
-        club2 = student_data['assignments']['morning'][i+1]
-        total_distance += calculate_club_distance(club1, club2)
+    for i in range(0, 3):  # เฉพาะ 1-3 เพราะต้องเดินไปอีกช่วงเวลา
+        total_distance += rows[codes[i]][codes[i + 1]]
     
     # คำนวณระยะทางช่วงบ่าย (slots 1-4)
-    for i in range(1, 4):  # เฉพาะ 1-3 เพราะต้องเดินไปอีกช่วงเวลา
-        club1 = student_data['assignments']['afternoon'][i]
-        club2 = student_data['assignments']['afternoon'][i+1]
-        total_distance += calculate_club_distance(club1, club2)
+    for i in range(4, 7):  # เฉพาะ 1-3 เพราะต้องเดินไปอีกช่วงเวลา
+        total_distance += rows[codes[i]][codes[i + 1]]
     
     # คำนวณระยะทางจากช่วงเช้าสุดท้ายไปช่วงบ่ายแรก
-    last_morning_club = student_data['assignments']['morning'][4]
-    first_afternoon_club = student_data['assignments']['afternoon'][1]
-    total_distance += calculate_club_distance(last_morning_club, first_afternoon_club)
+    total_distance += rows[codes[3]][codes[4]]
     
     return total_distance
 
@@ -292,80 +227,261 @@ def swap_student_slots(students, student_id1, student_id2, period, slot1, slot2)
     
     return students
 
+# การสลับที่ทดลองตามลำดับที่ใช้ตัดสินกรณีผลประโยชน์เท่ากัน (คาบก่อน แล้วตามคู่ช่วงเวลา): (คาบ, slot1, slot2)
+SWAP_PERIODS = ['morning', 'afternoon']
+SWAP_SLOT_PAIRS = [(slot1, slot2) for slot1 in range(1, 5) for slot2 in range(slot1 + 1, 5)]
+SWAPS = [(period, slot1, slot2) for period in SWAP_PERIODS for slot1, slot2 in SWAP_SLOT_PAIRS]
+SWAP_BLOCK_SIZE = 1000000  # จำนวนคู่ลายเซ็นที่ตรวจพร้อมกันในหนึ่งชุด (จำกัดขนาด array ชั่วคราว)
+SWAP_SEARCH_WIDTH = 64  # จำนวนลายเซ็นที่ผลประโยชน์รายคนสูงสุดที่จับคู่กันในรอบแรกของการค้นแบบ limit (เพิ่มเท่าตัวจนพอ)
+SWAP_TOLERANCE = 1e-9  # ค่าเผื่อ (กิโลเมตร) ระหว่างผลรวมผลประโยชน์รายคนกับผลประโยชน์ที่คำนวณแบบ calculate_benefit_from_swap
+
+# จัดกลุ่มนักศึกษาตามลายเซ็นการจัดสรร
+def group_assignment_signatures(students, student_ids):
+    """
+    จัดกลุ่มนักศึกษาตามลายเซ็นการจัดสรร (ชมรมเช้าช่วง 1-4 ตามด้วยบ่ายช่วง 1-4) นักศึกษาที่ลายเซ็นเดียวกัน
+    ให้ผลการตรวจและผลประโยชน์ของการสลับเหมือนกันทุกประการ จึงคำนวณครั้งเดียวต่อลายเซ็น
+    คืนค่า (เลขประจำชมรมของแต่ละลายเซ็น shape (ลายเซ็น, 8), ตำแหน่งของนักศึกษาในแต่ละลายเซ็นเรียงจากน้อยไปมาก)
+    ตำแหน่งนับตามลำดับใน student_ids
+    """
+    codes = {}  # ชมรม -> เลข (เทียบแบบเดียวกับ in ของ list ใน is_valid_slot_swap)
+    signatures = {}
+    rows, members = [], []
+    for position, student_id in enumerate(student_ids):
+        assignments = students[student_id]['assignments']
+        signature = tuple(codes.setdefault(assignments[period][slot], len(codes))
+                          for period in SWAP_PERIODS for slot in range(1, 5))
+        index = signatures.get(signature)
+        if index is None:
+            signatures[signature] = len(rows)
+            rows.append(signature)
+            members.append([position])
+        else:
+            members[index].append(position)
+    return np.array(rows, dtype=np.int64).reshape(len(rows), 8), members
+
+# ระยะทางของแต่ละลายเซ็นก่อนและหลังสลับช่วงเวลาของตัวเอง
+def signature_distances(students, student_ids, members):
+    """
+    ระยะทางรวมของแต่ละลายเซ็นก่อนสลับ shape (ลายเซ็น,) และหลังสลับสองช่วงเวลาของตัวเองในแต่ละแบบของ SWAPS
+    shape (ลายเซ็น, จำนวนแบบ) คำนวณจากนักศึกษาคนแรกของลายเซ็นด้วย calculate_student_total_distance
+    """
+    distance_before = np.empty(len(members))
+    distance_after = np.empty((len(members), len(SWAPS)))
+    for index, positions in enumerate(members):
+        student = students[student_ids[positions[0]]]
+        distance_before[index] = calculate_student_total_distance(student)
+        for swap_index, (period, slot1, slot2) in enumerate(SWAPS):
+            swapped = {'assignments': {'morning': student['assignments']['morning'].copy(),
+                                       'afternoon': student['assignments']['afternoon'].copy()}}
+            swapped['assignments'][period][slot1] = student['assignments'][period][slot2]
+            swapped['assignments'][period][slot2] = student['assignments'][period][slot1]
+            distance_after[index, swap_index] = calculate_student_total_distance(swapped)
+    return distance_before, distance_after
+
+# ตรวจการสลับของหลายคู่ลายเซ็นพร้อมกัน
+def evaluate_signature_pairs(signatures, sizes, distance_before, distance_after, rows, columns, swap_index):
+    """
+    ตรวจการสลับ SWAPS[swap_index] ของคู่ลายเซ็น (rows[i], columns[i]) ด้วยเงื่อนไขเดียวกับ is_valid_slot_swap
+    (ชมรมในสองช่วงเวลาที่สลับของคนหนึ่งต้องไม่ซ้ำกับชมรมในช่วงเวลาอื่นของอีกคน) และผลประโยชน์ที่รวมตามลำดับเดียวกับ
+    calculate_benefit_from_swap (จึงเท่ากันทุกบิต) คืนค่า (ถูกต้อง, ผลประโยชน์, จำนวนคู่นักศึกษาของแต่ละคู่ลายเซ็น)
+    """
+    period, slot1, slot2 = SWAPS[swap_index]
+    offset = SWAP_PERIODS.index(period) * 4
+    others = [offset + slot - 1 for slot in range(1, 5) if slot != slot1 and slot != slot2]
+    clubs1 = signatures[rows]
+    clubs2 = signatures[columns]
+    conflict = np.zeros(len(rows), dtype=bool)
+    for column in (offset + slot1 - 1, offset + slot2 - 1):
+        for other in others:
+            conflict |= clubs2[:, column] == clubs1[:, other]
+            conflict |= clubs1[:, column] == clubs2[:, other]
+    with np.errstate(invalid='ignore'):
+        benefit = ((distance_before[rows] + distance_before[columns])
+                   - (distance_after[rows, swap_index] + distance_after[columns, swap_index]))
+    multiplicity = np.where(columns != rows, sizes[rows] * sizes[columns], sizes[rows] * (sizes[rows] - 1) // 2)
+    return ~conflict, benefit, multiplicity
+
+# ตรวจทุกคู่ลายเซ็น
+def check_all_swaps(signatures, sizes, distance_before, distance_after, progress=False):
+    """
+    ตรวจทุกคู่ลายเซ็น (a, b) ที่ b >= a (a == b เฉพาะลายเซ็นที่มีนักศึกษาอย่างน้อยสองคน) ในทุกแบบของ SWAPS
+    เป็นชุดละไม่เกิน SWAP_BLOCK_SIZE คู่ คืนค่า (การสลับที่ให้ประโยชน์ของคู่ลายเซ็นสำหรับ rank_swaps,
+    จำนวนคู่ลายเซ็นที่ตรวจ, จำนวนการสลับที่ถูกต้อง, จำนวนการสลับที่ให้ประโยชน์) โดยนับจำนวนการสลับตามคู่นักศึกษา
+    """
+    num_signatures = len(signatures)
+    widths = num_signatures - np.arange(num_signatures)
+    ends = np.cumsum(widths)
+    found = []
+    checked = valid_swaps = beneficial_swaps = 0
+    start = 0
+    while start < num_signatures:
+        done = int(ends[start - 1]) if start else 0
+        stop = min(max(int(np.searchsorted(ends, done + SWAP_BLOCK_SIZE, side='right')), start + 1), num_signatures)
+        block_widths = widths[start:stop]
+        rows = np.repeat(np.arange(start, stop), block_widths)
+        columns = rows + np.arange(len(rows)) - np.repeat(np.cumsum(block_widths) - block_widths, block_widths)
+        keep = (columns > rows) | (sizes[rows] > 1)
+        rows = rows[keep]
+        columns = columns[keep]
+        checked += len(rows)
+        for swap_index in range(len(SWAPS)):
+            valid, benefit, multiplicity = evaluate_signature_pairs(signatures, sizes, distance_before, distance_after,
+                                                                    rows, columns, swap_index)
+            with np.errstate(invalid='ignore'):
+                beneficial = valid & (benefit > 0)
+            valid_swaps += int(multiplicity[valid].sum())
+            beneficial_swaps += int(multiplicity[beneficial].sum())
+            if beneficial.any():
+                found.append((benefit[beneficial], rows[beneficial], columns[beneficial],
+                              np.full(int(beneficial.sum()), swap_index)))
+        if progress:
+            logger.debug("Checked %s of %s assignment signatures, found %s beneficial swaps so far...",
+                         stop, num_signatures, beneficial_swaps)
+        start = stop
+    return found, checked, valid_swaps, beneficial_swaps
+
+# ค้นเฉพาะการสลับที่ดีที่สุด limit รายการ
+def search_top_swaps(signatures, sizes, distance_before, distance_after, limit):
+    """
+    ค้นการสลับที่ดีที่สุด limit รายการโดยไม่ตรวจทุกคู่ลายเซ็น ผลประโยชน์ของการสลับคือผลรวมของระยะทางที่ลดลงของแต่ละคน
+    (gain) จึงเรียงลายเซ็นตาม gain ของแต่ละแบบการสลับ แล้วตรวจเฉพาะคู่ใน width ลายเซ็นแรกของทุกแบบ
+    คู่ที่อยู่นอกนั้นมีผลประโยชน์ไม่เกิน gain อันดับแรก + gain อันดับที่ width (ขอบเขต) ถ้าการสลับที่พบซึ่งมากกว่าขอบเขต
+    มีครบ limit คู่นักศึกษา ผลลัพธ์จึงเหมือนการตรวจทุกคู่ ถ้ายังไม่ครบจะเพิ่ม width เท่าตัว
+    คืนค่า (การสลับที่ให้ประโยชน์ของคู่ลายเซ็นสำหรับ rank_swaps, จำนวนคู่ลายเซ็นที่ตรวจ)
+    """
+    with np.errstate(invalid='ignore'):
+        gains = distance_before[:, None] - distance_after
+    # ลายเซ็นที่ระยะทางเป็นอนันต์ (ชมรมที่ไม่มีพิกัด) ได้ผลประโยชน์ NaN กับทุกคู่ จึงไม่มีทางให้ประโยชน์
+    orders = []
+    for swap_index in range(len(SWAPS)):
+        usable = np.flatnonzero(np.isfinite(gains[:, swap_index]))
+        orders.append(usable[np.argsort(-gains[usable, swap_index], kind='stable')])
+
+    checked = 0
+    width = SWAP_SEARCH_WIDTH
+    while True:
+        found = []
+        bound = -np.inf  # ผลประโยชน์สูงสุดที่เป็นไปได้ของคู่ที่ยังไม่ได้ตรวจ
+        for swap_index, order in enumerate(orders):
+            top = order[:width]
+            if len(order) > width:
+                bound = max(bound, gains[order[0], swap_index] + gains[order[width], swap_index] + SWAP_TOLERANCE)
+            first, second = np.triu_indices(len(top))
+            rows, columns = top[first], top[second]
+            keep = (columns != rows) | (sizes[rows] > 1)
+            rows = rows[keep]
+            columns = columns[keep]
+            checked += len(rows)
+            valid, benefit, multiplicity = evaluate_signature_pairs(signatures, sizes, distance_before, distance_after,
+                                                                    rows, columns, swap_index)
+            with np.errstate(invalid='ignore'):
+                beneficial = valid & (benefit > max(bound, 0))
+            if beneficial.any():
+                found.append((benefit[beneficial], rows[beneficial], columns[beneficial], multiplicity[beneficial],
+                              np.full(int(beneficial.sum()), swap_index)))
+        # ผลประโยชน์ของการสลับที่พบอาจยังต่ำกว่าขอบเขตของแบบที่ตรวจภายหลัง จึงกรองอีกครั้งเมื่อรู้ขอบเขตรวม
+        found = [tuple(part[entry[0] > bound] for part in entry) for entry in found]
+        complete = sum(int(entry[3].sum()) for entry in found) >= limit
+        if complete or bound <= 0:
+            return [(benefit, rows, columns, swap_indexes) for benefit, rows, columns, _, swap_indexes in found], checked
+        width *= 2
+
 # ฟังก์ชันหลักในการค้นหาการสลับที่ดีที่สุด
-def find_best_swaps(students):
+@profiled
+def find_best_swaps(students, counts=None, limit=None):
     """
     ค้นหาการสลับที่ให้ประโยชน์มากที่สุด โดยรักษาการจัดสรรชมรมเดิมของนักศึกษา
+    คืนค่าการสลับที่ให้ประโยชน์เรียงตามผลประโยชน์จากมากไปน้อย (limit รายการแรกถ้าระบุ) ถ้าผลประโยชน์เท่ากัน
+    เรียงตามคู่นักศึกษา (ตามลำดับใน students) คาบ และคู่ช่วงเวลา เหมือนการไล่ตรวจทุกคู่นักศึกษา
+
+    การตรวจ (is_valid_slot_swap) และผลประโยชน์ (calculate_benefit_from_swap) ขึ้นกับชมรมของนักศึกษาสองคนเท่านั้น
+    จึงตรวจทีละคู่ลายเซ็นการจัดสรร (group_assignment_signatures) ด้วย NumPy แทนทีละคู่นักศึกษา
+    เมื่อระบุ limit ค้นจากลายเซ็นที่ลดระยะทางของตัวเองได้มากที่สุดก่อน (search_top_swaps) ไม่ต้องตรวจทุกคู่ลายเซ็น
+    counts (dict) ถ้าระบุ จะได้รับจำนวนการสลับที่ตรวจ (possible) ที่ถูกต้อง (valid) และที่ให้ประโยชน์ (beneficial)
+    ซึ่งต้องตรวจทุกคู่ลายเซ็น (check_all_swaps) เช่นเดียวกับเมื่อไม่ระบุ limit
     """
-    # นับความถี่ของชมรมในแต่ละช่วงเวลา
-    club_frequencies = count_club_frequencies(students)
-    
-    print("Finding best time slot swaps that preserve student club assignments...")
-    
-    # เก็บการสลับที่ดีที่สุด
-    best_swaps = []
-    
-    # วนลูปผ่านนักศึกษาทุกคู่
+    # ข้อความความคืบหน้าแสดงเฉพาะระดับ DEBUG (ตรวจครั้งเดียว ลูปจึงไม่จัดรูปข้อความเมื่อปิดอยู่)
+    progress = logger.isEnabledFor(logging.DEBUG)
+    if progress:
+        logger.debug("Finding best time slot swaps that preserve student club assignments...")
+
     student_ids = list(students.keys())
-    possible_swaps = 0
-    valid_swaps = 0
-    beneficial_swaps = 0
-    
-    # สร้างตาราง pair_slots เพื่อลดการทดสอบซ้ำ (การสลับ slot1, slot2 กับ slot2, slot1 คือการสลับแบบเดียวกัน)
-    pair_slots = []
-    for slot1 in range(1, 5):
-        for slot2 in range(slot1+1, 5):  # เริ่มจาก slot1+1 เพื่อไม่ให้ซ้ำซ้อน
-            pair_slots.append((slot1, slot2))
-    
-    for i in range(len(student_ids)):
-        if i % 10 == 0 and i > 0:
-            print(f"Processed {i} students, found {beneficial_swaps} beneficial swaps so far...")
-            
-        for j in range(i + 1, len(student_ids)):
-            student_id1 = student_ids[i]
-            student_id2 = student_ids[j]
-            student1 = students[student_id1]
-            student2 = students[student_id2]
-            
-            # ทดลองสลับทุกคู่ช่วงเวลาที่เป็นไปได้
-            for period in ['morning', 'afternoon']:
-                for slot1, slot2 in pair_slots:  # ใช้คู่ช่องเวลาที่สร้างไว้แล้ว
-                    possible_swaps += 1
-                    
-                    # ตรวจสอบว่าการสลับไม่ทำให้จำนวนนักศึกษาต่อชมรมเปลี่ยน
-                    # และรักษาชมรมที่นักศึกษาได้รับการจัดสรร
-                    if is_valid_slot_swap(student1, student2, period, slot1, slot2, club_frequencies):
-                        valid_swaps += 1
-                        
-                        # คำนวณผลประโยชน์จากการสลับ (ระยะทางที่ลดลง)
-                        benefit = calculate_benefit_from_swap(student1, student2, period, slot1, slot2, students)
-                        
-                        # เก็บการสลับที่ให้ประโยชน์ (ระยะทางลดลง)
-                        if benefit > 0:
-                            beneficial_swaps += 1
-                            best_swaps.append({
-                                'student_id1': student_id1,
-                                'student_id2': student_id2,
-                                'period': period,
-                                'slot1': slot1,
-                                'slot2': slot2,
-                                'benefit': benefit
-                            })
-    
-    print(f"\nAnalysis complete:")
-    print(f"Total possible swaps considered: {possible_swaps}")
-    print(f"Valid swaps found (preserve student assignments): {valid_swaps}")
-    print(f"Beneficial swaps found (reduce total distance): {beneficial_swaps}")
-    
-    # เรียงลำดับการสลับตามผลประโยชน์ (ระยะทางที่ลดลง)
-    best_swaps.sort(key=lambda x: x['benefit'], reverse=True)
-    
-    return best_swaps
+    signatures, members = group_assignment_signatures(students, student_ids)
+    sizes = np.array([len(positions) for positions in members], dtype=np.int64)
+    distance_before, distance_after = signature_distances(students, student_ids, members)
+    possible_swaps = len(student_ids) * (len(student_ids) - 1) // 2 * len(SWAPS)
+
+    if limit is not None and counts is None:
+        found, checked = search_top_swaps(signatures, sizes, distance_before, distance_after, limit)
+        if progress:
+            logger.debug("Search complete: %s of %s assignment signature pairs checked for the best %s swaps",
+                         checked, len(signatures) * (len(signatures) + 1) // 2, limit)
+        record(swaps_evaluated=checked * len(SWAPS), signatures=len(signatures))
+        return rank_swaps(found, members, student_ids, limit)
+
+    found, checked, valid_swaps, beneficial_swaps = check_all_swaps(signatures, sizes, distance_before, distance_after,
+                                                                    progress)
+    if progress:
+        logger.debug("Analysis complete: %s possible swaps considered (%s assignment signatures), %s valid "
+                     "(preserve student assignments), %s beneficial (reduce total distance)",
+                     possible_swaps, len(signatures), valid_swaps, beneficial_swaps)
+
+    record(swaps_evaluated=checked * len(SWAPS), valid_swaps=valid_swaps, beneficial_swaps=beneficial_swaps,
+           signatures=len(signatures))
+    if counts is not None:
+        counts.update(possible=possible_swaps, valid=valid_swaps, beneficial=beneficial_swaps)
+
+    return rank_swaps(found, members, student_ids, limit)
+
+# เรียงการสลับที่ให้ประโยชน์ของแต่ละคู่ลายเซ็นเป็นรายการการสลับของคู่นักศึกษา
+def rank_swaps(found, members, student_ids, limit=None):
+    """
+    แปลงการสลับของคู่ลายเซ็น (จาก find_best_swaps) เป็นรายการการสลับของคู่นักศึกษา เรียงตามผลประโยชน์จากมากไปน้อย
+    แล้วตาม (นักศึกษาคนแรก, คนที่สอง, ลำดับการสลับ) กระจายเฉพาะกลุ่มผลประโยชน์ที่ต้องใช้ เมื่อมีรายการครบ limit แล้วจึงหยุด
+    """
+    if not found:
+        return []
+    benefits = np.concatenate([entry[0] for entry in found])
+    rows = np.concatenate([entry[1] for entry in found]).tolist()
+    columns = np.concatenate([entry[2] for entry in found]).tolist()
+    swap_indexes = np.concatenate([entry[3] for entry in found]).tolist()
+    order = np.argsort(-benefits, kind='stable')
+
+    best_swaps = []
+    position = 0
+    while position < len(order) and (limit is None or len(best_swaps) < limit):
+        # การสลับทุกคู่ลายเซ็นที่ผลประโยชน์เท่ากัน เรียงตามคู่นักศึกษาและลำดับการสลับ
+        benefit = benefits[order[position]]
+        pairs = []
+        while position < len(order) and benefits[order[position]] == benefit:
+            entry = order[position]
+            row, column, swap_index = rows[entry], columns[entry], swap_indexes[entry]
+            if row == column:
+                student_pairs = itertools.combinations(members[row], 2)
+            else:
+                student_pairs = ((min(i, j), max(i, j)) for i in members[row] for j in members[column])
+            pairs.extend((i, j, swap_index) for i, j in student_pairs)
+            position += 1
+        pairs.sort()
+        for i, j, swap_index in pairs:
+            period, slot1, slot2 = SWAPS[swap_index]
+            best_swaps.append({
+                'student_id1': student_ids[i],
+                'student_id2': student_ids[j],
+                'period': period,
+                'slot1': slot1,
+                'slot2': slot2,
+                'benefit': float(benefit)
+            })
+    return best_swaps if limit is None else best_swaps[:limit]
 
 # ดำเนินการสลับตามลำดับผลประโยชน์สูงสุด
-def perform_swaps(students, max_swaps=100):
+@profiled
+def perform_swaps(students, max_swaps=100, trace=None):
     """
     ดำเนินการสลับตามลำดับผลประโยชน์สูงสุด
+    trace (ConvergenceTrace) เก็บระยะทางรวม ผลประโยชน์ และจำนวนการสลับที่ตรวจ หลังการสลับแต่ละครั้ง
+    โดยแถวที่ 0 คือระยะทางรวมก่อนสลับ
     """
     # เก็บข้อมูลการสลับที่ทำ
     performed_swaps = []
@@ -376,10 +492,13 @@ def perform_swaps(students, max_swaps=100):
     
     # จำนวนการสลับที่ทำ
     swap_count = 0
+    counts = {} if trace is not None else None
+    if trace is not None:
+        trace.add(len(trace), float(total_distance_before), benefit=0.0, valid_swaps=0, beneficial_swaps=0)
     
     while swap_count < max_swaps:
         # ค้นหาการสลับที่ดีที่สุด
-        best_swaps = find_best_swaps(students)
+        best_swaps = find_best_swaps(students, counts, limit=1)
         
         # ถ้าไม่มีการสลับที่ดี ให้หยุด
         if not best_swaps:
@@ -402,10 +521,14 @@ def perform_swaps(students, max_swaps=100):
         performed_swaps.append(best_swap)
         total_distance_saved += best_swap['benefit']
         swap_count += 1
+        if trace is not None:
+            trace.add(len(trace), float(total_distance_before - total_distance_saved), counts['possible'],
+                      benefit=float(best_swap['benefit']), valid_swaps=counts['valid'],
+                      beneficial_swaps=counts['beneficial'])
         
         # แสดงความคืบหน้า
         if swap_count % 10 == 0:
-            print(f"Performed {swap_count} swaps, saved {total_distance_saved:.2f} distance units so far...")
+            logger.info("Performed %s swaps, saved %.2f distance units so far...", swap_count, total_distance_saved)
     
     # ระยะทางรวมหลังสลับ
     total_distance_after = sum(calculate_student_total_distance(students[student_id]) for student_id in students)
@@ -417,9 +540,11 @@ def perform_swaps(students, max_swaps=100):
     print(f"Total distance after: {total_distance_after:.2f} units")
     print(f"Total distance saved: {total_distance_saved:.2f} units ({(total_distance_saved / total_distance_before * 100):.2f}%)")
     
+    record(students=len(students), swaps=swap_count)
     return students, performed_swaps, total_distance_before, total_distance_after
 
 # บันทึกผลการจัดสรรที่ปรับปรุงแล้วลงไฟล์ CSV
+@profiled
 def save_optimized_assignments(students, output_file):
     """
     บันทึกข้อมูลการจัดสรรที่ปรับปรุงแล้วลงไฟล์ CSV
@@ -465,32 +590,74 @@ def save_optimized_assignments(students, output_file):
     df.to_csv(output_file, index=False, encoding='utf-8-sig')
     
     print(f"Saved optimized assignments to {output_file}")
+    record(rows=len(df))
     
     return df
 
 # ฟังก์ชันหลัก
 def main():
     # กำหนดพารามิเตอร์
-    input_file = "SelectClub\club_assignment_results_improved.csv"
-    output_file = "SelectClub\club_assignment_results_optimized.csv"
-    max_swaps = 1000  # จำนวนการสลับสูงสุด
+    parser = argparse.ArgumentParser(description="Shorten walking paths by swapping club time slots")
+    parser.add_argument('input_file', nargs='?', default=os.path.join("SelectClub", "club_assignment_results_improved.csv"), help="allocation results CSV")
+    parser.add_argument('--output', default=os.path.join("SelectClub", "club_assignment_results_optimized.csv"), help="output CSV for the optimized assignments")
+    parser.add_argument('--max-swaps', type=int, default=1000, help="maximum number of swaps")  # จำนวนการสลับสูงสุด
+    parser.add_argument('--checkpoint-dir', default=None, help="save a snapshot after path optimization here")
+    parser.add_argument('--resume', default=None, help="snapshot file to resume from (skips path optimization)")
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default='info', help="console detail (debug: swap search progress)")
+    parser.add_argument('--profile', default=None, help="write a JSON report of time, CPU and peak memory per stage here")
+    parser.add_argument('--profile-no-memory', action='store_true', help="skip tracemalloc in --profile (lower overhead)")
+    parser.add_argument('--trace', default=None, help="write the distance after every swap here (.csv or .json)")
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    
+    if args.profile:
+        start_profiling(trace_memory=not args.profile_no_memory)
+    try:
+        optimize_paths(args)
+    finally:
+        if args.profile:
+            print_profile(stop_profiling(args.profile, input_file=args.input_file))
+
+# ปรับปรุงเส้นทางตามตัวเลือกจาก command line
+def optimize_paths(args):
+    """
+    อ่านผลการจัดสรร (หรือโหลด snapshot) สลับช่วงเวลาเพื่อลดระยะทาง แล้วบันทึกผล
+    """
+    input_file = args.input_file
+    output_file = args.output
+    max_swaps = args.max_swaps
     
     print(f"Optimizing club assignment paths...")
     print(f"Input file: {input_file}")
     print(f"Output file: {output_file}")
     print(f"Maximum swaps: {max_swaps}")
     
-    # อ่านข้อมูลการจัดสรร
-    print("\nReading assignment data...")
-    df = read_assignment_data(input_file)
-    
-    # สร้างโครงสร้างข้อมูลนักศึกษา
-    print("Creating student data structure...")
-    students = create_student_data(df)
-    
-    # ดำเนินการสลับเพื่อปรับปรุงเส้นทาง
-    print("\nOptimizing paths by swapping time slots...")
-    students, swaps, distance_before, distance_after = perform_swaps(students, max_swaps)
+    if args.resume:
+        # โหลดผลการสลับจาก snapshot (ต้องสร้างจากไฟล์นำเข้าฉบับเดียวกัน) แทนการคำนวณใหม่
+        snapshot = load_checkpoint(args.resume, input_file, PATH_STAGES)
+        students = unpack_students(snapshot['state']['students'])
+    else:
+        # อ่านข้อมูลการจัดสรร
+        print("\nReading assignment data...")
+        df = read_assignment_data(input_file)
+        
+        # สร้างโครงสร้างข้อมูลนักศึกษา
+        print("Creating student data structure...")
+        students = create_student_data(df)
+        
+        # ดำเนินการสลับเพื่อปรับปรุงเส้นทาง
+        print("\nOptimizing paths by swapping time slots...")
+        trace = ConvergenceTrace('perform_swaps', 'distance') if args.trace else None
+        students, swaps, distance_before, distance_after = perform_swaps(students, max_swaps, trace)
+        if trace is not None:
+            trace.save(args.trace)
+        
+        if args.checkpoint_dir:
+            save_checkpoint(args.checkpoint_dir, 'paths', input_file, {
+                'students': pack_students(students),
+                'distance_before': distance_before,
+                'distance_after': distance_after,
+            })
     
     # บันทึกผลการจัดสรรที่ปรับปรุงแล้ว
     print("\nSaving optimized assignments...")
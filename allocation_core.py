@@ -0,0 +1,1438 @@
+#ขั้นตอนหลักของการจัดสรรชมรมแบบ greedy ที่โมดูลอื่นใช้ร่วมกัน: อ่านข้อมูล โครงสร้างการจัดสรร (TimeSlotIndex)
+#การคำนวณคะแนนความพึงพอใจ การจัดสรรเบื้องต้น และการปรับปรุงให้ไม่เกินขีดจำกัดและมีตัวแทนทุกกลุ่ม (adjust_assignments)
+import heapq
+import time
+from collections import defaultdict, Counter
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+
+from student_store import StudentStore, StudentRecord, NO_CLUB, NO_RANK, PERIOD_INDEX, pack_left
+from club_locations import UNKNOWN_DISTANCE, club_buildings, calculate_distance
+from allocation_log import RepairLog, move_logger
+from profiling import profiled, record
+
+# ค่าคงที่สำหรับการจัดสรร
+MAX_STUDENTS_PER_CLUB = 20  # จำนวนนักศึกษาสูงสุดต่อชมรม
+NUM_GROUPS = 10  # จำนวนกลุ่มทั้งหมด (กลุ่ม 0-9)
+NUM_SLOTS_PER_PERIOD = 4  # จำนวนช่วงเวลาต่อคาบ (เช้า/บ่าย)
+GROUP_LABELS = [str(i) for i in range(NUM_GROUPS)]  # ชื่อกลุ่มทั้งหมด ('0'-'9')
+SCORING_ENGINES = ('python', 'numpy')  # วิธีคำนวณคะแนนความพึงพอใจที่เลือกใช้ได้
+PERIODS = ('morning', 'afternoon')  # คาบทั้งหมด (แต่ละคาบจัดสรรแยกกันได้ ไม่มีเงื่อนไขข้ามคาบ)
+INITIAL_STRATEGIES = ('rank', 'balanced')  # วิธีจัดสรรเบื้องต้น: ตามอันดับ หรือกระจายตามความจุ
+
+@profiled
+def read_data(file_path):
+    """
+    อ่านข้อมูลจากไฟล์ CSV
+    """
+    print(f"Reading data from {file_path}...")
+    df = pd.read_csv(file_path, encoding='utf-8-sig')
+    record(rows=len(df))
+    return df
+
+def assign_groups(df):
+    """
+    จัดนักศึกษาเข้ากลุ่มตามตัวเลขในรหัสนักศึกษา
+    """
+    # แปลงรหัสนักศึกษาเป็นสตริงและดึงตัวเลขกลุ่ม (ตัวเลขที่ระบุกลุ่ม)
+    df['group'] = df['รหัสนักศึกษา'].astype(str).apply(lambda x: x[-1] if len(x) > 0 else '0')
+    print(f"Students assigned to groups 0-9 based on the last digit of their ID")
+    return df
+
+def get_all_clubs(df):
+    """
+    รวบรวมชื่อชมรมทั้งหมดจากข้อมูล
+    """
+    morning_clubs = set()
+    afternoon_clubs = set()
+    
+    # รวบรวมชมรมเช้า
+    for i in range(1, 9):
+        col_name = f'ฐานเช้า อันดับที่ {i}'
+        if col_name in df.columns:
+            clubs = df[col_name].dropna().unique()
+            morning_clubs.update(clubs)
+    
+    # รวบรวมชมรมบ่าย
+    for i in range(1, 9):
+        col_name = f'ฐานบ่าย อันดับที่ {i}'
+        if col_name in df.columns:
+            clubs = df[col_name].dropna().unique()
+            afternoon_clubs.update(clubs)
+    
+    # แปลงเป็น list และเรียงลำดับตามชื่อ
+    morning_clubs = sorted(list(morning_clubs))
+    afternoon_clubs = sorted(list(afternoon_clubs))
+    
+    print(f"Found {len(morning_clubs)} morning clubs and {len(afternoon_clubs)} afternoon clubs")
+    
+    return {'morning': morning_clubs, 'afternoon': afternoon_clubs}
+
+def build_rank_scores(preferences):
+    """
+    สร้างตารางค้นหาคะแนนตามอันดับความชอบ: rank_scores[period][club] -> คะแนน
+    (หลัก: อันดับ 1 = 1000, 2 = 800, 3 = 600, 4 = 400 / สำรอง: อันดับ 5 = 300, 6 = 250, 7 = 200, 8 = 150)
+    ถ้าชมรมอยู่ทั้งในรายการหลักและสำรอง หรืออยู่ซ้ำ จะใช้ตำแหน่งแรกในรายการหลักก่อน
+    """
+    rank_scores = {}
+    for period, period_preferences in preferences.items():
+        period_scores = {}
+        for rank, club in enumerate(period_preferences['main']):
+            period_scores.setdefault(club, 1000 - (rank * 200))
+        for rank, club in enumerate(period_preferences['backup']):
+            period_scores.setdefault(club, 300 - (rank * 50))
+        rank_scores[period] = period_scores
+    return rank_scores
+
+@profiled
+def create_student_preferences(df, compact=False):
+    """
+    สร้างโครงสร้างข้อมูลความชอบของนักศึกษา
+    compact=True เก็บข้อมูลใน StudentStore (รหัสชมรมใน NumPy array) ซึ่งใช้หน่วยความจำน้อยกว่ามาก
+    แต่ใช้งานผ่าน key เดิมได้เหมือน dict ของนักศึกษาแบบปกติ
+    """
+    if compact:
+        students = StudentStore.from_preferences(df, rank_scorer=build_rank_scores)
+        print(f"Created preference data for {len(students)} students")
+        record(students=len(students))
+        return students
+    
+    students = {}
+    
+    for _, row in df.iterrows():
+        student_id = str(row['รหัสนักศึกษา'])
+        group = str(row['group'])
+        
+        # สร้างข้อมูลนักศึกษา
+        students[student_id] = {
+            'group': group,
+            'preferences': {
+                'morning': {
+                    'main': [],    # 4 อันดับแรก
+                    'backup': []   # 4 อันดับถัดมา
+                },
+                'afternoon': {
+                    'main': [],    # 4 อันดับแรก
+                    'backup': []   # 4 อันดับถัดมา
+                }
+            },
+            'assignments': {
+                'morning': {},     # ช่วงเวลา -> ชมรม
+                'afternoon': {}    # ช่วงเวลา -> ชมรม
+            },
+            'changes': {
+                'morning': 0,      # จำนวนการเปลี่ยนแปลงในช่วงเช้า
+                'afternoon': 0     # จำนวนการเปลี่ยนแปลงในช่วงบ่าย
+            },
+            'assigned_clubs': {
+                'morning': Counter(),   # ชมรม -> จำนวนช่วงเวลาที่ได้รับ (ต้องตรงกับ assignments เสมอ)
+                'afternoon': Counter()
+            }
+        }
+        
+        # เก็บความชอบชมรมเช้า
+        for i in range(1, 9):
+            col_name = f'ฐานเช้า อันดับที่ {i}'
+            if col_name in row and pd.notna(row[col_name]):
+                if i <= 4:  # 4 อันดับแรกเป็นหลัก
+                    students[student_id]['preferences']['morning']['main'].append(row[col_name])
+                else:       # 4 อันดับถัดมาเป็นสำรอง
+                    students[student_id]['preferences']['morning']['backup'].append(row[col_name])
+        
+        # เก็บความชอบชมรมบ่าย
+        for i in range(1, 9):
+            col_name = f'ฐานบ่าย อันดับที่ {i}'
+            if col_name in row and pd.notna(row[col_name]):
+                if i <= 4:  # 4 อันดับแรกเป็นหลัก
+                    students[student_id]['preferences']['afternoon']['main'].append(row[col_name])
+                else:       # 4 อันดับถัดมาเป็นสำรอง
+                    students[student_id]['preferences']['afternoon']['backup'].append(row[col_name])
+        
+        students[student_id]['rank_scores'] = build_rank_scores(students[student_id]['preferences'])
+    
+    print(f"Created preference data for {len(students)} students")
+    record(students=len(students))
+    return students
+
+class TimeSlotIndex(dict):
+    """
+    โครงสร้างข้อมูลการจัดสรรในแต่ละช่วงเวลา พร้อมดัชนีจำนวนสมาชิกแยกตามกลุ่ม
+    ใช้งานได้เหมือน dict เดิม: time_slots[period][slot][club] คือสมาชิกของชมรม (รหัสนักศึกษา -> กลุ่ม)
+    เรียงตามลำดับที่เข้าชมรม การเพิ่ม/ลบ/ย้ายทำได้ใน O(1) และต้องทำผ่านเมธอดของคลาสเท่านั้น
+    เพื่อให้จำนวนสมาชิกแยกตามกลุ่มตรงกับรายชื่อสมาชิกเสมอ
+    capacity คือจำนวนสมาชิกสูงสุดต่อชมรม (ค่าเริ่มต้น MAX_STUDENTS_PER_CLUB) และ required_groups
+    (คาบ -> ชมรม -> รายชื่อกลุ่ม) จำกัดกลุ่มที่ต้องมีตัวแทน (ค่าเริ่มต้นทุกกลุ่ม) ใช้กับ shard ที่ได้ความจุบางส่วน
+    """
+
+    def __init__(self, clubs, capacity=None, required_groups=None):
+        super().__init__()
+        self.capacity = MAX_STUDENTS_PER_CLUB if capacity is None else capacity
+        self.required_groups = required_groups
+        # จำนวนสมาชิกแยกตามกลุ่ม: group_counts[period][slot][club][group] -> จำนวน
+        self.group_counts = {}
+        for period in ['morning', 'afternoon']:
+            self[period] = {slot: {club: {} for club in clubs[period]} for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)}
+            self.group_counts[period] = {slot: {club: {} for club in clubs[period]} for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)}
+
+    def add(self, student_id, group, period, slot, club):
+        """
+        เพิ่มนักศึกษาเข้าชมรม
+        """
+        self[period][slot][club][student_id] = group
+        counts = self.group_counts[period][slot][club]
+        counts[group] = counts.get(group, 0) + 1
+
+    def remove(self, student_id, period, slot, club):
+        """
+        นำนักศึกษาออกจากชมรม คืนค่ากลุ่มของนักศึกษาคนนั้น
+        """
+        group = self[period][slot][club].pop(student_id)
+        counts = self.group_counts[period][slot][club]
+        counts[group] -= 1
+        if counts[group] == 0:
+            del counts[group]
+        return group
+
+    def add_members(self, period, slot, club, student_ids, groups):
+        """
+        เพิ่มนักศึกษาหลายคนเข้าชมรมเดียวกันตามลำดับที่ระบุ (เหมือนเรียก add ทีละคน)
+        """
+        self[period][slot][club].update(zip(student_ids, groups))
+        counts = self.group_counts[period][slot][club]
+        for group, count in Counter(groups).items():
+            counts[group] = counts.get(group, 0) + count
+
+    def move(self, student_id, period, slot, old_club, new_club):
+        """
+        ย้ายนักศึกษาจากชมรมเดิมไปชมรมใหม่ในช่วงเวลาเดียวกัน
+        """
+        group = self.remove(student_id, period, slot, old_club)
+        self.add(student_id, group, period, slot, new_club)
+
+    def adopt_period(self, other, period):
+        """
+        นำสมาชิกและจำนวนตามกลุ่มของคาบหนึ่งจาก TimeSlotIndex อื่นมาใช้แทนของเดิม
+        (ใช้รวมผลลัพธ์ที่จัดสรรแยกคาบกันใน worker process)
+        """
+        self[period] = other[period]
+        self.group_counts[period] = other.group_counts[period]
+
+    def size(self, period, slot, club):
+        """
+        จำนวนสมาชิกในชมรม
+        """
+        return len(self[period][slot][club])
+
+    def group_count(self, period, slot, club, group):
+        """
+        จำนวนสมาชิกของกลุ่มที่ระบุในชมรม
+        """
+        return self.group_counts[period][slot][club].get(group, 0)
+
+    def missing_groups(self, period, slot, club):
+        """
+        รายชื่อกลุ่มที่ยังไม่มีตัวแทนในชมรม
+        """
+        counts = self.group_counts[period][slot][club]
+        required = GROUP_LABELS if self.required_groups is None else self.required_groups[period][club]
+        return [group for group in required if group not in counts]
+
+def initialize_time_slots(clubs, capacity=None, required_groups=None):
+    """
+    สร้างโครงสร้างข้อมูลสำหรับเก็บการจัดสรรในแต่ละช่วงเวลา
+    """
+    return TimeSlotIndex(clubs, capacity, required_groups)
+
+def move_student(students, time_slots, student_id, period, slot, new_club):
+    """
+    ย้ายนักศึกษาไปชมรมใหม่ในช่วงเวลาเดิม พร้อมอัปเดตดัชนีสมาชิกและจำนวนการเปลี่ยนแปลง
+    คืนค่าชมรมเดิมของนักศึกษา
+    """
+    student = students[student_id]
+    old_club = student['assignments'][period][slot]
+    time_slots.move(student_id, period, slot, old_club, new_club)
+    assign_club(student, period, slot, new_club)
+    student['changes'][period] += 1
+    return old_club
+
+def count_preferences(df, clubs):
+    """
+    นับจำนวนความนิยมของแต่ละชมรม
+    """
+    club_counts = {
+        'morning': {club: 0 for club in clubs['morning']},
+        'afternoon': {club: 0 for club in clubs['afternoon']}
+    }
+    
+    # นับจำนวนชมรมเช้าในสี่อันดับแรก
+    for i in range(1, 5):
+        col_name = f'ฐานเช้า อันดับที่ {i}'
+        if col_name in df.columns:
+            club_series = df[col_name].dropna()
+            for club, count in club_series.value_counts().items():
+                if club in club_counts['morning']:
+                    club_counts['morning'][club] += count
+    
+    # นับจำนวนชมรมบ่ายในสี่อันดับแรก
+    for i in range(1, 5):
+        col_name = f'ฐานบ่าย อันดับที่ {i}'
+        if col_name in df.columns:
+            club_series = df[col_name].dropna()
+            for club, count in club_series.value_counts().items():
+                if club in club_counts['afternoon']:
+                    club_counts['afternoon'][club] += count
+    
+    return club_counts
+
+def encode_labels(values, labels):
+    """
+    แปลงค่าใน values เป็นตำแหน่งใน labels (ค่าว่างหรือไม่อยู่ใน labels ได้ -1) โดย hash แต่ละค่าไม่ซ้ำเพียงครั้งเดียว
+    """
+    codes, uniques = pd.factorize(values)
+    label_index = {label: index for index, label in enumerate(labels)}
+    lookup = np.array([label_index.get(value, -1) for value in uniques] + [-1], dtype=np.int64)
+    return lookup[codes]
+
+@profiled
+def check_feasibility(df, clubs, club_counts):
+    """
+    ตรวจสอบขอบเขตของปัญหาก่อนการจัดสรร (นับแบบ vectorized จากคอลัมน์ความชอบ ไม่ต้องสร้างข้อมูลนักศึกษา)
+    - ความจุ: นักศึกษาที่มีชมรมหลักอย่างน้อย slot อันดับต้องได้ชมรมในช่วงเวลา slot
+      ถ้ามากกว่าจำนวนชมรม * MAX_STUDENTS_PER_CLUB จะมีชมรมเกินขีดจำกัดแน่นอน
+    - การแทนกลุ่ม: ถ้ากลุ่มมีนักศึกษาในช่วงเวลาหนึ่งน้อยกว่าจำนวนชมรม จะมีชมรมที่ขาดกลุ่มนั้นแน่นอน
+    - ความต้องการต่อชมรม (จาก count_preferences): ชมรมที่ถูกเลือกเป็นหลักเกินความจุทั้งคาบ
+      และชมรมที่ถูกเลือกน้อยกว่าที่ต้องใช้เพื่อให้มีตัวแทนครบทุกกลุ่มทุกช่วงเวลา
+    - คู่ (ชมรม, กลุ่ม) ที่มีคนสนใจ (หลักหรือสำรอง) น้อยกว่าจำนวนช่วงเวลา ต้องใช้คนที่ไม่ได้เลือกชมรมนั้นมาแทนกลุ่ม
+    คืนค่า dict ผลการตรวจสอบแยกตามคาบ และ 'feasible' (เป็นไปได้ที่จะไม่เกินขีดจำกัดและมีตัวแทนครบ)
+    """
+    start = time.perf_counter()
+    group_codes = encode_labels(df['group'].to_numpy(), GROUP_LABELS)
+    report = {'feasible': True}
+    
+    for period, label in [('morning', 'เช้า'), ('afternoon', 'บ่าย')]:
+        period_clubs = clubs[period]
+        num_clubs = len(period_clubs)
+        columns = [f'ฐาน{label} อันดับที่ {i}' for i in range(1, 9)]
+        values = df.reindex(columns=columns).to_numpy().ravel()
+        codes = encode_labels(values, period_clubs).reshape(len(df), len(columns))
+        
+        # นักศึกษาได้ชมรมในช่วงเวลา 1 ถึงจำนวนความต้องการหลักที่ระบุไว้
+        num_main = (codes[:, :NUM_SLOTS_PER_PERIOD] >= 0).sum(axis=1)
+        slot_demand = np.array([np.count_nonzero(num_main >= slot) for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)])
+        slot_supply = num_clubs * MAX_STUDENTS_PER_CLUB
+        group_available = np.stack([
+            np.bincount(group_codes[(num_main >= slot) & (group_codes >= 0)], minlength=NUM_GROUPS)
+            for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)
+        ])
+        
+        # จำนวนนักศึกษาที่สนใจแต่ละชมรมแยกตามกลุ่ม (นับคนละครั้งแม้เลือกชมรมเดียวกันซ้ำ)
+        sorted_codes = np.sort(codes, axis=1)
+        distinct = (sorted_codes >= 0) & np.concatenate(
+            [np.ones((len(df), 1), dtype=bool), sorted_codes[:, 1:] != sorted_codes[:, :-1]], axis=1)
+        distinct &= (group_codes >= 0)[:, None]
+        pairs = sorted_codes * NUM_GROUPS + group_codes[:, None]
+        interested = np.bincount(pairs[distinct], minlength=num_clubs * NUM_GROUPS).reshape(num_clubs, NUM_GROUPS)
+        
+        period_report = {
+            'slot_demand': slot_demand.tolist(),
+            'slot_supply': slot_supply,
+            'excess_students': {slot: int(demand - slot_supply) for slot, demand in enumerate(slot_demand, 1)
+                                if demand > slot_supply},
+            'required_limit': int(-(-slot_demand.max() // num_clubs)) if num_clubs else 0,
+            'short_groups': {
+                slot: {GROUP_LABELS[group]: int(num_clubs - available)
+                       for group, available in enumerate(group_available[slot-1]) if available < num_clubs}
+                for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)
+            },
+            'overdemanded_clubs': {club: club_counts[period][club] - NUM_SLOTS_PER_PERIOD * MAX_STUDENTS_PER_CLUB
+                                   for club in period_clubs
+                                   if club_counts[period][club] > NUM_SLOTS_PER_PERIOD * MAX_STUDENTS_PER_CLUB},
+            'underdemanded_clubs': {club: NUM_SLOTS_PER_PERIOD * NUM_GROUPS - club_counts[period][club]
+                                    for club in period_clubs
+                                    if club_counts[period][club] < NUM_SLOTS_PER_PERIOD * NUM_GROUPS},
+            'low_interest': {(period_clubs[club], GROUP_LABELS[group]): int(interested[club, group])
+                             for club, group in zip(*np.nonzero(interested < NUM_SLOTS_PER_PERIOD))}
+        }
+        period_report['short_groups'] = {slot: groups for slot, groups in period_report['short_groups'].items() if groups}
+        
+        if period_report['excess_students'] or period_report['short_groups']:
+            report['feasible'] = False
+        report[period] = period_report
+    
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+def print_feasibility_report(report):
+    """
+    แสดงผลการตรวจสอบจาก check_feasibility
+    """
+    print(f"Feasibility check completed in {report['seconds'] * 1000:.1f} ms")
+    for period in PERIODS:
+        period_report = report[period]
+        demand = '/'.join(str(count) for count in period_report['slot_demand'])
+        print(f"  {period}: students per slot {demand}, capacity {period_report['slot_supply']} per slot")
+        for slot, excess in period_report['excess_students'].items():
+            print(f"  WARNING: {period} slot {slot} has {excess} more students than places "
+                  f"(needs a limit of at least {period_report['required_limit']} per club)")
+        for slot, groups in period_report['short_groups'].items():
+            for group, missing in groups.items():
+                print(f"  WARNING: group {group} is too small to cover every club in {period} slot {slot} "
+                      f"(at least {missing} clubs will miss it)")
+        if period_report['overdemanded_clubs']:
+            clubs_text = ', '.join(f"{club} (+{excess})" for club, excess in period_report['overdemanded_clubs'].items())
+            print(f"  {period}: main choices above capacity: {clubs_text}")
+        if period_report['underdemanded_clubs']:
+            clubs_text = ', '.join(f"{club} (-{shortfall})" for club, shortfall in period_report['underdemanded_clubs'].items())
+            print(f"  {period}: too few main choices for full representation: {clubs_text}")
+        if period_report['low_interest']:
+            print(f"  {period}: {len(period_report['low_interest'])} club/group pairs have fewer than "
+                  f"{NUM_SLOTS_PER_PERIOD} interested students")
+    print("Instance is feasible" if report['feasible'] else "Instance is infeasible: some limits or representation cannot be met")
+
+def calculate_satisfaction_score(student, club, period, slot):
+    """
+    คำนวณคะแนนความพึงพอใจของนักศึกษาที่ได้รับชมรมนั้นๆ
+    ยิ่งคะแนนสูงยิ่งพึงพอใจมาก
+    """
+    # เทียบชนิดตรงๆ เพราะ isinstance กับคลาส Mapping (ABC) ช้ากว่าตัวคำนวณคะแนนของ dict เอง
+    if type(student) is StudentRecord and student.store.rank_table is not None:
+        return calculate_record_satisfaction_score(student, club, period, slot)
+    
+    # ตรวจสอบว่าชมรมนี้ได้รับการจัดสรรให้นักศึกษาคนนี้ไปแล้วหรือไม่ในช่วงเวลาอื่น
+    # ถ้าเคยได้รับแล้ว ให้คะแนนติดลบมาก (ป้องกันไม่ให้ได้ชมรมซ้ำ)
+    # ค้นจากจำนวนชมรมที่ได้รับ (assigned_clubs) ด้วย dict.get ซึ่งไม่เรียก Counter.__missing__ เมื่อไม่พบ
+    if student['assigned_clubs'][period].get(club):
+        return -10000  # ให้คะแนนติดลบมากพอที่จะไม่ถูกเลือก
+    
+    # คะแนนตามอันดับความชอบจากตารางที่สร้างไว้ล่วงหน้า (build_rank_scores)
+    # ความต้องการหลักได้คะแนนสูง ความต้องการสำรองได้คะแนนปานกลาง ไม่อยู่ในความต้องการเลยได้ 0
+    score = student['rank_scores'][period].get(club, 0)
+    
+    # ถ้าเป็นช่วงเวลาที่ต้องการ (ช่วงเวลา slot ตรงกับอันดับการเลือก) ให้คะแนนเพิ่ม
+    # ช่วงเวลา slot ที่ 1 ควรได้ชมรมอันดับ 1, ช่วงเวลาที่ 2 ควรได้ชมรมอันดับ 2 เป็นต้น
+    main = student['preferences'][period]['main']
+    if slot <= len(main) and main[slot-1] == club:
+        score += 500  # โบนัสพิเศษสำหรับการจัดช่วงเวลาที่ตรงกับความต้องการ
+    
+    return score
+
+def calculate_record_satisfaction_score(record, club, period, slot):
+    """
+    calculate_satisfaction_score ของนักศึกษาใน StudentStore: อ่านรหัสชมรมจาก array และ rank_table โดยตรง
+    แทนการผ่านมุมมองแบบ dict (assignments / rank_scores / preferences) ซึ่งต้องสร้างออบเจกต์ทุกครั้ง
+    """
+    store, row, p = record.store, record.row, PERIOD_INDEX[period]
+    code = store.codec.codes.get(club)
+    if code is None:
+        return 0  # ชมรมที่ไม่เคยพบ: ไม่ได้รับและไม่อยู่ในรายการความชอบ
+    if code in store.assignments[row, p].tolist():
+        return -10000
+    
+    score = int(store.rank_table[row, p, code]) if code < store.rank_table.shape[2] else NO_RANK
+    score = 0 if score == NO_RANK else score
+    if slot <= store.main.shape[2] and store.main[row, p, slot - 1] == code:
+        score += 500
+    return score
+
+def slot_satisfaction(rank_scores, main, slot, club, count):
+    """
+    คะแนนของช่วงเวลาหนึ่งเมื่อได้ชมรม club ซึ่งนักศึกษาได้รับทั้งหมด count ช่วงเวลาในคาบนั้น
+    (ได้ซ้ำหลายช่วงเวลาได้ -10000 ไม่เช่นนั้นคะแนนตามอันดับ และ +500 ถ้าตรงกับอันดับของช่วงเวลานั้น)
+    """
+    if count > 1:
+        return -10000
+    score = rank_scores.get(club, 0)
+    if slot <= len(main) and main[slot-1] == club:
+        score += 500
+    return score
+
+def calculate_period_satisfaction(student, period, assignments=None):
+    """
+    คะแนนความพึงพอใจรวมของนักศึกษาในคาบหนึ่งจากชมรมที่ได้รับจริง (assignments: ช่วงเวลา -> ชมรม)
+    ต่างจากการเรียก calculate_satisfaction_score กับชมรมที่ถืออยู่ ตรงที่ไม่นับช่วงเวลานั้นเองเป็นชมรมซ้ำ
+    ชมรมที่ได้ซ้ำในหลายช่วงเวลาได้ -10000 ทุกช่วงเวลาที่ซ้ำ
+    """
+    if assignments is None:
+        assignments = student['assignments'][period]
+    counts = Counter(assignments.values())
+    rank_scores = student['rank_scores'][period]
+    main = student['preferences'][period]['main']
+    return sum(slot_satisfaction(rank_scores, main, slot, club, counts[club]) for slot, club in assignments.items())
+
+def calculate_move_delta(student, period, slot, new_club):
+    """
+    ผลต่างของคะแนนคาบนี้ของนักศึกษาเมื่อเปลี่ยนชมรมในช่วงเวลา slot เป็น new_club
+    คำนวณเฉพาะช่วงเวลาที่คะแนนเปลี่ยนได้ (slot และช่วงเวลาอื่นที่ได้ชมรมเดิมหรือชมรมใหม่) โดยไม่คัดลอก assignments
+    """
+    assignments = student['assignments'][period]
+    old_club = assignments.get(slot)
+    if old_club == new_club:
+        return 0
+    rank_scores = student['rank_scores'][period]
+    main = student['preferences'][period]['main']
+    
+    others = [(other_slot, club) for other_slot, club in assignments.items()
+              if other_slot != slot and (club == old_club or club == new_club)]
+    old_count = sum(1 for _, club in others if club == old_club) + 1
+    new_count = len(others) - old_count + 1
+    
+    delta = slot_satisfaction(rank_scores, main, slot, new_club, new_count + 1)
+    if old_club is not None:
+        delta -= slot_satisfaction(rank_scores, main, slot, old_club, old_count)
+    for other_slot, club in others:
+        if club == old_club:
+            delta += (slot_satisfaction(rank_scores, main, other_slot, club, old_count - 1)
+                      - slot_satisfaction(rank_scores, main, other_slot, club, old_count))
+        else:
+            delta += (slot_satisfaction(rank_scores, main, other_slot, club, new_count + 1)
+                      - slot_satisfaction(rank_scores, main, other_slot, club, new_count))
+    return delta
+
+def rank_position_scores(num_main, num_backup):
+    """
+    คะแนนตามตำแหน่งในรายการความชอบ (หลัก num_main อันดับแล้วต่อด้วยสำรอง num_backup อันดับ) จาก build_rank_scores
+    ใช้กับการคำนวณแบบ array ที่ชมรมได้คะแนนตามตำแหน่งแรกที่ปรากฏในรายการ
+    """
+    positions = list(range(num_main + num_backup))
+    scores = build_rank_scores({'period': {'main': positions[:num_main], 'backup': positions[num_main:]}})['period']
+    return np.array([scores[position] for position in positions], dtype=np.int64)
+
+def calculate_store_satisfaction(store):
+    """
+    คะแนนความพึงพอใจรวมของนักศึกษาแต่ละคน (ทั้งเช้าและบ่าย) จาก array ของ StudentStore ในครั้งเดียว
+    ค่าเดียวกับ calculate_period_satisfaction: คะแนนตามตำแหน่งแรกของชมรมในรายการหลักแล้วสำรอง
+    บวก 500 เมื่อตรงกับอันดับของช่วงเวลา และ -10000 ทุกช่วงเวลาที่ได้ชมรมซ้ำ
+    """
+    assigned = store.assignments
+    candidates = np.concatenate([store.main, store.backup], axis=2)
+    position_scores = rank_position_scores(store.main.shape[2], store.backup.shape[2])
+    
+    # matches[นักศึกษา, คาบ, ช่วงเวลา, ตำแหน่ง]: argmax คืนตำแหน่งแรกที่ตรงกัน
+    matches = candidates[:, :, None, :] == assigned[:, :, :, None]
+    points = np.where(matches.any(axis=3), position_scores[matches.argmax(axis=3)], 0)
+    points += np.where(store.main == assigned, 500, 0)
+    duplicate = (assigned[:, :, :, None] == assigned[:, :, None, :]).sum(axis=3) > 1
+    scores = np.where(duplicate, -10000, points)
+    return np.where(assigned != NO_CLUB, scores, 0).sum(axis=(1, 2))
+
+def calculate_total_satisfaction(students):
+    """
+    คะแนนความพึงพอใจรวมของนักศึกษาทุกคน (ค่าเป้าหมายใน convergence trace)
+    """
+    if isinstance(students, StudentStore):
+        return int(calculate_store_satisfaction(students).sum())
+    return sum(calculate_period_satisfaction(student, period) for student in students.values() for period in PERIODS)
+
+def calculate_store_upper_bound(store, periods=PERIODS):
+    """
+    calculate_satisfaction_upper_bound จาก array ของ StudentStore: คะแนนตามอันดับลดลงตามตำแหน่ง
+    คะแนนสูงสุด k ชมรมที่ไม่ซ้ำกันจึงเป็นตำแหน่งแรกของ k ชมรมแรกที่ไม่ซ้ำในรายการ
+    """
+    columns = [PERIODS.index(period) for period in periods]
+    candidates = np.concatenate([store.main, store.backup], axis=2)[:, columns]
+    position_scores = rank_position_scores(store.main.shape[2], store.backup.shape[2])
+    
+    # ตำแหน่งที่ชมรมปรากฏครั้งแรกในรายการ (ไม่นับช่องว่าง)
+    width = candidates.shape[2]
+    earlier = np.tril(np.ones((width, width), dtype=bool), k=-1)
+    repeated = ((candidates[:, :, :, None] == candidates[:, :, None, :]) & earlier).any(axis=3)
+    first = (candidates != NO_CLUB) & ~repeated
+    
+    num_slots = np.minimum((store.main[:, columns] != NO_CLUB).sum(axis=2), NUM_SLOTS_PER_PERIOD)
+    taken = first & (np.cumsum(first, axis=2) <= num_slots[:, :, None])
+    return int(np.where(taken, position_scores, 0).sum()) + 500 * int(num_slots.sum())
+
+def calculate_satisfaction_upper_bound(students, periods=PERIODS):
+    """
+    ขอบเขตบนของความพึงพอใจรวมโดยไม่คำนึงถึงความจุและการแทนกลุ่ม: นักศึกษาที่ได้ชมรม k ช่วงเวลา
+    ได้ไม่เกินคะแนนตามอันดับสูงสุด k ชมรมที่ไม่ซ้ำกัน บวกโบนัส 500 ทุกช่วงเวลา
+    (เท่ากับคะแนนเมื่อได้ชมรมหลักตรงตามอันดับทุกช่วงเวลา ถ้าชมรมหลักไม่ซ้ำกัน)
+    StudentStore คำนวณจาก array ของทุกคนพร้อมกัน (ค่าเดียวกัน)
+    """
+    if isinstance(students, StudentStore):
+        return calculate_store_upper_bound(students, periods)
+    
+    total = 0
+    for student in students.values():
+        for period in periods:
+            num_slots = min(len(student['preferences'][period]['main']), NUM_SLOTS_PER_PERIOD)
+            best_scores = sorted(student['rank_scores'][period].values(), reverse=True)[:num_slots]
+            total += sum(best_scores) + 500 * num_slots
+    return total
+
+class WalkingRoute:
+    """
+    ระยะทางเดินระหว่างชมรมในช่วงเวลาที่ติดกันของนักศึกษาแต่ละคน (เช้าช่วง 1→2→3→4 แล้วต่อด้วยบ่ายช่วง 1→2→3→4)
+    จากพิกัดชมรม (ค่าเริ่มต้นคือ club_buildings ของ club_locations) หน่วยกิโลเมตร ชมรมที่ไม่มีพิกัดมีระยะทางเป็น
+    UNKNOWN_DISTANCE (อนันต์) เหมือน Pathoptimize ระยะทางรวมของนักศึกษาที่ได้ชมรมนั้นจึงเป็นอนันต์เช่นกัน
+    
+    weight (คะแนนต่อกิโลเมตร) แปลงระยะทางเป็นค่าปรับในหน่วยคะแนนความพึงพอใจ โดยปัดแต่ละช่วงการเดินเป็นจำนวนเต็ม
+    (costs) คะแนนหลังหักค่าปรับจึงยังเป็นจำนวนเต็มและ engine 'python' กับ 'numpy' ให้ผลเหมือนกันทุกกรณี
+    ค่าปรับของระยะทางที่ไม่ทราบคำนวณไม่ได้ จึง raise ValueError เมื่อกำหนด weight แต่มีชมรมที่ไม่มีพิกัด
+    """
+
+    def __init__(self, clubs, weight=0, locations=None):
+        if locations is None:
+            locations = club_buildings
+        self.weight = weight
+        self.names = list(dict.fromkeys(list(clubs['morning']) + list(clubs['afternoon'])))
+        self.unlocated = [club for club in self.names if club not in locations]
+        if weight and self.unlocated:
+            raise ValueError(f"No coordinates for {len(self.unlocated)} clubs ({', '.join(self.unlocated)}); "
+                             f"their walking distance is unknown and cannot be weighted")
+        
+        # คำนวณครั้งเดียวต่อคู่ชมรมแล้วใช้ค่าเดียวกันทั้งสองทิศทาง
+        self.distances = {club: {} for club in self.names}
+        for index, club in enumerate(self.names):
+            for other in self.names[index:]:
+                if club in locations and other in locations:
+                    distance = calculate_distance(locations[club], locations[other])
+                else:
+                    distance = UNKNOWN_DISTANCE
+                self.distances[club][other] = distance
+                self.distances[other][club] = distance
+        self.costs = {club: {other: int(round(weight * distance)) if weight else 0 for other, distance in row.items()}
+                      for club, row in self.distances.items()}
+
+    def neighbours(self, student, period, slot):
+        """
+        ชมรมก่อนหน้าและถัดไปในเส้นทางของนักศึกษา (ข้ามจากเช้าช่วงสุดท้ายไปบ่ายช่วงแรก) หรือ None ถ้ายังไม่ได้จัดสรร
+        """
+        assignments = student['assignments']
+        if slot > 1:
+            previous = assignments[period].get(slot - 1)
+        else:
+            previous = assignments['morning'].get(NUM_SLOTS_PER_PERIOD) if period == 'afternoon' else None
+        if slot < NUM_SLOTS_PER_PERIOD:
+            following = assignments[period].get(slot + 1)
+        else:
+            following = assignments['afternoon'].get(1) if period == 'morning' else None
+        return previous, following
+
+    def penalty(self, student, period, slot, club):
+        """
+        ค่าปรับ (คะแนน) ของการเดินไปและออกจาก club ในช่วงเวลานี้ ตามชมรมในช่วงเวลาที่ติดกัน
+        """
+        previous, following = self.neighbours(student, period, slot)
+        costs = self.costs[club]
+        return (costs[previous] if previous is not None else 0) + (costs[following] if following is not None else 0)
+
+    def order_penalty(self, slot_clubs, previous=None):
+        """
+        ค่าปรับ (คะแนน) ของการเดินตามลำดับชมรม slot_clubs โดยเริ่มจากชมรม previous (ถ้ามี)
+        """
+        route = ([previous] if previous is not None else []) + list(slot_clubs)
+        return sum(self.costs[club][following] for club, following in zip(route, route[1:]))
+
+    def student_distance(self, student):
+        """
+        ระยะทางเดินรวมของนักศึกษาหนึ่งคน (กิโลเมตร) ตามชมรมที่ได้รับทั้งเช้าและบ่าย
+        """
+        route = [student['assignments'][period].get(slot) for period in PERIODS
+                 for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)]
+        route = [club for club in route if club is not None]
+        return sum(self.distances[club][following] for club, following in zip(route, route[1:]))
+
+def calculate_store_distances(store, route):
+    """
+    ระยะทางเดินรวมของนักศึกษาแต่ละคน (กิโลเมตร) จาก array ของ StudentStore ในครั้งเดียว
+    ค่าเดียวกับ WalkingRoute.student_distance (ข้ามช่วงเวลาที่ยังไม่ได้จัดสรร)
+    """
+    if not route.names:
+        return np.zeros(len(store.student_ids))
+    
+    # รหัสชมรมของ StudentStore -> ตำแหน่งใน route.names (ช่อง NO_CLUB อ่านค่าสุดท้ายซึ่งเป็น -1)
+    lookup = np.full(len(store.codec) + 1, -1, dtype=np.intp)
+    for index, club in enumerate(route.names):
+        code = store.codec.codes.get(club)
+        if code is not None:
+            lookup[code] = index
+    distances = np.array([[route.distances[club][other] for other in route.names] for club in route.names],
+                         dtype=np.float64).reshape(len(route.names), len(route.names))
+    
+    path = pack_left(lookup[store.assignments.reshape(len(store.student_ids), -1)])
+    walked = (path[:, :-1] >= 0) & (path[:, 1:] >= 0)
+    legs = np.where(walked, distances[np.maximum(path[:, :-1], 0), np.maximum(path[:, 1:], 0)], 0.0)
+    return legs.sum(axis=1)
+
+def create_walking_route(clubs, distance_weight=None):
+    """
+    สร้าง WalkingRoute เมื่อกำหนด distance_weight (คะแนนต่อกิโลเมตร) หรือคืนค่า None เมื่อไม่คำนึงถึงระยะทาง
+    """
+    if not distance_weight:
+        return None
+    if distance_weight < 0:
+        raise ValueError(f"distance_weight must not be negative: {distance_weight}")
+    return WalkingRoute(clubs, distance_weight)
+
+def calculate_placement_score(student, club, period, slot, route=None):
+    """
+    คะแนนที่ใช้เลือกชมรมให้นักศึกษาในขั้นตอนจัดสรร: คะแนนความพึงพอใจ หักค่าปรับระยะทางเดิน (ถ้าระบุ route)
+    """
+    score = calculate_satisfaction_score(student, club, period, slot)
+    if route is None:
+        return score
+    return score - route.penalty(student, period, slot, club)
+
+def assign_club(student, period, slot, club):
+    """
+    กำหนดชมรมให้นักศึกษาในช่วงเวลาที่ระบุ พร้อมอัปเดตจำนวนชมรมที่ได้รับ (assigned_clubs)
+    การเปลี่ยน assignments ต้องทำผ่านฟังก์ชันนี้เพื่อให้ calculate_satisfaction_score ถูกต้อง
+    (นักศึกษาใน StudentStore เขียนรหัสชมรมลง array โดยตรง และตรวจชมรมซ้ำจาก array)
+    """
+    if isinstance(student, StudentRecord):
+        student.assign(period, slot, club)
+        return
+    
+    assigned_clubs = student['assigned_clubs'][period]
+    old_club = student['assignments'][period].get(slot)
+    if old_club is not None:
+        assigned_clubs[old_club] -= 1
+        if assigned_clubs[old_club] == 0:
+            del assigned_clubs[old_club]
+    
+    student['assignments'][period][slot] = club
+    assigned_clubs[club] += 1
+
+def unassign_club(student, period, slot):
+    """
+    นำชมรมออกจากช่วงเวลาที่ระบุ พร้อมอัปเดตจำนวนชมรมที่ได้รับ (คู่กับ assign_club) คืนค่าชมรมเดิม
+    """
+    club = student['assignments'][period].pop(slot)
+    if not isinstance(student, StudentRecord):
+        assigned_clubs = student['assigned_clubs'][period]
+        assigned_clubs[club] -= 1
+        if assigned_clubs[club] == 0:
+            del assigned_clubs[club]
+    return club
+
+def calculate_slot_quotas(clubs, club_counts, periods=PERIODS, capacity=None):
+    """
+    คำนวณจำนวนนักศึกษาที่ควรมีต่อช่วงเวลาของแต่ละชมรม จากจำนวนผู้เลือกเป็นความต้องการหลัก (count_preferences)
+    ชมรมที่มีผู้เลือกไม่เกินความจุรวมทุกช่วงเวลาใช้ขีดจำกัดปกติ ชมรมที่มีผู้เลือกมากกว่านั้น
+    จะกระจายผู้เลือกเท่าๆ กันในทุกช่วงเวลา (capacity ใช้แทนขีดจำกัดปกติถ้าระบุ)
+    """
+    if capacity is None:
+        capacity = MAX_STUDENTS_PER_CLUB
+    quotas = {}
+    for period in periods:
+        quotas[period] = {
+            club: max(capacity, -(-club_counts[period].get(club, 0) // NUM_SLOTS_PER_PERIOD))
+            for club in clubs[period]
+        }
+    return quotas
+
+def choose_route_slots(main, route, previous=None):
+    """
+    เลือกลำดับช่วงเวลาของชมรมหลักของนักศึกษาหนึ่งคนที่ได้คะแนนสูงสุดเมื่อหักค่าปรับระยะทางเดิน
+    (โบนัส 500 ต่อช่วงเวลาที่ตรงกับอันดับ ลบ route.order_penalty เริ่มจากชมรม previous)
+    ถ้าเท่ากันใช้ลำดับตามอันดับความชอบก่อน คืนค่ารายการชมรมเรียงตามช่วงเวลา
+    """
+    num_slots = min(len(main), NUM_SLOTS_PER_PERIOD)
+    choices = main[:num_slots]
+    
+    best_key = None
+    best_order = choices
+    for order in permutations(range(num_slots)):
+        slot_clubs = [choices[choice] for choice in order]
+        matches = sum(choice == slot - 1 for slot, choice in enumerate(order, 1))
+        key = route.order_penalty(slot_clubs, previous) - 500 * matches
+        if best_key is None or key < best_key:
+            best_key = key
+            best_order = slot_clubs
+    
+    return best_order
+
+def choose_balanced_slots(main, period, time_slots, quotas, route=None, previous=None):
+    """
+    เลือกลำดับช่วงเวลาของชมรมหลักของนักศึกษาหนึ่งคน (ยังได้ชมรมหลักครบเหมือนเดิม แค่สลับช่วงเวลา)
+    เลือกลำดับที่ 1) มีช่วงเวลาที่ชมรมเต็มโควตาแล้วน้อยที่สุด 2) ตรงกับอันดับความชอบมากที่สุด
+    (ถ้าระบุ route ใช้โบนัสของการตรงอันดับหักค่าปรับระยะทางเดินจากชมรม previous แทน)
+    3) ชมรมมีคนน้อยที่สุดโดยรวม คืนค่ารายการชมรมเรียงตามช่วงเวลา
+    """
+    num_slots = min(len(main), NUM_SLOTS_PER_PERIOD)
+    choices = main[:num_slots]
+    
+    # กรณีที่พบบ่อย: ลำดับตามอันดับความชอบยังไม่เต็มโควตาเลย ซึ่งดีที่สุดอยู่แล้ว (เมื่อไม่คำนึงถึงระยะทาง)
+    if route is None and all(time_slots.size(period, slot, club) < quotas[club] for slot, club in enumerate(choices, 1)):
+        return choices
+    
+    best_key = None
+    best_order = choices
+    for order in permutations(range(num_slots)):
+        full = 0
+        matches = 0
+        load = 0
+        for slot, choice in enumerate(order, 1):
+            club = choices[choice]
+            size = time_slots.size(period, slot, club)
+            full += size >= quotas[club]
+            matches += choice == slot - 1
+            load += size
+        if route is None:
+            key = (full, -matches, load)
+        else:
+            key = (full, route.order_penalty([choices[choice] for choice in order], previous) - 500 * matches, load)
+        if best_key is None or key < best_key:
+            best_key = key
+            best_order = [choices[choice] for choice in order]
+    
+    return best_order
+
+@profiled
+def initial_assignment(students, clubs, periods=PERIODS, strategy='rank', club_counts=None, time_slots=None,
+                       route=None):
+    """
+    จัดสรรชมรมเบื้องต้นตามความต้องการหลัก (4 อันดับแรก)
+    periods ระบุคาบที่จะจัดสรร (ค่าเริ่มต้นคือทั้งเช้าและบ่าย)
+    strategy='rank' ให้ชมรมอันดับ 1 ในช่วงที่ 1, อันดับ 2 ในช่วงที่ 2 ไปเรื่อยๆ
+    strategy='balanced' ใช้จำนวนผู้เลือกแต่ละชมรม (club_counts จาก count_preferences) กระจายชมรมยอดนิยม
+    ไปในช่วงเวลาต่างๆ เพื่อลดจำนวนชมรมที่เกินขีดจำกัดและงานของ adjust_assignments
+    time_slots ระบุ TimeSlotIndex ว่างที่จะใส่ผล (เช่น ที่กำหนดความจุของ shard ไว้) ถ้าไม่ระบุจะสร้างใหม่
+    route (WalkingRoute) เลือกลำดับช่วงเวลาของชมรมหลักที่เดินใกล้ขึ้นแม้จะไม่ตรงอันดับ (choose_route_slots)
+    คาบบ่ายนับระยะทางจากชมรมเช้าช่วงสุดท้ายด้วย
+    """
+    if strategy not in INITIAL_STRATEGIES:
+        raise ValueError(f"Unknown initial assignment strategy: {strategy} (expected one of {', '.join(INITIAL_STRATEGIES)})")
+    
+    # สร้างโครงสร้างข้อมูลสำหรับเก็บผลการจัดสรรเบื้องต้น
+    if time_slots is None:
+        time_slots = initialize_time_slots(clubs)
+    
+    if strategy == 'balanced':
+        print("Performing capacity-aware initial club assignment based on main preferences and demand...")
+        quotas = calculate_slot_quotas(clubs, club_counts, periods, time_slots.capacity)
+        
+        for period in periods:
+            for student_id, student in students.items():
+                previous = route.neighbours(student, period, 1)[0] if route is not None else None
+                slot_clubs = choose_balanced_slots(student['preferences'][period]['main'], period, time_slots, quotas[period],
+                                                   route, previous)
+                for slot, club in enumerate(slot_clubs, 1):
+                    assign_club(student, period, slot, club)
+                    time_slots.add(student_id, student['group'], period, slot, club)
+    elif route is not None:
+        print("Performing initial club assignment based on main preferences and walking distance...")
+        
+        for period in periods:
+            for student_id, student in students.items():
+                previous = route.neighbours(student, period, 1)[0]
+                slot_clubs = choose_route_slots(student['preferences'][period]['main'], route, previous)
+                for slot, club in enumerate(slot_clubs, 1):
+                    assign_club(student, period, slot, club)
+                    time_slots.add(student_id, student['group'], period, slot, club)
+    else:
+        print("Performing initial club assignment based on main preferences...")
+        
+        # ทำการจัดสรรชมรมเช้าและบ่ายแยกกัน
+        for period in periods:
+            for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+                # จัดสรรชมรมสำหรับช่วงเวลานี้ให้กับทุกนักศึกษา
+                for student_id, student in students.items():
+                    # ตรวจสอบว่ามีความต้องการหลักสำหรับช่วงเวลานี้หรือไม่
+                    if slot <= len(student['preferences'][period]['main']):
+                        preferred_club = student['preferences'][period]['main'][slot-1]
+                        
+                        # จัดสรรชมรมตามความต้องการเบื้องต้น (ยังไม่คำนึงถึงขีดจำกัดจำนวนและการแทนกลุ่ม)
+                        assign_club(student, period, slot, preferred_club)
+                        time_slots.add(student_id, student['group'], period, slot, preferred_club)
+    
+    # แสดงสถิติเบื้องต้นหลังการจัดสรร
+    print("Initial assignment complete.")
+    count_over_limit = 0
+    for period in periods:
+        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+            for club in clubs[period]:
+                club_members = time_slots[period][slot][club]
+                if len(club_members) > time_slots.capacity:
+                    count_over_limit += 1
+    print(f"Number of club slots exceeding the limit of {time_slots.capacity} students: {count_over_limit}")
+    record(students=len(students), over_limit=count_over_limit)
+    
+    return time_slots
+
+@profiled
+def check_group_representation(students, time_slots, clubs, periods=PERIODS):
+    """
+    ตรวจสอบว่าทุกชมรมมีตัวแทนจากทุกกลุ่มหรือไม่ (เฉพาะคาบใน periods)
+    """
+    print("Checking group representation in each club...")
+    missing_representation = {}
+    
+    for period in periods:
+        missing_representation[period] = {}
+        
+        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+            missing_representation[period][slot] = {}
+            
+            for club in clubs[period]:
+                # เก็บกลุ่มที่ยังไม่มีตัวแทน (อ่านจากดัชนีจำนวนสมาชิกแยกตามกลุ่ม)
+                missing_groups = time_slots.missing_groups(period, slot, club)
+                
+                if missing_groups:
+                    missing_representation[period][slot][club] = missing_groups
+    
+    # สรุปผล
+    total_missing = 0
+    for period in missing_representation:
+        for slot in missing_representation[period]:
+            for club in missing_representation[period][slot]:
+                total_missing += len(missing_representation[period][slot][club])
+    
+    print(f"Found {total_missing} instances where a group is not represented in a club")
+    record(missing_groups=total_missing)
+    return missing_representation
+
+class SatisfactionTensor:
+    """
+    เครื่องคำนวณคะแนนความพึงพอใจแบบ NumPy (engine='numpy')
+    
+    เข้ารหัสความชอบของนักศึกษาทุกคนครั้งเดียวเป็นอาร์เรย์ base[period][student, club, slot]
+    (คะแนนตามอันดับความชอบ + โบนัส 500 เมื่อช่วงเวลาตรงกับอันดับ) ส่วนการได้ชมรมซ้ำซึ่งขึ้นกับ
+    การจัดสรรปัจจุบันเก็บแยกใน assigned[period][student, club] และอัปเดตทุกครั้งที่ย้าย (record_move)
+    คะแนนที่ได้ตรงกับ calculate_satisfaction_score ทุกกรณี
+    ถ้าระบุ route (WalkingRoute) จะเก็บค่าปรับระยะทางเดินระหว่างชมรมเป็นตาราง route_costs[(คาบ, คาบ)]
+    และคะแนนที่ใช้เลือกการย้าย (placement_scores) ตรงกับ calculate_placement_score
+    """
+
+    def __init__(self, students, clubs, route=None):
+        self.clubs = clubs
+        self.route = route
+        self.student_ids = list(students)
+        self.rows = {student_id: row for row, student_id in enumerate(self.student_ids)}
+        
+        # เข้ารหัสกลุ่มเป็นตัวเลข และเก็บแถวของนักศึกษาในแต่ละกลุ่ม (เรียงตามลำดับเดิม)
+        groups = [student['group'] for student in students.values()]
+        group_labels = sorted(set(groups))
+        group_code = {group: code for code, group in enumerate(group_labels)}
+        self.group_codes = np.array([group_code[group] for group in groups], dtype=np.intp)
+        self.num_group_codes = len(group_labels)
+        self.group_rows = {group: np.flatnonzero(self.group_codes == code) for group, code in group_code.items()}
+        
+        self.club_index = {}
+        self.base = {}
+        self.assigned = {}
+        self.current = {}
+        self.changes = {}
+        
+        num_students = len(self.student_ids)
+        for period in ['morning', 'afternoon']:
+            club_index = {club: index for index, club in enumerate(clubs[period])}
+            base = np.zeros((num_students, len(club_index), NUM_SLOTS_PER_PERIOD), dtype=np.int64)
+            assigned = np.zeros((num_students, len(club_index)), dtype=np.int64)
+            current = np.full((num_students, NUM_SLOTS_PER_PERIOD), -1, dtype=np.intp)
+            changes = np.zeros(num_students, dtype=np.int64)
+            
+            for row, student in enumerate(students.values()):
+                for club, points in student['rank_scores'][period].items():
+                    base[row, club_index[club], :] = points
+                
+                main = student['preferences'][period]['main']
+                for slot in range(1, min(len(main), NUM_SLOTS_PER_PERIOD) + 1):
+                    base[row, club_index[main[slot-1]], slot-1] += 500
+                
+                for slot, club in student['assignments'][period].items():
+                    current[row, slot-1] = club_index[club]
+                    assigned[row, club_index[club]] += 1
+                
+                changes[row] = student['changes'][period]
+            
+            self.club_index[period] = club_index
+            self.base[period] = base
+            self.assigned[period] = assigned
+            self.current[period] = current
+            self.changes[period] = changes
+        
+        self.route_costs = {}
+        if route is not None:
+            for first, second in (('morning', 'morning'), ('afternoon', 'afternoon'), ('morning', 'afternoon')):
+                self.route_costs[(first, second)] = np.array(
+                    [[route.costs[club][other] for other in clubs[second]] for club in clubs[first]], dtype=np.int64
+                ).reshape(len(clubs[first]), len(clubs[second]))
+
+    def scores(self, period, rows, club_columns, slot):
+        """
+        คะแนนของนักศึกษาในแถว rows กับชมรมในคอลัมน์ club_columns (broadcast ได้ตามกฎของ NumPy)
+        """
+        base = self.base[period][rows, club_columns, slot-1]
+        return np.where(self.assigned[period][rows, club_columns] > 0, -10000, base)
+
+    def route_penalties(self, period, rows, club_columns, slot):
+        """
+        ค่าปรับระยะทางเดินของนักศึกษาในแถว rows กับชมรมในคอลัมน์ club_columns (ค่าเดียวกับ WalkingRoute.penalty)
+        """
+        penalties = 0
+        if slot > 1:
+            previous = self.current[period][rows, slot-2]
+            costs = self.route_costs[(period, period)]
+        elif period == 'afternoon':
+            previous = self.current['morning'][rows, NUM_SLOTS_PER_PERIOD-1]
+            costs = self.route_costs[('morning', 'afternoon')]
+        else:
+            previous = None
+        if previous is not None:
+            penalties = np.where(previous >= 0, costs[np.maximum(previous, 0), club_columns], 0)
+        
+        if slot < NUM_SLOTS_PER_PERIOD:
+            following = self.current[period][rows, slot]
+            costs = self.route_costs[(period, period)]
+        elif period == 'morning':
+            following = self.current['afternoon'][rows, 0]
+            costs = self.route_costs[('morning', 'afternoon')]
+        else:
+            following = None
+        if following is not None:
+            penalties = penalties + np.where(following >= 0, costs[club_columns, np.maximum(following, 0)], 0)
+        return penalties
+
+    def placement_scores(self, period, rows, club_columns, slot):
+        """
+        คะแนนที่ใช้เลือกการย้าย: คะแนนความพึงพอใจหักค่าปรับระยะทางเดิน (ถ้าระบุ route)
+        """
+        scores = self.scores(period, rows, club_columns, slot)
+        if self.route is None:
+            return scores
+        return scores - self.route_penalties(period, rows, club_columns, slot)
+
+    def score(self, student_id, club, period, slot):
+        """
+        คะแนนของนักศึกษาหนึ่งคนกับชมรมหนึ่งชมรม (ค่าเดียวกับ calculate_satisfaction_score)
+        """
+        return int(self.scores(period, self.rows[student_id], self.club_index[period][club], slot))
+
+    def record_move(self, student_id, period, slot, old_club, new_club):
+        """
+        อัปเดตสถานะการจัดสรรในอาร์เรย์หลังจากย้ายนักศึกษา
+        """
+        row = self.rows[student_id]
+        old_column = self.club_index[period][old_club]
+        new_column = self.club_index[period][new_club]
+        self.assigned[period][row, old_column] -= 1
+        self.assigned[period][row, new_column] += 1
+        self.current[period][row, slot-1] = new_column
+        self.changes[period][row] += 1
+
+    def best_representation_candidate(self, period, slot, club, group):
+        """
+        หานักศึกษาในกลุ่มที่ย้ายเข้าชมรมนี้แล้วเสียความพึงพอใจน้อยที่สุด (คำนวณทั้งกลุ่มพร้อมกัน)
+        คืนค่า (รหัสนักศึกษา, ชมรมเดิม) หรือ None ถ้าไม่มีผู้สมัคร
+        """
+        rows = self.group_rows.get(group)
+        if rows is None or not rows.size:
+            return None
+        
+        column = self.club_index[period][club]
+        current = self.current[period][rows, slot-1]
+        valid = (current >= 0) & (current != column)
+        if not valid.any():
+            return None
+        
+        new_scores = self.placement_scores(period, rows, column, slot)
+        old_scores = self.placement_scores(period, rows, np.where(valid, current, 0), slot)
+        move_scores = new_scores - old_scores - self.changes[period][rows] * 100
+        move_scores = np.where(valid, move_scores, np.iinfo(np.int64).min)
+        
+        # argmax คืนตำแหน่งแรกที่มีค่าสูงสุด จึงเลือกคนที่มาก่อนเมื่อคะแนนเท่ากันเหมือนแบบเดิม
+        best = int(np.argmax(move_scores))
+        return self.student_ids[rows[best]], self.clubs[period][current[best]]
+
+    def best_eviction_candidate(self, time_slots, period, slot, club):
+        """
+        หานักศึกษาในชมรมที่เกินขีดจำกัดที่เหมาะจะย้ายออกมากที่สุด (คำนวณทุกคนและทุกชมรมทางเลือกพร้อมกัน)
+        คืนค่า (รหัสนักศึกษา, ชมรมที่จะย้ายไป) หรือ None ถ้าไม่สามารถย้ายใครได้
+        """
+        members = time_slots[period][slot][club]
+        rows = np.fromiter((self.rows[student_id] for student_id in members), dtype=np.intp, count=len(members))
+        column = self.club_index[period][club]
+        
+        # ห้ามย้ายคนสุดท้ายของกลุ่ม
+        codes = self.group_codes[rows]
+        eligible = np.bincount(codes, minlength=self.num_group_codes)[codes] > 1
+        
+        # ชมรมทางเลือกที่ยังไม่เต็ม (เรียงตามลำดับชมรมเดิม)
+        sizes = np.array([time_slots.size(period, slot, alt_club) for alt_club in self.clubs[period]])
+        alternatives = np.flatnonzero(sizes < time_slots.capacity)
+        alternatives = alternatives[alternatives != column]
+        if not alternatives.size or not eligible.any():
+            return None
+        
+        current_scores = self.placement_scores(period, rows, column, slot)
+        alt_scores = self.placement_scores(period, rows[:, None], alternatives[None, :], slot)
+        best_alt = np.argmax(alt_scores, axis=1)
+        score_diff = alt_scores[np.arange(rows.size), best_alt] - current_scores
+        move_scores = score_diff - self.changes[period][rows] * 100
+        move_scores = np.where(eligible, move_scores, np.iinfo(np.int64).min)
+        
+        best = int(np.argmax(move_scores))
+        return self.student_ids[rows[best]], self.clubs[period][alternatives[best_alt[best]]]
+
+    def student_totals(self):
+        """
+        คะแนนความพึงพอใจรวมของนักศึกษาแต่ละคน (ทุกช่วงเวลาที่ได้รับการจัดสรร ทั้งเช้าและบ่าย)
+        ค่าเดียวกับ calculate_period_satisfaction ของทั้งสองคาบรวมกัน
+        """
+        totals = np.zeros(len(self.student_ids), dtype=np.int64)
+        rows = np.arange(len(self.student_ids))
+        for period in ['morning', 'afternoon']:
+            current = self.current[period]
+            for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+                columns = current[:, slot-1]
+                assigned = columns >= 0
+                columns = np.where(assigned, columns, 0)
+                # ชมรมที่ถืออยู่นับตัวเองใน assigned แล้ว จึงถือว่าซ้ำเมื่อมีมากกว่า 1 ช่วงเวลา
+                duplicate = self.assigned[period][rows, columns] > 1
+                slot_scores = np.where(duplicate, -10000, self.base[period][rows, columns, slot-1])
+                totals += np.where(assigned, slot_scores, 0)
+        return totals
+
+def create_scoring_tensor(students, clubs, engine, route=None):
+    """
+    สร้าง SatisfactionTensor เมื่อเลือก engine='numpy' หรือคืนค่า None เมื่อใช้ engine='python'
+    """
+    if engine not in SCORING_ENGINES:
+        raise ValueError(f"Unknown scoring engine: {engine} (expected one of {', '.join(SCORING_ENGINES)})")
+    if engine == 'numpy':
+        return SatisfactionTensor(students, clubs, route)
+    return None
+
+def build_interest_index(students, period):
+    """
+    จัดนักศึกษาเป็นกลุ่มย่อยตามชมรมที่เลือกไว้ (หลักหรือสำรอง) และกลุ่มของนักศึกษา
+    interested[club][group] -> รายชื่อนักศึกษาตามลำดับเดิม
+    """
+    interested = defaultdict(lambda: defaultdict(list))
+    
+    for student_id, student in students.items():
+        preferences = student['preferences'][period]
+        for club in dict.fromkeys(preferences['main'] + preferences['backup']):
+            interested[club][student['group']].append(student_id)
+    
+    return interested
+
+class RepresentationCandidates:
+    """
+    ดัชนีผู้สมัครสำหรับการเติมกลุ่มที่ขาดตัวแทนในหนึ่ง (คาบ, ช่วงเวลา)
+    
+    คะแนนการย้ายนักศึกษา s เข้าชมรม c แยกได้เป็น
+        move_score = score(s, c) + base(s),  base(s) = -score(s, ชมรมปัจจุบัน) - จำนวนการเปลี่ยนแปลง * 100
+    นักศึกษาที่เลือกชมรม c ไว้ (หลักหรือสำรอง) จะถูกคำนวณคะแนนตรงๆ จาก interested
+    ส่วนคนที่ไม่ได้เลือก c ไว้ได้ score(s, c) ไม่เกิน 0 จึงหาคนที่ดีที่สุดได้จาก max-heap ของ base
+    แยกตามกลุ่ม (สร้างเมื่อถูกใช้ครั้งแรก) โดยรายการของคนที่ถูกย้ายแล้วจะถูกคำนวณใหม่เมื่อถูกดึงออกมา
+    กรณีคะแนนเท่ากันเลือกคนที่อยู่ก่อนตามลำดับของ students เหมือนการเรียงลำดับแบบเดิม
+    ถ้าระบุ route คะแนนทั้งหมดหักค่าปรับระยะทางเดิน (calculate_placement_score) ซึ่งไม่ติดลบ
+    score(s, c) ของคนที่ไม่ได้เลือก c จึงยังไม่เกิน 0
+    """
+
+    def __init__(self, students, period, slot, student_order, interested, route=None):
+        self.students = students
+        self.period = period
+        self.slot = slot
+        self.student_order = student_order
+        self.interested = interested
+        self.route = route
+        self.heaps = {}
+        self.versions = defaultdict(int)
+
+    def _base_score(self, student):
+        current_club = student['assignments'][self.period][self.slot]
+        old_score = calculate_placement_score(student, current_club, self.period, self.slot, self.route)
+        return -old_score - student['changes'][self.period] * 100
+
+    def _push(self, heap, student_id):
+        base = self._base_score(self.students[student_id])
+        heapq.heappush(heap, (-base, self.student_order[student_id], student_id, self.versions[student_id]))
+
+    def _heap(self, group):
+        if group not in self.heaps:
+            heap = []
+            for student_id in self.students:
+                student = self.students[student_id]
+                if student['group'] == group and student['assignments'][self.period].get(self.slot):
+                    base = self._base_score(student)
+                    heap.append((-base, self.student_order[student_id], student_id, 0))
+            heapq.heapify(heap)
+            self.heaps[group] = heap
+        return self.heaps[group]
+
+    def record_move(self, student_id):
+        """
+        แจ้งว่านักศึกษาถูกย้ายแล้ว รายการเดิมใน heap จะหมดอายุและถูกคำนวณใหม่เมื่อถูกดึงออกมา
+        """
+        self.versions[student_id] += 1
+
+    def best_candidate(self, club, group):
+        """
+        หานักศึกษาในกลุ่มที่ย้ายเข้าชมรมนี้แล้วเสียความพึงพอใจน้อยที่สุด
+        คืนค่า (รหัสนักศึกษา, ชมรมเดิม) หรือ None ถ้าไม่มีผู้สมัคร
+        """
+        period, slot = self.period, self.slot
+        best_key = None
+        best = None
+        
+        # นักศึกษาที่เลือกชมรมนี้ไว้: คำนวณคะแนนตรงๆ
+        for student_id in self.interested[club][group]:
+            student = self.students[student_id]
+            current_club = student['assignments'][period].get(slot)
+            if current_club and current_club != club:
+                move_score = calculate_placement_score(student, club, period, slot, self.route) + self._base_score(student)
+                key = (move_score, -self.student_order[student_id])
+                if best_key is None or key > best_key:
+                    best_key, best = key, (student_id, current_club)
+        
+        # นักศึกษาที่ไม่ได้เลือกชมรมนี้: ดึงจาก heap ตามลำดับ base จากมากไปน้อย
+        heap = self._heap(group)
+        popped = []
+        while heap:
+            entry = heapq.heappop(heap)
+            neg_base, order, student_id, version = entry
+            if version != self.versions[student_id]:
+                # รายการหมดอายุ (นักศึกษาถูกย้ายไปแล้ว) ให้คำนวณใหม่
+                self._push(heap, student_id)
+                continue
+            popped.append(entry)
+            
+            student = self.students[student_id]
+            current_club = student['assignments'][period][slot]
+            if current_club == club or club in student['rank_scores'][period]:
+                continue
+            
+            new_score = calculate_placement_score(student, club, period, slot, self.route)
+            key = (new_score - neg_base, -order)
+            if best_key is None or key > best_key:
+                best_key, best = key, (student_id, current_club)
+            
+            # คนที่ไม่ได้เลือกชมรมนี้และไม่ได้ชมรมนี้ซ้ำได้คะแนน 0 ซึ่งเป็นค่าสูงสุดที่เป็นไปได้
+            # รายการที่เหลือใน heap จึงไม่มีทางดีกว่านี้
+            if new_score >= 0:
+                break
+        
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        
+        return best
+
+class EvictionQueue:
+    """
+    คิวลำดับความสำคัญของนักศึกษาที่จะย้ายออกจากชมรมที่เกินขีดจำกัดหนึ่งชมรม (หนึ่ง (คาบ, ช่วงเวลา, ชมรม))
+    
+    สร้างครั้งเดียวเมื่อเริ่มแก้ปัญหาชมรมนั้น: แต่ละคนมีรายการชมรมทางเลือกเรียงจากดีที่สุด
+    (ผลต่างคะแนนมากสุด ถ้าเท่ากันเรียงตามลำดับชมรม) และ max-heap ของคะแนนการย้ายของทุกคน
+    ระหว่างแก้ปัญหาชมรมนี้ ชมรมอื่นมีแต่จะเต็มขึ้น และคะแนนของแต่ละคนขึ้นกับการจัดสรรของตัวเองเท่านั้น
+    จึงต้องคำนวณใหม่เฉพาะรายการที่ชมรมทางเลือกที่ดีที่สุดเต็มแล้ว (เลื่อนไปทางเลือกถัดไป)
+    และตัดคนที่กลายเป็นคนสุดท้ายของกลุ่มออก ผลที่ได้จึงเหมือนการคำนวณใหม่ทั้งหมดทุกรอบ
+    ถ้าระบุ route คะแนนหักค่าปรับระยะทางเดิน (ขึ้นกับชมรมในช่วงเวลาอื่นของนักศึกษาคนเดียวกัน จึงไม่เปลี่ยนระหว่างทาง)
+    """
+
+    def __init__(self, students, time_slots, clubs, period, slot, club, route=None):
+        self.students = students
+        self.time_slots = time_slots
+        self.period = period
+        self.slot = slot
+        self.club = club
+        self.alternatives = {}
+        self.heap = []
+        
+        for order, student_id in enumerate(time_slots[period][slot][club]):
+            student = students[student_id]
+            current_score = calculate_placement_score(student, club, period, slot, route)
+            alternatives = [
+                (calculate_placement_score(student, alt_club, period, slot, route) - current_score, -club_order, alt_club)
+                for club_order, alt_club in enumerate(clubs[period]) if alt_club != club
+            ]
+            alternatives.sort(reverse=True)
+            self.alternatives[student_id] = alternatives
+            self._push(student_id, order, 0)
+
+    def _push(self, student_id, order, position):
+        """
+        เพิ่มรายการของนักศึกษาโดยใช้ชมรมทางเลือกที่ยังไม่เต็มตัวแรกตั้งแต่ตำแหน่ง position
+        """
+        alternatives = self.alternatives[student_id]
+        while position < len(alternatives):
+            score_diff, _, alt_club = alternatives[position]
+            if self.time_slots.size(self.period, self.slot, alt_club) < self.time_slots.capacity:
+                # คำนวณคะแนนการย้าย (คะแนนต่ำ = เหมาะสมที่จะย้ายออก)
+                # พิจารณาทั้งความเสียประโยชน์และจำนวนครั้งที่เคยย้าย
+                change_penalty = self.students[student_id]['changes'][self.period] * 100
+                move_score = score_diff - change_penalty
+                heapq.heappush(self.heap, (-move_score, order, student_id, position))
+                return
+            position += 1
+
+    def pop_best(self):
+        """
+        นำนักศึกษาที่เหมาะจะย้ายออกมากที่สุด (เสียประโยชน์น้อยที่สุด) ออกจากคิว
+        คืนค่า (รหัสนักศึกษา, ชมรมที่จะย้ายไป) หรือ None ถ้าไม่สามารถย้ายใครได้
+        """
+        while self.heap:
+            _, order, student_id, position = heapq.heappop(self.heap)
+            group = self.students[student_id]['group']
+            
+            # ถ้าเป็นคนสุดท้ายของกลุ่ม ห้ามย้าย (จำนวนในกลุ่มมีแต่จะลดลง จึงตัดออกได้เลย)
+            if self.time_slots.group_count(self.period, self.slot, self.club, group) <= 1:
+                continue
+            
+            # ถ้าชมรมทางเลือกเต็มแล้ว ให้เลื่อนไปใช้ทางเลือกถัดไป
+            _, _, alt_club = self.alternatives[student_id][position]
+            if self.time_slots.size(self.period, self.slot, alt_club) >= self.time_slots.capacity:
+                self._push(student_id, order, position + 1)
+                continue
+            
+            return student_id, alt_club
+        
+        return None
+
+def resolve_overcrowding(students, time_slots, clubs, period, slot, club, tensor=None, route=None, log=None):
+    """
+    ย้ายนักศึกษาออกจากชมรมที่เกินขีดจำกัดทีละคน (คนที่เสียประโยชน์น้อยที่สุดก่อน) จนกว่าจะไม่เกิน
+    หรือไม่สามารถย้ายใครได้อีก คืนค่าจำนวนนักศึกษาที่ถูกย้าย การย้ายและคำเตือนถูกนับใน log (RepairLog)
+    """
+    club_members = time_slots[period][slot][club]
+    if len(club_members) <= time_slots.capacity:
+        return 0
+    if log is None:
+        log = RepairLog()
+    
+    queue = EvictionQueue(students, time_slots, clubs, period, slot, club, route) if tensor is None else None
+    moves = 0
+    
+    while len(club_members) > time_slots.capacity:
+        # หาคนที่เหมาะสมจะย้ายออก (คนที่เสียประโยชน์น้อยที่สุด) และชมรมที่จะย้ายไป
+        if tensor is not None:
+            candidate = tensor.best_eviction_candidate(time_slots, period, slot, club)
+        else:
+            candidate = queue.pop_best()
+        
+        if candidate is None:
+            # ไม่สามารถย้ายใครได้ อาจต้องยอมให้เกินขีดจำกัด
+            log.warning(period, slot, 'over_limit', club, len(club_members))
+            break
+        
+        # ย้ายคนที่เหมาะสมที่สุด
+        student_id, new_club = candidate
+        
+        # ย้ายออกจากชมรมเดิมเข้าชมรมใหม่ และอัปเดตข้อมูลนักศึกษา
+        move_student(students, time_slots, student_id, period, slot, new_club)
+        if tensor is not None:
+            tensor.record_move(student_id, period, slot, club, new_club)
+        moves += 1
+        log.move(period, slot, 'overcrowding', student_id, club, new_club)
+    
+    return moves
+
+@profiled
+def adjust_assignments(students, time_slots, clubs, missing_representation, engine='python', periods=PERIODS,
+                       route=None, trace=None):
+    """
+    ปรับปรุงการจัดสรรเพื่อให้มีตัวแทนจากทุกกลุ่มในทุกชมรม
+    และจำนวนนักศึกษาไม่เกินขีดจำกัด (เฉพาะคาบใน periods)
+    engine เลือกวิธีคำนวณคะแนน: 'python' (ทีละคน) หรือ 'numpy' (SatisfactionTensor) ให้ผลเหมือนกัน
+    route (WalkingRoute) เลือกคนและชมรมที่จะย้ายโดยหักค่าปรับระยะทางเดินจากคะแนนด้วย
+    trace (ConvergenceTrace) เก็บความพึงพอใจรวม จำนวนชมรมที่เกินขีดจำกัด กลุ่มที่ขาดตัวแทน
+    และจำนวนการค้นหาผู้ย้าย หลังแต่ละ (คาบ, ช่วงเวลา) โดยแถวที่ 0 คือสถานะก่อนปรับปรุง
+    """
+    print("Adjusting assignments to ensure group representation and club size limits...")
+    
+    # เตรียมเครื่องคำนวณคะแนนแบบ NumPy ถ้าเลือกใช้
+    tensor = create_scoring_tensor(students, clubs, engine, route)
+    
+    # จำนวนการย้ายทั้งหมดในขั้นตอนนี้ และจำนวนแยกตาม (คาบ, ช่วงเวลา, เหตุผล)
+    repair_moves = 0
+    log = RepairLog()
+    
+    # ลำดับของนักศึกษา ใช้ตัดสินกรณีคะแนนเท่ากัน (คนที่มาก่อนได้รับเลือกก่อน)
+    student_order = {student_id: index for index, student_id in enumerate(students)}
+    
+    if trace is not None:
+        over_limit, missing = count_violations(time_slots, clubs, periods)
+        trace.add(len(trace), calculate_total_satisfaction(students), period='', slot=0,
+                  over_limit=over_limit, missing_groups=missing, moves=0)
+    
+    for period in periods:
+        interested = build_interest_index(students, period) if tensor is None else None
+        
+        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+            if tensor is None:
+                representation_candidates = RepresentationCandidates(students, period, slot, student_order, interested, route)
+            cell_moves = repair_moves
+            lookups = 0
+            
+            # จัดการปัญหาการแทนกลุ่มก่อน
+            for club, missing_groups in missing_representation[period][slot].items():
+                for missing_group in missing_groups:
+                    # หานักศึกษาจากกลุ่มที่หายไปที่เหมาะจะย้ายเข้ามาในชมรมนี้มากที่สุด
+                    # (เสียความพึงพอใจน้อยที่สุด) จากดัชนีผู้สมัครของกลุ่ม
+                    if tensor is not None:
+                        candidate = tensor.best_representation_candidate(period, slot, club, missing_group)
+                    else:
+                        candidate = representation_candidates.best_candidate(club, missing_group)
+                    lookups += 1
+                    
+                    # ย้ายคนที่เหมาะสมที่สุด
+                    if candidate:
+                        student_id, old_club = candidate
+                        
+                        # ย้ายจากชมรมเดิมเข้าชมรมใหม่ และอัปเดตข้อมูลนักศึกษา
+                        move_student(students, time_slots, student_id, period, slot, club)
+                        if tensor is not None:
+                            tensor.record_move(student_id, period, slot, old_club, club)
+                        else:
+                            representation_candidates.record_move(student_id)
+                        repair_moves += 1
+                        log.move(period, slot, 'representation', student_id, old_club, club)
+            
+            # จัดการปัญหาจำนวนเกิน
+            for club in clubs[period]:
+                repair_moves += resolve_overcrowding(students, time_slots, clubs, period, slot, club, tensor, route, log)
+            
+            if trace is not None:
+                # การค้นหาผู้ย้ายออก = จำนวนที่ย้ายได้ + จำนวนชมรมที่หาคนย้ายไม่ได้
+                lookups += log.moves[period, slot, 'overcrowding'] + log.warnings[period, slot, 'over_limit']
+                over_limit, missing = count_violations(time_slots, clubs, periods)
+                trace.add(len(trace), calculate_total_satisfaction(students), lookups, period=period, slot=slot,
+                          over_limit=over_limit, missing_groups=missing, moves=repair_moves - cell_moves)
+    
+    # ตรวจสอบอีกครั้งว่ามีตัวแทนทุกกลุ่มหรือไม่
+    missing_after = check_group_representation(students, time_slots, clubs, periods)
+    
+    # สรุปจำนวนที่เกินขีดจำกัด
+    over_limit_count = 0
+    for period in periods:
+        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+            for club in clubs[period]:
+                count = len(time_slots[period][slot][club])
+                if count > time_slots.capacity:
+                    over_limit_count += 1
+                    if log.detail:
+                        move_logger.debug("%s slot %s: %s still has %s students (over limit)", period, slot, club, count)
+    
+    log.report("Repair moves")
+    print(f"After adjustments: {over_limit_count} club slots still exceed the student limit")
+    print(f"Total repair moves: {repair_moves}")
+    record(students=len(students), moves=repair_moves, over_limit=over_limit_count)
+    
+    return time_slots
+
+def count_violations(time_slots, clubs, periods=PERIODS):
+    """
+    นับจำนวน (ชมรม, ช่วงเวลา) ที่เกินขีดจำกัด และจำนวนกลุ่มที่ขาดตัวแทนรวมทุกชมรม
+    """
+    over_limit = 0
+    missing = 0
+    for period in periods:
+        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+            for club in clubs[period]:
+                if time_slots.size(period, slot, club) > time_slots.capacity:
+                    over_limit += 1
+                missing += len(time_slots.missing_groups(period, slot, club))
+    return over_limit, missing
+
+def calculate_gap(total_satisfaction, upper_bound):
+    """
+    ระยะห่างจากขอบเขตบนเป็นสัดส่วน (0 = ถึงขอบเขตบนแล้ว)
+    """
+    if upper_bound <= 0:
+        return 0.0
+    return (upper_bound - total_satisfaction) / upper_bound
@@ -0,0 +1,175 @@
+#บันทึกข้อความของขั้นตอนปรับปรุงการจัดสรรด้วยโมดูล logging แทนการ print ทีละการย้าย
+#ค่าเริ่มต้นแสดงเฉพาะจำนวนการย้ายและคำเตือนรวมต่อ (คาบ, ช่วงเวลา) ส่วนรายละเอียดทีละการย้าย (ระดับ DEBUG)
+#ต้องเปิดเอง และเมื่อเขียนลงไฟล์จะเก็บไว้ใน buffer (MemoryHandler) แล้วเขียนครั้งละหลายบรรทัด
+import contextlib
+import io
+import logging
+import logging.handlers
+import sys
+from collections import Counter
+
+from student_store import PERIODS
+
+LOGGER_NAME = 'selectclub'  # logger หลักของโปรแกรม (logger ย่อย เช่น 'selectclub.moves' ส่งข้อความขึ้นมาที่นี่)
+LOG_LEVELS = ('debug', 'info', 'warning')  # ระดับของข้อความบน console ที่เลือกได้
+MOVE_LOG_CAPACITY = 10000  # จำนวนข้อความที่เก็บใน buffer ก่อนเขียนลงไฟล์รายละเอียด
+REPAIR_REASONS = {  # คำอธิบายของเหตุผลการย้ายและคำเตือนในสรุป
+    'representation': 'representation',
+    'overcrowding': 'overcrowding',
+    'unrepresented': 'no representative',
+    'over_limit': 'could not reduce',
+}
+
+logger = logging.getLogger(LOGGER_NAME)
+move_logger = logging.getLogger(LOGGER_NAME + '.moves')
+output_logger = logging.getLogger(LOGGER_NAME + '.output')  # ข้อความจาก print ระหว่าง capture_to_file
+
+class ConsoleHandler(logging.Handler):
+    """
+    เขียนข้อความลง sys.stdout ที่ใช้อยู่ขณะบันทึก (ไม่ผูกกับ stream ตอนสร้าง handler)
+    ข้อความจึงตามไปอยู่ในที่เดียวกับ print เช่นเมื่อการทดสอบหรือโปรแกรมอื่นใช้ contextlib.redirect_stdout
+    """
+
+    def emit(self, record):
+        try:
+            sys.stdout.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+# ค่าเริ่มต้นเมื่อไม่ได้เรียก configure_logging (เช่น เรียกใช้ฟังก์ชันจากโปรแกรมอื่น): แสดงสรุประดับ INFO บน console
+console_handler = ConsoleHandler(logging.INFO)
+logger.addHandler(console_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+def configure_logging(level='info', move_log=None):
+    """
+    ตั้งค่าระดับของข้อความบน console (LOG_LEVELS) และไฟล์รายละเอียดทีละการย้าย move_log (ถ้าระบุ)
+    ไฟล์รายละเอียดได้รับข้อความทุกระดับผ่าน MemoryHandler ซึ่งเขียนลงไฟล์เมื่อ buffer เต็ม
+    หรือเมื่อ flush_logging ถูกเรียก (ท้ายขั้นตอนปรับปรุงแต่ละครั้ง และตอนจบโปรแกรม)
+    """
+    console_level = getattr(logging, level.upper())
+    console_handler.setLevel(console_level)
+    logger.setLevel(console_level)
+    if move_log:
+        # ล้างไฟล์ก่อนแล้วเปิดแบบต่อท้าย เพื่อให้ worker process หลายตัวเขียนต่อกันได้โดยไม่ทับกัน
+        open(move_log, 'w', encoding='utf-8').close()
+        target = logging.FileHandler(move_log, mode='a', encoding='utf-8')
+        target.setFormatter(logging.Formatter('%(name)s %(levelname)s %(message)s'))
+        logger.addHandler(logging.handlers.MemoryHandler(MOVE_LOG_CAPACITY, flushLevel=logging.ERROR, target=target))
+        logger.setLevel(logging.DEBUG)
+
+def flush_logging():
+    """
+    เขียนข้อความที่ค้างอยู่ใน buffer ของไฟล์รายละเอียดลงไฟล์
+    """
+    for handler in logger.handlers:
+        handler.flush()
+
+class LogWriter(io.TextIOBase):
+    """
+    stream สำหรับแทน sys.stdout ที่ส่งข้อความจาก print ไปที่ output_logger (ระดับ INFO) ทีละบรรทัด
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.pending = ''  # ข้อความท้ายที่ยังไม่จบบรรทัด
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        *lines, self.pending = (self.pending + text).split('\n')
+        for line in lines:
+            output_logger.info(line)
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            output_logger.info(self.pending)
+            self.pending = ''
+
+@contextlib.contextmanager
+def capture_to_file(path):
+    """
+    ส่งข้อความทั้งหมดระหว่างบล็อก (ข้อความของ logger ทุกตัวในโปรแกรม และ print ผ่าน LogWriter) ลงไฟล์ path
+    แทน console ใช้กับไฟล์ .log ของแต่ละไฟล์นำเข้าในโหมด batch ไฟล์เก็บข้อความระดับ INFO ขึ้นไปเสมอ
+    (หรือละเอียดกว่าถ้า configure_logging ตั้งไว้) ไม่ขึ้นกับ --log-level ของ console
+    """
+    handler = logging.FileHandler(path, mode='w', encoding='utf-8')
+    level = logger.level
+    writer = LogWriter()
+    logger.removeHandler(console_handler)
+    logger.addHandler(handler)
+    logger.setLevel(min(level, logging.INFO))
+    try:
+        with contextlib.redirect_stdout(writer):
+            yield
+    finally:
+        writer.flush()
+        logger.removeHandler(handler)
+        handler.close()
+        logger.addHandler(console_handler)
+        logger.setLevel(level)
+        flush_logging()
+
+class RepairLog:
+    """
+    นับการย้ายและคำเตือนของขั้นตอนปรับปรุงต่อ (คาบ, ช่วงเวลา, เหตุผล) แทนการแสดงข้อความทีละการย้าย
+    รายละเอียดทีละการย้ายถูกส่งไปที่ระดับ DEBUG เฉพาะเมื่อเปิดไว้ (ตรวจครั้งเดียวตอนสร้าง จึงไม่มีการจัดรูปข้อความ
+    ในลูปเมื่อปิดอยู่) และ report แสดงสรุปเมื่อจบขั้นตอน
+    """
+
+    def __init__(self):
+        self.moves = Counter()  # (คาบ, ช่วงเวลา, เหตุผล) -> จำนวนการย้าย
+        self.warnings = Counter()  # (คาบ, ช่วงเวลา, เหตุผล) -> จำนวนคำเตือน
+        self.detail = move_logger.isEnabledFor(logging.DEBUG)
+
+    def move(self, period, slot, reason, student_id, old_club, new_club):
+        """
+        บันทึกการย้ายนักศึกษา student_id จาก old_club ไป new_club ด้วยเหตุผล reason ('representation' / 'overcrowding')
+        """
+        self.moves[period, slot, reason] += 1
+        if self.detail:
+            move_logger.debug("%s slot %s: moved student %s from %s to %s (%s)",
+                              period, slot, student_id, old_club, new_club, reason)
+
+    def warning(self, period, slot, reason, club, size=None):
+        """
+        บันทึกคำเตือนของชมรม club ('unrepresented': ไม่มีตัวแทนกลุ่มที่ย้ายมาได้ / 'over_limit': ลดจำนวนไม่ได้)
+        """
+        self.warnings[period, slot, reason] += 1
+        if self.detail:
+            move_logger.debug("%s slot %s: %s for %s (size %s)", period, slot, REPAIR_REASONS[reason], club, size)
+
+    def cells(self):
+        """
+        (คาบ, ช่วงเวลา) ที่มีการย้ายหรือคำเตือน เรียงตามคาบแล้วตามช่วงเวลา
+        """
+        cells = {(period, slot) for period, slot, _ in list(self.moves) + list(self.warnings)}
+        return sorted(cells, key=lambda cell: (PERIODS.index(cell[0]), cell[1]))
+
+    @staticmethod
+    def describe(counts, period, slot):
+        """
+        ข้อความสรุปจำนวนต่อเหตุผลของ (คาบ, ช่วงเวลา) เช่น 'overcrowding 12, representation 3'
+        """
+        return ', '.join(f"{REPAIR_REASONS[reason]} {count}" for (p, s, reason), count in counts.items()
+                         if p == period and s == slot)
+
+    def report(self, title):
+        """
+        แสดงสรุปการย้าย (ระดับ INFO) และคำเตือน (ระดับ WARNING) ต่อ (คาบ, ช่วงเวลา) แล้วเขียน buffer ลงไฟล์
+        """
+        if self.moves and logger.isEnabledFor(logging.INFO):
+            logger.info("%s by period and slot:", title)
+            for period, slot in self.cells():
+                total = sum(count for (p, s, _), count in self.moves.items() if p == period and s == slot)
+                if total:
+                    logger.info("  %s slot %s: %s moves (%s)", period, slot, total, self.describe(self.moves, period, slot))
+        for period, slot in self.cells():
+            total = sum(count for (p, s, _), count in self.warnings.items() if p == period and s == slot)
+            if total:
+                logger.warning("  WARNING: %s slot %s: %s clubs not fixed (%s)", period, slot, total,
+                               self.describe(self.warnings, period, slot))
+        flush_logging()
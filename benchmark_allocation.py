@@ -0,0 +1,678 @@
+#วัดประสิทธิภาพของขั้นตอนต่างๆ ในการจัดสรรชมรม โดยขยายไฟล์ข้อมูลตัวอย่างให้มีจำนวนนักศึกษามากขึ้น
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+import sharding
+import Pathoptimize as paths
+from result_io import pyarrow, read_results
+
+def scale_input(df, num_students):
+    """
+    ขยายข้อมูลนักศึกษาให้ได้จำนวนที่ต้องการ โดยวนใช้ความชอบของนักศึกษาเดิมซ้ำ
+    และออกรหัสนักศึกษาใหม่ต่อเนื่องกัน (กลุ่มจึงยังกระจายเท่าๆ กันตามตัวเลขสุดท้าย)
+    """
+    repeats = -(-num_students // len(df))
+    scaled = pd.concat([df] * repeats, ignore_index=True).iloc[:num_students].copy()
+    first_id = int(df['รหัสนักศึกษา'].min())
+    scaled['รหัสนักศึกษา'] = range(first_id, first_id + num_students)
+    return scaled
+
+def prepare_students(input_file, num_students):
+    """
+    อ่านไฟล์ ขยายข้อมูล และสร้างโครงสร้างนักศึกษาพร้อมการจัดสรรเบื้องต้น (ไม่แสดงข้อความระหว่างทาง)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = allocation.read_data(input_file)
+        df = allocation.assign_groups(scale_input(df, num_students))
+        clubs = allocation.get_all_clubs(df)
+        students = allocation.create_student_preferences(df)
+        time_slots = allocation.initial_assignment(students, clubs)
+    return df, students, time_slots, clubs
+
+def set_capacity(capacity):
+    """
+    เปลี่ยนขีดจำกัดจำนวนนักศึกษาต่อชมรมในทุกโมดูลที่อ่านค่า MAX_STUDENTS_PER_CLUB
+    """
+    for module in (core, sharding, allocation):
+        module.MAX_STUDENTS_PER_CLUB = capacity
+
+def legacy_calculate_satisfaction_score(student, club, period, slot):
+    """
+    calculate_satisfaction_score แบบเดิม (ค้นหาในลิสต์ทุกครั้ง) ใช้เป็นค่าอ้างอิงในการเปรียบเทียบ
+    """
+    for existing_slot, existing_club in student['assignments'][period].items():
+        if existing_club == club:
+            return -10000
+
+    if club in student['preferences'][period]['main']:
+        pref_rank = student['preferences'][period]['main'].index(club)
+        score = 1000 - (pref_rank * 200)
+    elif club in student['preferences'][period]['backup']:
+        pref_rank = student['preferences'][period]['backup'].index(club)
+        score = 300 - (pref_rank * 50)
+    else:
+        score = 0
+
+    if slot <= len(student['preferences'][period]['main']):
+        target_club_for_slot = student['preferences'][period]['main'][slot-1]
+        if club == target_club_for_slot:
+            score += 500
+
+    return score
+
+def legacy_find_eviction_candidate(students, time_slots, clubs, period, slot, club):
+    """
+    การเลือกคนที่จะย้ายออกจากชมรมที่เกินขีดจำกัดแบบเดิม (คำนวณทุกคนและทุกชมรมทางเลือกใหม่ทุกรอบ)
+    ใช้เป็นค่าอ้างอิงในการเปรียบเทียบกับ EvictionQueue
+    """
+    move_candidates = []
+    for student_id in time_slots[period][slot][club]:
+        student = students[student_id]
+        if time_slots.group_count(period, slot, club, student['group']) <= 1:
+            continue
+
+        current_score = core.calculate_satisfaction_score(student, club, period, slot)
+        alternatives = []
+        for alt_club in clubs[period]:
+            if alt_club != club and time_slots.size(period, slot, alt_club) < allocation.MAX_STUDENTS_PER_CLUB:
+                alt_score = core.calculate_satisfaction_score(student, alt_club, period, slot)
+                alternatives.append((alt_club, alt_score - current_score))
+        alternatives.sort(key=lambda x: x[1], reverse=True)
+
+        if alternatives:
+            best_alt_club, score_diff = alternatives[0]
+            move_score = score_diff - student['changes'][period] * 100
+            move_candidates.append((student_id, move_score, best_alt_club))
+
+    if not move_candidates:
+        return None
+    move_candidates.sort(key=lambda x: x[1], reverse=True)
+    student_id, _, new_club = move_candidates[0]
+    return student_id, new_club
+
+def legacy_resolve_overcrowding(students, time_slots, clubs, period, slot, club):
+    """
+    resolve_overcrowding แบบเดิมที่เรียก legacy_find_eviction_candidate ทุกครั้งที่ย้าย คืนค่าจำนวนการย้าย
+    """
+    moves = 0
+    while len(time_slots[period][slot][club]) > allocation.MAX_STUDENTS_PER_CLUB:
+        candidate = legacy_find_eviction_candidate(students, time_slots, clubs, period, slot, club)
+        if candidate is None:
+            break
+        student_id, new_club = candidate
+        core.move_student(students, time_slots, student_id, period, slot, new_club)
+        moves += 1
+    return moves
+
+def skew_demand(df, club=None):
+    """
+    ทำให้ชมรมหนึ่งเป็นอันดับ 1 ของช่วงเช้าสำหรับนักศึกษาทุกคน (สลับตำแหน่งกับอันดับเดิมของชมรมนั้น)
+    ถ้าไม่ระบุชมรมจะใช้ชมรมที่ถูกเลือกเป็นอันดับ 1 มากที่สุด
+    """
+    columns = [f'ฐานเช้า อันดับที่ {i}' for i in range(1, 9)]
+    club = club or df[columns[0]].mode()[0]
+    skewed = df.copy()
+    for index, row in skewed.iterrows():
+        choices = row[columns].tolist()
+        if club in choices:
+            position = choices.index(club)
+            choices[0], choices[position] = choices[position], choices[0]
+        else:
+            choices[0] = club
+        skewed.loc[index, columns] = choices
+    return skewed, club
+
+def time_calls(score_function, calls):
+    """
+    เรียกฟังก์ชันคำนวณคะแนนกับทุกชุดข้อมูลใน calls คืนค่า (จำนวนครั้งต่อวินาที, ผลลัพธ์)
+    """
+    start = time.perf_counter()
+    results = [score_function(student, club, period, slot) for student, club, period, slot in calls]
+    elapsed = time.perf_counter() - start
+    return len(calls) / elapsed, results
+
+def benchmark_satisfaction_score(input_file, num_students, num_calls, seed=0):
+    """
+    เปรียบเทียบความเร็วของ calculate_satisfaction_score แบบเดิมกับแบบใช้ตารางค้นหาอันดับและจำนวนชมรมที่ได้รับ
+    สองรูปแบบ: สุ่มนักศึกษาทุกครั้ง (num_calls ครั้ง) และไล่ทุกชมรมทุกช่วงเวลาของนักศึกษาทีละคน (แบบที่การจัดสรรเรียกจริง)
+    """
+    print(f"Preparing {num_students} students from {input_file}...")
+    _, students, _, clubs = prepare_students(input_file, num_students)
+
+    # สุ่มชุด (นักศึกษา, ชมรม, คาบ, ช่วงเวลา) ที่จะใช้ทดสอบ
+    rng = random.Random(seed)
+    student_list = list(students.values())
+    calls = []
+    for _ in range(num_calls):
+        period = rng.choice(['morning', 'afternoon'])
+        calls.append((rng.choice(student_list), rng.choice(clubs[period]), period,
+                      rng.randint(1, allocation.NUM_SLOTS_PER_PERIOD)))
+    # ทุก (ชมรม, ช่วงเวลา) ของนักศึกษาแต่ละคนต่อกัน
+    sweep = [(student, club, period, slot) for student in student_list for period in allocation.PERIODS
+             for club in clubs[period] for slot in range(1, allocation.NUM_SLOTS_PER_PERIOD + 1)]
+
+    rates = {}
+    for name, pattern in (('random', calls), ('sweep', sweep)):
+        legacy_rate, legacy_results = time_calls(legacy_calculate_satisfaction_score, pattern)
+        current_rate, current_results = time_calls(core.calculate_satisfaction_score, pattern)
+        if legacy_results != current_results:
+            raise AssertionError("Scores differ between the legacy and current implementations")
+        rates[name] = (legacy_rate, current_rate)
+
+        print(f"calculate_satisfaction_score over {len(pattern)} {name} calls:")
+        print(f"  before (list lookups): {legacy_rate:,.0f} calls/sec")
+        print(f"  after (rank tables):   {current_rate:,.0f} calls/sec ({current_rate / legacy_rate:.2f}x)")
+
+    return rates
+
+def benchmark_engines(input_file, num_students):
+    """
+    ตรวจสอบว่า SatisfactionTensor ให้คะแนนตรงกับ calculate_satisfaction_score ทุก (นักศึกษา, ชมรม, ช่วงเวลา)
+    พร้อมเวลาในการคำนวณคะแนนทั้งตาราง แล้วเปรียบเทียบเวลาของ adjust_assignments ระหว่าง engine ทั้งสองแบบ
+    (ต้องได้ผลการจัดสรรเหมือนกัน)
+    """
+    print(f"Preparing {num_students} students from {input_file}...")
+    _, students, time_slots, clubs = prepare_students(input_file, num_students)
+    slots = range(1, allocation.NUM_SLOTS_PER_PERIOD + 1)
+
+    start = time.perf_counter()
+    expected = {(period, slot): [[core.calculate_satisfaction_score(student, club, period, slot) for club in clubs[period]]
+                                 for student in students.values()]
+                for period in allocation.PERIODS for slot in slots}
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tensor = core.SatisfactionTensor(students, clubs)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    rows = np.arange(len(students))[:, None]
+    actual = {(period, slot): tensor.scores(period, rows, np.arange(len(clubs[period]))[None, :], slot)
+              for period in allocation.PERIODS for slot in slots}
+    tensor_time = time.perf_counter() - start
+
+    for (period, slot), scores in actual.items():
+        if scores.tolist() != expected[(period, slot)]:
+            row = next(row for row, student_scores in enumerate(scores.tolist()) if student_scores != expected[(period, slot)][row])
+            raise AssertionError(f"Tensor scores differ for student {tensor.student_ids[row]} in {period} slot {slot}")
+    num_scores = sum(len(clubs[period]) for period in allocation.PERIODS) * len(slots) * len(students)
+    print(f"Tensor scores match calculate_satisfaction_score for all {num_scores:,} (student, club, slot) scores")
+    print(f"  python scorer: {python_time:.2f}s, tensor: {tensor_time:.2f}s + {build_time:.2f}s to build "
+          f"({python_time / (tensor_time + build_time):.1f}x)")
+
+    results = {}
+    timings = {}
+    for engine in allocation.SCORING_ENGINES:
+        _, students, time_slots, clubs = prepare_students(input_file, num_students)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            missing = allocation.check_group_representation(students, time_slots, clubs)
+            allocation.adjust_assignments(students, time_slots, clubs, missing, engine=engine)
+            adjust_time = time.perf_counter() - start
+            statistics = allocation.calculate_statistics(students, time_slots, clubs)
+        assignments = {student_id: student['assignments'] for student_id, student in students.items()}
+        results[engine] = (assignments, statistics['average_satisfaction'])
+        timings[engine] = adjust_time
+        print(f"  {engine:>6}: adjust_assignments {adjust_time:.2f}s")
+
+    if results['python'] != results['numpy']:
+        raise AssertionError("The python and numpy engines produced different allocations")
+    print("Both engines produced identical allocations")
+    print(f"numpy speedup: adjust_assignments {timings['python'] / timings['numpy']:.1f}x")
+
+def benchmark_overcrowding(input_file, num_students, capacity=None):
+    """
+    เปรียบเทียบการแก้ปัญหาชมรมที่เกินขีดจำกัดแบบเดิม (คำนวณใหม่ทุกรอบ) กับ EvictionQueue
+    บนข้อมูลที่ชมรมหนึ่งเป็นอันดับ 1 ของทุกคน (ขีดจำกัดปรับให้ความจุรวมพอสำหรับทุกคนได้ด้วย capacity)
+    """
+    if capacity is not None:
+        set_capacity(capacity)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = allocation.read_data(input_file)
+        df, club = skew_demand(scale_input(df, num_students))
+        df = allocation.assign_groups(df)
+        clubs = allocation.get_all_clubs(df)
+    print(f"Skewed input: {num_students} students, '{club}' is everyone's first morning choice, "
+          f"limit {allocation.MAX_STUDENTS_PER_CLUB} per club")
+
+    results = {}
+    for name, resolve in [('before', legacy_resolve_overcrowding), ('after', core.resolve_overcrowding)]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            students = allocation.create_student_preferences(df)
+            time_slots = allocation.initial_assignment(students, clubs)
+            start = time.perf_counter()
+            moves = 0
+            for period in ['morning', 'afternoon']:
+                for slot in range(1, allocation.NUM_SLOTS_PER_PERIOD + 1):
+                    for overfull_club in clubs[period]:
+                        moves += resolve(students, time_slots, clubs, period, slot, overfull_club)
+            elapsed = time.perf_counter() - start
+        results[name] = {student_id: student['assignments'] for student_id, student in students.items()}
+        print(f"  {name:>6}: {moves} moves in {elapsed:.2f}s")
+
+    if results['before'] != results['after']:
+        raise AssertionError("EvictionQueue produced a different allocation from the legacy loop")
+    print("Both versions produced identical allocations")
+
+def benchmark_initial_strategies(input_file, num_students, capacity=None):
+    """
+    เปรียบเทียบวิธีจัดสรรเบื้องต้นแต่ละแบบ: จำนวนการย้ายใน adjust_assignments เวลาที่ใช้ และคุณภาพผลลัพธ์
+    """
+    if capacity is not None:
+        set_capacity(capacity)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = allocation.read_data(input_file)
+        df = allocation.assign_groups(scale_input(df, num_students))
+        clubs = allocation.get_all_clubs(df)
+        club_counts = allocation.count_preferences(df, clubs)
+    print(f"{num_students} students from {input_file}, limit {allocation.MAX_STUDENTS_PER_CLUB} per club")
+
+    for strategy in allocation.INITIAL_STRATEGIES:
+        with contextlib.redirect_stdout(io.StringIO()):
+            students = allocation.create_student_preferences(df)
+            start = time.perf_counter()
+            time_slots = allocation.initial_assignment(students, clubs, strategy=strategy, club_counts=club_counts)
+            initial_time = time.perf_counter() - start
+            start = time.perf_counter()
+            missing = allocation.check_group_representation(students, time_slots, clubs)
+            allocation.adjust_assignments(students, time_slots, clubs, missing)
+            adjust_time = time.perf_counter() - start
+            missing = allocation.check_group_representation(students, time_slots, clubs)
+        missing_groups = sum(len(groups) for period in missing for slot in missing[period]
+                             for groups in missing[period][slot].values())
+        moves = sum(sum(student['changes'].values()) for student in students.values())
+        over_limit = sum(1 for period in clubs for slot in range(1, allocation.NUM_SLOTS_PER_PERIOD + 1)
+                         for club in clubs[period]
+                         if time_slots.size(period, slot, club) > allocation.MAX_STUDENTS_PER_CLUB)
+        print(f"  {strategy:>8}: {moves} repair moves, initial {initial_time:.2f}s + adjust {adjust_time:.2f}s, "
+              f"{over_limit} slots over limit, {missing_groups} missing groups")
+
+def benchmark_student_store(input_file, num_students):
+    """
+    เปรียบเทียบหน่วยความจำและเวลาสร้างข้อมูลนักศึกษาระหว่าง dict แบบเดิมกับ StudentStore
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = allocation.read_data(input_file)
+        df = allocation.assign_groups(scale_input(df, num_students))
+        clubs = allocation.get_all_clubs(df)
+    print(f"{num_students} students from {input_file}")
+
+    stores = {}
+    for name, compact in [('dict', False), ('compact', True)]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            start = time.perf_counter()
+            students = allocation.create_student_preferences(df, compact)
+            time_slots = allocation.initial_assignment(students, clubs)
+            elapsed = time.perf_counter() - start
+            # วัดหน่วยความจำรวมดัชนี time_slots แล้ววัดอีกครั้งหลังทิ้งดัชนี ให้เหลือเฉพาะข้อมูลนักศึกษา
+            total_size, _ = tracemalloc.get_traced_memory()
+            del time_slots
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        stores[name] = students
+        print(f"  {name:>8}: {size / 1e6:.1f} MB ({total_size / 1e6:.1f} MB with the time slot index), "
+              f"built with initial assignment in {elapsed:.2f}s")
+
+    for student_id, student in stores['dict'].items():
+        record = stores['compact'][student_id]
+        if (student['preferences'] != record['preferences'] or student['group'] != record['group']
+                or any(student['assignments'][period] != dict(record['assignments'][period]) for period in student['assignments'])):
+            raise AssertionError(f"StudentStore differs from the dict data for student {student_id}")
+    print("StudentStore holds the same preferences and assignments as the dict data")
+
+def benchmark_shards(input_file, num_students, shard_counts, capacity=None, engine='python'):
+    """
+    เปรียบเทียบการจัดสรรแบบไม่แบ่ง shard กับ allocate_in_shards ที่จำนวน shard ต่างๆ:
+    เวลาที่ใช้ ความพึงพอใจเฉลี่ยที่เสียไป และจำนวนชมรมที่เกินขีดจำกัด/กลุ่มที่ขาดตัวแทนหลังรอบสุดท้าย
+    """
+    if capacity is not None:
+        set_capacity(capacity)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = allocation.read_data(input_file)
+        df = allocation.assign_groups(scale_input(df, num_students))
+        clubs = allocation.get_all_clubs(df)
+    print(f"{num_students} students from {input_file}, limit {allocation.MAX_STUDENTS_PER_CLUB} per club, {engine} engine")
+
+    baseline = None
+    for num_shards in [1] + list(shard_counts):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            students = allocation.create_student_preferences(df)
+            start = time.perf_counter()
+            if num_shards == 1:
+                time_slots = allocation.initial_assignment(students, clubs)
+                missing = allocation.check_group_representation(students, time_slots, clubs)
+                time_slots = allocation.adjust_assignments(students, time_slots, clubs, missing, engine)
+            else:
+                shards = sharding.partition_students(df, num_shards)
+                time_slots = allocation.allocate_in_shards(students, clubs, shards, engine)
+            elapsed = time.perf_counter() - start
+            statistics = allocation.calculate_statistics(students, time_slots, clubs)
+        over_limit, missing_groups = allocation.count_violations(time_slots, clubs)
+        average = statistics['average_satisfaction']
+        if baseline is None:
+            baseline = average
+        loss = (baseline - average) / baseline * 100 if baseline else 0.0
+        small = num_shards > 1 and num_students // num_shards < sharding.MIN_STUDENTS_PER_SHARD
+        print(f"  {num_shards:>3} shard(s): {elapsed:.2f}s, average satisfaction {average:.2f} ({loss:.2f}% lost), "
+              f"{over_limit} slots over limit, {missing_groups} missing groups"
+              f"{' (below MIN_STUDENTS_PER_SHARD, --shards refuses this)' if small else ''}")
+        for line in output.getvalue().splitlines():
+            if line.startswith(('Shard ', 'Shards took')):
+                print(f"      {line}")
+
+def available_cores():
+    """
+    จำนวนแกนประมวลผลที่ process นี้ใช้ได้จริง (ตาม CPU affinity ถ้าระบบรองรับ)
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def benchmark_parallel_periods(input_file, num_students, engine='python'):
+    """
+    เปรียบเทียบเวลาจัดสรรทีละคาบใน process เดียวกับ allocate_periods_in_parallel (--parallel) และตรวจสอบว่าผลเหมือนกัน
+    เร็วขึ้นได้ไม่เกิน 2 เท่า (มีเพียงสองคาบ) และต้องมีอย่างน้อย 2 แกน ไม่เช่นนั้นสอง process จะผลัดกันใช้แกนเดียว
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = allocation.read_data(input_file)
+        df = allocation.assign_groups(scale_input(df, num_students))
+        clubs = allocation.get_all_clubs(df)
+    cores = available_cores()
+    print(f"{num_students} students from {input_file}, {engine} engine, "
+          f"{cores} usable core(s) of {os.cpu_count()}")
+    if cores < 2:
+        print("WARNING: Fewer than 2 usable cores, the parallel run cannot be faster than the serial one")
+
+    results = {}
+    for name in ('serial', 'parallel'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            students = allocation.create_student_preferences(df)
+            start = time.perf_counter()
+            if name == 'serial':
+                time_slots = allocation.initial_assignment(students, clubs)
+                missing = allocation.check_group_representation(students, time_slots, clubs)
+                allocation.adjust_assignments(students, time_slots, clubs, missing, engine)
+            else:
+                allocation.allocate_periods_in_parallel(students, clubs, engine)
+            elapsed = time.perf_counter() - start
+        results[name] = (elapsed, allocation.results_frame(students))
+
+    serial_time, serial_frame = results['serial']
+    parallel_time, parallel_frame = results['parallel']
+    if not serial_frame.equals(parallel_frame):
+        raise AssertionError("Parallel periods produced a different allocation from the serial run")
+    print(f"  serial:   {serial_time:.2f}s")
+    print(f"  parallel: {parallel_time:.2f}s ({serial_time / parallel_time:.2f}x)")
+    print("Both runs produce the same allocation")
+
+def legacy_calculate_statistics(students, time_slots, clubs):
+    """
+    ส่วนที่คำนวณทีละนักศึกษาของ calculate_statistics แบบเดิม (จำนวนการเปลี่ยนแปลง ขนาดชมรม การแทนกลุ่ม
+    และคะแนนความพึงพอใจ) ใช้เป็นค่าอ้างอิงในการเปรียบเทียบ
+    """
+    change_counts = {period: Counter(student['changes'][period] for student in students.values()) for period in allocation.PERIODS}
+    club_sizes = {period: {slot: {club: len(time_slots[period][slot][club]) for club in clubs[period]}
+                           for slot in range(1, allocation.NUM_SLOTS_PER_PERIOD + 1)} for period in allocation.PERIODS}
+    group_representation = {
+        period: {slot: {club: {group: time_slots.group_count(period, slot, club, group) for group in allocation.GROUP_LABELS}
+                        for club in clubs[period]}
+                 for slot in range(1, allocation.NUM_SLOTS_PER_PERIOD + 1)}
+        for period in allocation.PERIODS
+    }
+    scores = [sum(core.calculate_period_satisfaction(student, period) for period in allocation.PERIODS)
+              for student in students.values()]
+    return change_counts, club_sizes, group_representation, scores
+
+def legacy_satisfaction_scores(students):
+    """
+    คะแนนความพึงพอใจของ calculate_statistics ก่อนแก้ไข: เรียก calculate_satisfaction_score กับชมรมที่ถืออยู่
+    ซึ่งนับชมรมนั้นเองเป็นชมรมซ้ำ ทุกช่วงเวลาจึงได้ -10000 (ค่าเฉลี่ย -80000 เสมอ) ใช้เทียบกับตัวเลขก่อนการแก้ไข
+    """
+    return [sum(core.calculate_satisfaction_score(student, club, period, slot)
+                for period in allocation.PERIODS
+                for slot, club in student['assignments'][period].items())
+            for student in students.values()]
+
+def benchmark_statistics(input_file, num_students):
+    """
+    เปรียบเทียบเวลาของ calculate_statistics และ generate_club_size_report กับเวลาที่ใช้จัดสรร
+    (dict และ StudentStore) และตรวจสอบว่าให้ผลตรงกับการคำนวณทีละนักศึกษาแบบเดิม
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = allocation.read_data(input_file)
+        df = allocation.assign_groups(scale_input(df, num_students))
+        clubs = allocation.get_all_clubs(df)
+    print(f"{num_students} students from {input_file}")
+
+    for name, compact in [('dict', False), ('compact', True)]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            students = allocation.create_student_preferences(df, compact)
+            time_slots = allocation.initial_assignment(students, clubs)
+            missing = allocation.check_group_representation(students, time_slots, clubs)
+            time_slots = allocation.adjust_assignments(students, time_slots, clubs, missing, 'numpy')
+            allocation_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            statistics = allocation.calculate_statistics(students, time_slots, clubs)
+            statistics_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            report_file = allocation.generate_club_size_report(time_slots, clubs, 'benchmark_statistics.csv', statistics)
+            report_time = time.perf_counter() - start
+            os.remove(report_file)
+
+            start = time.perf_counter()
+            change_counts, club_sizes, group_representation, scores = legacy_calculate_statistics(students, time_slots, clubs)
+            legacy_time = time.perf_counter() - start
+            unfixed_scores = legacy_satisfaction_scores(students)
+
+        if (change_counts != statistics['change_counts'] or club_sizes != statistics['club_sizes']
+                or group_representation != statistics['group_representation']
+                or scores != [entry['score'] for entry in statistics['satisfaction_scores']]):
+            raise AssertionError(f"Vectorized statistics differ from the per-student calculation ({name})")
+        print(f"  {name:>8}: allocation {allocation_time:.2f}s, statistics {statistics_time:.2f}s "
+              f"({statistics_time / allocation_time * 100:.1f}% of allocation, per-student loops {legacy_time:.2f}s), "
+              f"size report {report_time:.3f}s")
+        print(f"            average satisfaction {statistics['average_satisfaction']:.2f} "
+              f"(before the duplicate-scoring fix: {sum(unfixed_scores) / len(unfixed_scores):.2f})")
+    print("Vectorized statistics match the per-student calculation")
+
+def legacy_save_results(students, output_file):
+    """
+    save_results แบบเดิม: สร้าง dict ทีละแถวพร้อมแถวหัวกลุ่มแล้วส่งให้ DataFrame
+    """
+    students_by_group = {str(i): [] for i in range(allocation.NUM_GROUPS)}
+    for student_id, student in students.items():
+        students_by_group[student['group']].append((student_id, student))
+    results = []
+    for group in sorted(students_by_group):
+        group_students = sorted(students_by_group[group], key=lambda x: x[0])
+        if not group_students:
+            continue
+        results.append({'รหัสนักศึกษา': f'*** กลุ่ม {group} ({len(group_students)} คน) ***', 'กลุ่ม': group})
+        for student_id, student in group_students:
+            row = {
+                'รหัสนักศึกษา': student_id,
+                'กลุ่ม': student['group'],
+                'การเปลี่ยนแปลงชมรมเช้า': student['changes']['morning'],
+                'การเปลี่ยนแปลงชมรมบ่าย': student['changes']['afternoon']
+            }
+            for period in ['morning', 'afternoon']:
+                for i, club in enumerate(student['preferences'][period]['main']):
+                    row[f'ฐาน{"เช้า" if period == "morning" else "บ่าย"} อันดับที่ {i+1}'] = club
+                for i, club in enumerate(student['preferences'][period]['backup']):
+                    row[f'ฐาน{"เช้า" if period == "morning" else "บ่าย"} อันดับที่ {i+5}'] = club
+            for period in ['morning', 'afternoon']:
+                for slot in range(1, allocation.NUM_SLOTS_PER_PERIOD + 1):
+                    row[f'ชมรม{"เช้า" if period == "morning" else "บ่าย"} ช่วงที่ {slot}'] = student['assignments'][period].get(slot, "")
+            results.append(row)
+    pd.DataFrame(results).to_csv(output_file, index=False, encoding='utf-8-sig')
+
+def legacy_read_results(file_path):
+    """
+    การอ่านไฟล์ผลแบบเดิมของ show_club_stats.py: อ่าน CSV แล้วกรองแถวหัวกลุ่มด้วยการค้นหาข้อความ
+    """
+    df = pd.read_csv(file_path, encoding='utf-8-sig')
+    return df[~df['รหัสนักศึกษา'].astype(str).str.contains('กลุ่ม')]
+
+def benchmark_results(input_file, num_students):
+    """
+    เปรียบเทียบเวลาเขียนและอ่านไฟล์ผลการจัดสรรแบบเดิม (dict ทีละแถว + CSV) กับ save_results แบบคอลัมน์
+    ในทุกรูปแบบไฟล์ (Parquet/Feather เมื่อติดตั้ง pyarrow) และตรวจสอบว่าอ่านกลับได้ข้อมูลเดียวกัน
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = allocation.read_data(input_file)
+        df = allocation.assign_groups(scale_input(df, num_students))
+        clubs = allocation.get_all_clubs(df)
+    print(f"{num_students} students from {input_file}")
+
+    for name, compact in [('dict', False), ('compact', True)]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            students = allocation.create_student_preferences(df, compact)
+            allocation.initial_assignment(students, clubs)
+
+        if not compact:
+            output_file = 'benchmark_results_legacy.csv'
+            start = time.perf_counter()
+            legacy_save_results(students, output_file)
+            write_time = time.perf_counter() - start
+            start = time.perf_counter()
+            expected = legacy_read_results(output_file)
+            read_time = time.perf_counter() - start
+            os.remove(output_file)
+            print(f"  {'legacy':>8} csv    : write {write_time:.2f}s, read {read_time:.2f}s")
+            expected_ids = expected['รหัสนักศึกษา'].astype(str).tolist()
+            expected_clubs = expected.filter(like='ชมรม').fillna('').to_numpy()
+
+        for format in allocation.RESULT_FORMATS:
+            if format != 'csv' and pyarrow is None:
+                continue
+            output_file = f'benchmark_results.{format}'
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                allocation.save_results(students, clubs, None, output_file)
+                write_time = time.perf_counter() - start
+            start = time.perf_counter()
+            result = read_results(output_file)
+            read_time = time.perf_counter() - start
+            os.remove(output_file)
+            print(f"  {name:>8} {format:<7}: write {write_time:.2f}s, read {read_time:.2f}s")
+
+            if (result['รหัสนักศึกษา'].astype(str).tolist() != expected_ids
+                    or (result.filter(like='ชมรม').fillna('').to_numpy() != expected_clubs).any()):
+                raise AssertionError(f"{format} results ({name}) differ from the legacy writer")
+    if pyarrow is None:
+        print("pyarrow is not installed, Parquet/Feather were skipped")
+    print("All formats read back the same students and assignments as the legacy writer")
+
+def legacy_find_best_swaps(students):
+    """
+    การค้นหาการสลับแบบเดิมของ Pathoptimize.find_best_swaps: ตรวจทุกคู่นักศึกษา ทั้งสองคาบ และทุกคู่ช่วงเวลา
+    คืนค่า (การสลับที่ให้ประโยชน์ทั้งหมดเรียงตามผลประโยชน์, จำนวนที่ตรวจ, จำนวนที่ถูกต้อง, จำนวนที่ให้ประโยชน์)
+    """
+    club_frequencies = paths.count_club_frequencies(students)
+    student_ids = list(students.keys())
+    best_swaps = []
+    possible_swaps = valid_swaps = beneficial_swaps = 0
+    for i in range(len(student_ids)):
+        for j in range(i + 1, len(student_ids)):
+            student1 = students[student_ids[i]]
+            student2 = students[student_ids[j]]
+            for period in paths.SWAP_PERIODS:
+                for slot1, slot2 in paths.SWAP_SLOT_PAIRS:
+                    possible_swaps += 1
+                    if paths.is_valid_slot_swap(student1, student2, period, slot1, slot2, club_frequencies):
+                        valid_swaps += 1
+                        benefit = paths.calculate_benefit_from_swap(student1, student2, period, slot1, slot2, students)
+                        if benefit > 0:
+                            beneficial_swaps += 1
+                            best_swaps.append({'student_id1': student_ids[i], 'student_id2': student_ids[j],
+                                               'period': period, 'slot1': slot1, 'slot2': slot2, 'benefit': benefit})
+    best_swaps.sort(key=lambda x: x['benefit'], reverse=True)
+    return best_swaps, possible_swaps, valid_swaps, beneficial_swaps
+
+def benchmark_swaps(input_file, num_students, legacy_limit=2000):
+    """
+    เปรียบเทียบเวลาค้นหาการสลับของ Pathoptimize แบบเดิม (ทุกคู่นักศึกษา) กับแบบตรวจตามลายเซ็นการจัดสรร
+    ทั้งรายการทั้งหมด (พร้อมจำนวนการสลับ) และเฉพาะการสลับที่ดีที่สุด (limit=1 แบบที่ perform_swaps ใช้)
+    และตรวจสอบว่าได้รายการการสลับที่เรียงแล้วและจำนวนการสลับเดียวกัน (แบบเดิมรันเฉพาะเมื่อนักศึกษาไม่เกิน legacy_limit คน)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, students, time_slots, clubs = prepare_students(input_file, num_students)
+        students = paths.create_student_data(allocation.results_frame(students))
+    num_signatures = len(paths.group_assignment_signatures(students, list(students))[0])
+    print(f"{num_students} students from {input_file}, {num_signatures} assignment signatures")
+
+    start = time.perf_counter()
+    top = paths.find_best_swaps(students, limit=1)
+    print(f"  best swap : {time.perf_counter() - start:.2f}s")
+
+    counts = {}
+    start = time.perf_counter()
+    best = paths.find_best_swaps(students, counts)
+    print(f"  all swaps : {time.perf_counter() - start:.2f}s ({counts['possible']} possible, {counts['valid']} valid, "
+          f"{counts['beneficial']} beneficial)")
+    if top != best[:1]:
+        raise AssertionError("the limit=1 search differs from the full signature search")
+
+    if num_students > legacy_limit:
+        print(f"  legacy search skipped (more than {legacy_limit} students)")
+        return
+    start = time.perf_counter()
+    expected, possible, valid, beneficial = legacy_find_best_swaps(students)
+    print(f"  legacy    : {time.perf_counter() - start:.2f}s")
+    if best != expected or (possible, valid, beneficial) != (counts['possible'], counts['valid'], counts['beneficial']):
+        raise AssertionError("signature search differs from the legacy all-pairs search")
+    print(f"Both searches found the same {len(best)} ranked swaps and swap counts")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the club allocation pipeline")
+    parser.add_argument('benchmark', choices=['scoring', 'engines', 'overcrowding', 'initial', 'memory', 'shards',
+                                                     'statistics', 'results', 'swaps', 'parallel'], help="benchmark to run")
+    parser.add_argument('--input', default="test_250.csv", help="input CSV to scale up")
+    parser.add_argument('--students', type=int, default=50000, help="number of students after scaling")
+    parser.add_argument('--calls', type=int, default=1000000, help="number of scoring calls to time")
+    parser.add_argument('--capacity', type=int, default=None, help="override MAX_STUDENTS_PER_CLUB")
+    parser.add_argument('--shards', type=int, nargs='+', default=[2, 4, 8], help="shard counts to compare with an unsharded run")
+    parser.add_argument('--engine', choices=allocation.SCORING_ENGINES, default='python', help="scoring engine for the shards and parallel benchmarks")
+    args = parser.parse_args()
+
+    if args.benchmark == 'scoring':
+        benchmark_satisfaction_score(args.input, args.students, args.calls)
+    elif args.benchmark == 'engines':
+        benchmark_engines(args.input, args.students)
+    elif args.benchmark == 'overcrowding':
+        benchmark_overcrowding(args.input, args.students, args.capacity)
+    elif args.benchmark == 'initial':
+        benchmark_initial_strategies(args.input, args.students, args.capacity)
+    elif args.benchmark == 'memory':
+        benchmark_student_store(args.input, args.students)
+    elif args.benchmark == 'shards':
+        benchmark_shards(args.input, args.students, args.shards, args.capacity, args.engine)
+    elif args.benchmark == 'statistics':
+        benchmark_statistics(args.input, args.students)
+    elif args.benchmark == 'results':
+        benchmark_results(args.input, args.students)
+    elif args.benchmark == 'swaps':
+        benchmark_swaps(args.input, args.students)
+    elif args.benchmark == 'parallel':
+        benchmark_parallel_periods(args.input, args.students, args.engine)
+
+if __name__ == "__main__":
+    main()
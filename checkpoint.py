@@ -0,0 +1,100 @@
+#บันทึกและโหลดสถานะการจัดสรรระหว่างขั้นตอน (checkpoint) เพื่อทำต่อจากขั้นตอนที่เสร็จแล้วโดยไม่ต้องอ่านไฟล์ CSV ใหม่
+#ข้อมูลนักศึกษาถูกเก็บในรูป StudentStore (NumPy array) และบันทึกค่า hash ของไฟล์นำเข้าไว้ตรวจสอบว่ายังเป็นไฟล์เดิม
+import copy
+import hashlib
+import os
+import pickle
+import time
+
+from student_store import StudentStore
+
+CHECKPOINT_VERSION = 1  # เปลี่ยนเมื่อรูปแบบของ snapshot เปลี่ยน (snapshot รุ่นอื่นจะโหลดไม่ได้)
+
+class StaleCheckpointError(ValueError):
+    """
+    snapshot ไม่ตรงกับไฟล์นำเข้าปัจจุบัน (ไฟล์ถูกแก้ไขหลังบันทึก) หรือเป็นรูปแบบรุ่นอื่น
+    """
+
+def file_hash(file_path):
+    """
+    ค่า SHA-256 ของเนื้อหาไฟล์
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def pack_students(students):
+    """
+    แปลงข้อมูลนักศึกษาเป็นรูปที่บันทึกได้กะทัดรัด: dict ของนักศึกษาที่มีความต้องการ (create_student_preferences)
+    แปลงเป็น StudentStore ส่วนข้อมูลอื่น (เช่น Pathoptimize.create_student_data) เก็บตามเดิม
+    """
+    if isinstance(students, StudentStore):
+        store = copy.copy(students)
+    elif all('preferences' in student for student in students.values()):
+        store = StudentStore.from_students(students)
+    else:
+        return ('plain', students)
+    # ฟังก์ชันสร้างตารางคะแนนและตารางคะแนนไม่ถูกบันทึก ผู้โหลดต้องส่งฟังก์ชันเข้ามาใหม่ (unpack_students)
+    store.set_rank_scorer(None)
+    return ('store', store)
+
+def unpack_students(packed, rank_scorer=None, compact=False):
+    """
+    แปลงข้อมูลจาก pack_students กลับ: compact=True คืนค่า StudentStore ไม่เช่นนั้นคืนค่า dict ของนักศึกษาแบบเดิม
+    """
+    kind, data = packed
+    if kind == 'plain':
+        return data
+    data.set_rank_scorer(rank_scorer)
+    return data if compact else data.to_students()
+
+def checkpoint_path(directory, stage):
+    """
+    ตำแหน่งไฟล์ snapshot ของขั้นตอน stage
+    """
+    return os.path.join(directory, f'{stage}.pkl')
+
+def save_checkpoint(directory, stage, input_file, state):
+    """
+    บันทึก snapshot ของขั้นตอน stage (state เป็น dict ของข้อมูลที่ต้องการเก็บ) พร้อม hash ของไฟล์นำเข้า
+    คืนค่าตำแหน่งไฟล์ที่บันทึก
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = checkpoint_path(directory, stage)
+    snapshot = {
+        'version': CHECKPOINT_VERSION,
+        'stage': stage,
+        'input_file': os.path.abspath(input_file),
+        'input_hash': file_hash(input_file),
+        'created': time.time(),
+        'state': state,
+    }
+    # เขียนไฟล์ชั่วคราวก่อนแล้วจึงแทนที่ เพื่อไม่ให้เหลือ snapshot ที่เขียนไม่ครบเมื่อโปรแกรมหยุดกลางทาง
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+    print(f"Checkpoint '{stage}' saved to {path}")
+    return path
+
+def load_checkpoint(path, input_file, stages=None):
+    """
+    โหลด snapshot และตรวจสอบว่าสร้างจากไฟล์นำเข้าเดียวกัน (hash ตรงกัน) และเป็นขั้นตอนที่อยู่ใน stages
+    คืนค่า snapshot (dict ที่มี 'stage' และ 'state') หรือ raise StaleCheckpointError
+    """
+    with open(path, 'rb') as f:
+        snapshot = pickle.load(f)
+
+    if not isinstance(snapshot, dict) or snapshot.get('version') != CHECKPOINT_VERSION:
+        raise StaleCheckpointError(f"Checkpoint {path} has an unsupported format (expected version {CHECKPOINT_VERSION})")
+    if stages is not None and snapshot['stage'] not in stages:
+        raise StaleCheckpointError(f"Checkpoint {path} is from stage '{snapshot['stage']}' "
+                                   f"(expected one of {', '.join(stages)})")
+    if snapshot['input_hash'] != file_hash(input_file):
+        raise StaleCheckpointError(f"Checkpoint {path} was created from a different version of {input_file}; "
+                                   f"rerun without resuming")
+
+    print(f"Resuming from checkpoint '{snapshot['stage']}' in {path}")
+    return snapshot
@@ -1,439 +1,400 @@
 #ใช้วิธี global optimization คิดทีเดียวทุกคนไปพร้อมกันให้จบๆ
 import pandas as pd
 import numpy as np
-from collections import defaultdict, Counter
+from collections import Counter
 import random
 import os
+import argparse
+import time
+import io
+import contextlib
+import glob
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from student_store import StudentStore
+from checkpoint import save_checkpoint, load_checkpoint, pack_students, unpack_students
+from result_io import RESULT_FORMATS, result_format, write_results
+from allocation_log import LOG_LEVELS, LOGGER_NAME, capture_to_file, configure_logging
+from profiling import profiled, record, start_profiling, stop_profiling, print_profile
+from convergence import ConvergenceTrace
+from allocation_core import (MAX_STUDENTS_PER_CLUB, NUM_GROUPS, NUM_SLOTS_PER_PERIOD, GROUP_LABELS, SCORING_ENGINES,
+                             PERIODS, INITIAL_STRATEGIES, WalkingRoute, adjust_assignments, assign_club, assign_groups,
+                             build_rank_scores, calculate_gap, calculate_satisfaction_upper_bound,
+                             calculate_store_distances, calculate_store_satisfaction, check_feasibility,
+                             check_group_representation, count_preferences, count_violations,
+                             create_student_preferences, create_walking_route, get_all_clubs, initial_assignment,
+                             initialize_time_slots, print_feasibility_report, read_data)
+from local_search import improve_assignments
+from milp_solver import solve_allocation_milp, calculate_lp_upper_bound
+from sharding import shard_count, plan_shards, allocate_in_shards
+from incremental import reallocate_incremental
 
 # ค่าคงที่สำหรับการจัดสรร
-MAX_STUDENTS_PER_CLUB = 20  # จำนวนนักศึกษาสูงสุดต่อชมรม
-NUM_GROUPS = 10  # จำนวนกลุ่มทั้งหมด (กลุ่ม 0-9)
-NUM_SLOTS_PER_PERIOD = 4  # จำนวนช่วงเวลาต่อคาบ (เช้า/บ่าย)
+SOLVERS = ('greedy', 'milp')  # วิธีจัดสรร: greedy (จัดเบื้องต้นแล้วปรับปรุง) หรือ milp (หาคำตอบที่ดีที่สุดด้วย MILP)
+BOUNDS = ('ideal', 'lp')  # ขอบเขตบนของความพึงพอใจ: ideal (ทุกคนได้ตามอันดับ) หรือ lp (LP relaxation ของแต่ละคาบ)
+CHECKPOINT_STAGES = ('initial', 'representation', 'adjusted', 'improved')  # ขั้นตอนที่บันทึก snapshot ได้ (ตามลำดับ)
+BATCH_SUMMARY_FILE = 'batch_summary.csv'  # ชื่อไฟล์ตารางสรุปของโหมด batch (ในโฟลเดอร์ผลลัพธ์)
+batch_logger = logging.getLogger(LOGGER_NAME + '.batch')
+# ตัวเลือกการจัดสรรที่ --delta ไม่ใช้ (การแก้ไขตาม delta ย้ายนักศึกษาเดิมให้น้อยที่สุดด้วยวิธีของตัวเอง จึงปฏิเสธแทนการละเลย)
+DELTA_UNSUPPORTED_OPTIONS = ('engine', 'solver', 'parallel', 'initial_strategy', 'local_search', 'search_iterations',
+                             'search_time', 'target_gap', 'distance_weight', 'seeds', 'checkpoint_dir', 'resume',
+                             'shards', 'shard_by', 'allow_unsharded_fallback', 'batch')
 
-def read_data(file_path):
+def allocate_period(students, clubs, period, engine='python', initial_strategy='rank', club_counts=None):
     """
-    อ่านข้อมูลจากไฟล์ CSV
+    จัดสรรชมรมของคาบเดียว (จัดเบื้องต้น ตรวจการแทนกลุ่ม และปรับปรุง) ใช้เป็นงานของ worker process
+    คืนค่า (period, ผลของนักศึกษาแต่ละคนในคาบนี้, time_slots) ให้ merge_period_result นำไปรวม
     """
-    print(f"Reading data from {file_path}...")
-    return pd.read_csv(file_path, encoding='utf-8-sig')
+    time_slots = initial_assignment(students, clubs, periods=[period], strategy=initial_strategy, club_counts=club_counts)
+    missing_representation = check_group_representation(students, time_slots, clubs, periods=[period])
+    time_slots = adjust_assignments(students, time_slots, clubs, missing_representation, engine, periods=[period])
+    
+    student_results = {
+        student_id: (dict(student['assignments'][period]), student['changes'][period])
+        for student_id, student in students.items()
+    }
+    return period, student_results, time_slots
 
-def assign_groups(df):
+def merge_period_result(students, time_slots, result):
     """
-    จัดนักศึกษาเข้ากลุ่มตามตัวเลขในรหัสนักศึกษา
+    รวมผลการจัดสรรของคาบหนึ่ง (จาก allocate_period) เข้ากับ students และ time_slots
     """
-    # แปลงรหัสนักศึกษาเป็นสตริงและดึงตัวเลขกลุ่ม (ตัวเลขที่ระบุกลุ่ม)
-    df['group'] = df['รหัสนักศึกษา'].astype(str).apply(lambda x: x[-1] if len(x) > 0 else '0')
-    print(f"Students assigned to groups 0-9 based on the last digit of their ID")
-    return df
+    period, student_results, period_time_slots = result
+    for student_id, (assignments, changes) in student_results.items():
+        student = students[student_id]
+        for slot, club in assignments.items():
+            assign_club(student, period, slot, club)
+        student['changes'][period] = changes
+    time_slots.adopt_period(period_time_slots, period)
 
-def get_all_clubs(df):
+@profiled
+def allocate_periods_in_parallel(students, clubs, engine='python', initial_strategy='rank', club_counts=None):
     """
-    รวบรวมชื่อชมรมทั้งหมดจากข้อมูล
+    จัดสรรคาบเช้าและบ่ายพร้อมกันใน worker process แยกกัน (ไม่มีเงื่อนไขใดข้ามคาบ)
+    แล้วรวมผลกลับเข้า students และ time_slots ผลลัพธ์เหมือนการจัดสรรทีละคาบทุกประการ
     """
-    morning_clubs = set()
-    afternoon_clubs = set()
-    
-    # รวบรวมชมรมเช้า
-    for i in range(1, 9):
-        col_name = f'ฐานเช้า อันดับที่ {i}'
-        if col_name in df.columns:
-            clubs = df[col_name].dropna().unique()
-            morning_clubs.update(clubs)
-    
-    # รวบรวมชมรมบ่าย
-    for i in range(1, 9):
-        col_name = f'ฐานบ่าย อันดับที่ {i}'
-        if col_name in df.columns:
-            clubs = df[col_name].dropna().unique()
-            afternoon_clubs.update(clubs)
+    print("Allocating morning and afternoon periods in parallel worker processes...")
+    time_slots = initialize_time_slots(clubs)
     
-    # แปลงเป็น list และเรียงลำดับตามชื่อ
-    morning_clubs = sorted(list(morning_clubs))
-    afternoon_clubs = sorted(list(afternoon_clubs))
+    with ProcessPoolExecutor(max_workers=len(PERIODS)) as executor:
+        futures = [executor.submit(allocate_period, students, clubs, period, engine, initial_strategy, club_counts)
+                   for period in PERIODS]
+        results = [future.result() for future in futures]
     
-    print(f"Found {len(morning_clubs)} morning clubs and {len(afternoon_clubs)} afternoon clubs")
+    for result in results:
+        merge_period_result(students, time_slots, result)
     
-    return {'morning': morning_clubs, 'afternoon': afternoon_clubs}
-
-def create_student_preferences(df):
-    """
-    สร้างโครงสร้างข้อมูลความชอบของนักศึกษา
-    """
-    students = {}
-    
-    for _, row in df.iterrows():
-        student_id = str(row['รหัสนักศึกษา'])
-        group = str(row['group'])
-        
-        # สร้างข้อมูลนักศึกษา
-        students[student_id] = {
-            'group': group,
-            'preferences': {
-                'morning': {
-                    'main': [],    # 4 อันดับแรก
-                    'backup': []   # 4 อันดับถัดมา
-                },
-                'afternoon': {
-                    'main': [],    # 4 อันดับแรก
-                    'backup': []   # 4 อันดับถัดมา
-                }
-            },
-            'assignments': {
-                'morning': {},     # ช่วงเวลา -> ชมรม
-                'afternoon': {}    # ช่วงเวลา -> ชมรม
-            },
-            'changes': {
-                'morning': 0,      # จำนวนการเปลี่ยนแปลงในช่วงเช้า
-                'afternoon': 0     # จำนวนการเปลี่ยนแปลงในช่วงบ่าย
-            }
-        }
-        
-        # เก็บความชอบชมรมเช้า
-        for i in range(1, 9):
-            col_name = f'ฐานเช้า อันดับที่ {i}'
-            if col_name in row and pd.notna(row[col_name]):
-                if i <= 4:  # 4 อันดับแรกเป็นหลัก
-                    students[student_id]['preferences']['morning']['main'].append(row[col_name])
-                else:       # 4 อันดับถัดมาเป็นสำรอง
-                    students[student_id]['preferences']['morning']['backup'].append(row[col_name])
-        
-        # เก็บความชอบชมรมบ่าย
-        for i in range(1, 9):
-            col_name = f'ฐานบ่าย อันดับที่ {i}'
-            if col_name in row and pd.notna(row[col_name]):
-                if i <= 4:  # 4 อันดับแรกเป็นหลัก
-                    students[student_id]['preferences']['afternoon']['main'].append(row[col_name])
-                else:       # 4 อันดับถัดมาเป็นสำรอง
-                    students[student_id]['preferences']['afternoon']['backup'].append(row[col_name])
-    
-    print(f"Created preference data for {len(students)} students")
-    return students
-
-def initialize_time_slots(clubs):
-    """
-    สร้างโครงสร้างข้อมูลสำหรับเก็บการจัดสรรในแต่ละช่วงเวลา
-    """
-    time_slots = {
-        'morning': {slot: {club: [] for club in clubs['morning']} for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)},
-        'afternoon': {slot: {club: [] for club in clubs['afternoon']} for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)}
-    }
     return time_slots
 
-def count_preferences(df, clubs):
+def allocate_seed(students, clubs, seed, engine='python', initial_strategy='rank', club_counts=None,
+                  local_search=False, search_iterations=None, search_time_limit=None, target_gap=None,
+                  upper_bound=None):
     """
-    นับจำนวนความนิยมของแต่ละชมรม
+    จัดสรรหนึ่งรอบโดยสุ่มลำดับนักศึกษาและลำดับชมรมด้วย seed (ลำดับเหล่านี้ใช้ตัดสินกรณีคะแนนเท่ากัน
+    และกำหนดว่าใครถูกย้ายก่อน) ใช้เป็นงานของ worker process ใน allocate_with_seeds
+    upper_bound คือขอบเขตบนของความพึงพอใจรวมที่คำนวณไว้แล้ว (ไม่ขึ้นกับ seed จึงไม่ต้องคำนวณซ้ำทุกรอบ)
+    คืนค่า (seed, ตัวชี้วัด, ผลของนักศึกษาแต่ละคนแยกตามคาบ, time_slots)
     """
-    club_counts = {
-        'morning': {club: 0 for club in clubs['morning']},
-        'afternoon': {club: 0 for club in clubs['afternoon']}
+    rng = random.Random(seed)
+    order = list(students)
+    rng.shuffle(order)
+    shuffled_students = {student_id: students[student_id] for student_id in order}
+    shuffled_clubs = {period: rng.sample(clubs[period], len(clubs[period])) for period in clubs}
+    
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        time_slots = initial_assignment(shuffled_students, shuffled_clubs, strategy=initial_strategy, club_counts=club_counts)
+        missing_representation = check_group_representation(shuffled_students, time_slots, shuffled_clubs)
+        time_slots = adjust_assignments(shuffled_students, time_slots, shuffled_clubs, missing_representation, engine)
+        if local_search:
+            improve_assignments(shuffled_students, time_slots, shuffled_clubs, search_iterations, search_time_limit, seed,
+                                target_gap=target_gap, upper_bound=upper_bound)
+        statistics = calculate_statistics(shuffled_students, time_slots, shuffled_clubs, upper_bound=upper_bound)
+    
+    metrics = {
+        'over_limit': statistics['over_limit'],
+        'missing_groups': statistics['missing_groups'],
+        'average_satisfaction': statistics['average_satisfaction'],
+        'optimality_gap': statistics['optimality_gap'],
+        'seconds': time.perf_counter() - start
     }
-    
-    # นับจำนวนชมรมเช้าในสี่อันดับแรก
-    for i in range(1, 5):
-        col_name = f'ฐานเช้า อันดับที่ {i}'
-        if col_name in df.columns:
-            club_series = df[col_name].dropna()
-            for club, count in club_series.value_counts().items():
-                if club in club_counts['morning']:
-                    club_counts['morning'][club] += count
-    
-    # นับจำนวนชมรมบ่ายในสี่อันดับแรก
-    for i in range(1, 5):
-        col_name = f'ฐานบ่าย อันดับที่ {i}'
-        if col_name in df.columns:
-            club_series = df[col_name].dropna()
-            for club, count in club_series.value_counts().items():
-                if club in club_counts['afternoon']:
-                    club_counts['afternoon'][club] += count
-    
-    return club_counts
+    student_results = {
+        period: {
+            student_id: (dict(student['assignments'][period]), student['changes'][period])
+            for student_id, student in students.items()
+        }
+        for period in PERIODS
+    }
+    return seed, metrics, student_results, time_slots
 
-def calculate_satisfaction_score(student, club, period, slot):
+@profiled
+def allocate_with_seeds(students, clubs, seeds, engine='python', initial_strategy='rank', club_counts=None,
+                        local_search=False, search_iterations=None, search_time_limit=None, workers=None,
+                        target_gap=None):
     """
-    คำนวณคะแนนความพึงพอใจของนักศึกษาที่ได้รับชมรมนั้นๆ
-    ยิ่งคะแนนสูงยิ่งพึงพอใจมาก
+    จัดสรรหลายรอบพร้อมกันใน process pool (หนึ่งรอบต่อ seed) แล้วเลือกผลที่ดีที่สุด: ชมรมเกินขีดจำกัดน้อยที่สุด
+    กลุ่มที่ขาดตัวแทนน้อยที่สุด แล้วความพึงพอใจเฉลี่ยสูงสุด (ถ้าเท่ากันใช้ seed ที่มาก่อนในรายการ)
+    target_gap หยุดรอบที่เหลือเมื่อพบรอบที่ไม่ผิดเงื่อนไขและระยะห่างจากขอบเขตบนไม่เกินค่านี้ โดยส่ง seed เป็นชุด
+    ชุดละไม่เกินจำนวน worker และตรวจระหว่างชุด (รอบที่เริ่มแล้วหยุดกลางคันไม่ได้) ผลของ seed หลังรอบที่ถึงเป้าในชุดเดียวกัน
+    ไม่ถูกใช้ ผลลัพธ์จึงขึ้นกับรายการ seed เท่านั้น ไม่ขึ้นกับจำนวน worker
     """
-    score = 0
+    print(f"Allocating with {len(seeds)} seeds in parallel worker processes...")
     
-    # ตรวจสอบว่าชมรมนี้ได้รับการจัดสรรให้นักศึกษาคนนี้ไปแล้วหรือไม่ในช่วงเวลาอื่น
-    # ถ้าเคยได้รับแล้ว ให้คะแนนติดลบมาก (ป้องกันไม่ให้ได้ชมรมซ้ำ)
-    for existing_slot, existing_club in student['assignments'][period].items():
-        if existing_club == club:
-            return -10000  # ให้คะแนนติดลบมากพอที่จะไม่ถูกเลือก
+    # ขอบเขตบนขึ้นกับความต้องการของนักศึกษาเท่านั้น จึงคำนวณครั้งเดียวแล้วส่งให้ทุก seed
+    upper_bound = calculate_satisfaction_upper_bound(students)
     
-    # ตรวจสอบว่าชมรมอยู่ในความต้องการหลักหรือไม่
-    if club in student['preferences'][period]['main']:
-        # ความต้องการหลักได้คะแนนสูง (อันดับ 1 คะแนนสูงสุด, อันดับ 2-4 ลดหลั่นลงมา)
-        pref_rank = student['preferences'][period]['main'].index(club)
-        score = 1000 - (pref_rank * 200)  # คะแนน: อันดับ 1 = 1000, อันดับ 2 = 800, อันดับ 3 = 600, อันดับ 4 = 400
-    
-    # ตรวจสอบว่าชมรมอยู่ในความต้องการสำรองหรือไม่
-    elif club in student['preferences'][period]['backup']:
-        # ความต้องการสำรองได้คะแนนปานกลาง
-        pref_rank = student['preferences'][period]['backup'].index(club)
-        score = 300 - (pref_rank * 50)  # คะแนน: อันดับ 5 = 300, อันดับ 6 = 250, อันดับ 7 = 200, อันดับ 8 = 150
-    
-    # ไม่อยู่ในความต้องการเลย
-    else:
-        score = 0  # ไม่ได้คะแนน
+    # ไม่มี target_gap ก็ส่งทุก seed พร้อมกัน
+    wave_size = len(seeds) if target_gap is None else max(1, workers or os.cpu_count() or 1)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for wave_start in range(0, len(seeds), wave_size):
+            futures = [executor.submit(allocate_seed, students, clubs, seed, engine, initial_strategy, club_counts,
+                                       local_search, search_iterations, search_time_limit, target_gap, upper_bound)
+                       for seed in seeds[wave_start:wave_start + wave_size]]
+            reached = False
+            for future in futures:
+                seed, metrics, student_results, seed_time_slots = future.result()
+                results.append((seed, metrics, student_results, seed_time_slots))
+                print(f"Seed {seed}: {metrics['over_limit']} over-limit slots, {metrics['missing_groups']} missing groups, "
+                      f"average satisfaction {metrics['average_satisfaction']:.2f}, gap {metrics['optimality_gap'] * 100:.2f}% "
+                      f"({metrics['seconds']:.2f} seconds)")
+                
+                if (target_gap is not None and not metrics['over_limit'] and not metrics['missing_groups']
+                        and metrics['optimality_gap'] <= target_gap):
+                    reached = True
+                    break
+            if reached:
+                print(f"Seed {seed} reached the target gap of {target_gap * 100:.2f}%, skipping the remaining seeds")
+                break
+    
+    # min() คืนตัวแรกที่มีค่าน้อยที่สุด จึงเลือก seed ที่มาก่อนเมื่อผลเท่ากัน
+    best_seed, best_metrics, student_results, seed_time_slots = min(
+        results,
+        key=lambda result: (result[1]['over_limit'], result[1]['missing_groups'], -result[1]['average_satisfaction'])
+    )
+    print(f"Selected seed {best_seed} (average satisfaction {best_metrics['average_satisfaction']:.2f})")
     
-    # ถ้าเป็นช่วงเวลาที่ต้องการ (ช่วงเวลา slot ตรงกับอันดับการเลือก) ให้คะแนนเพิ่ม
-    if slot <= len(student['preferences'][period]['main']):
-        # ช่วงเวลา slot ที่ 1 ควรได้ชมรมอันดับ 1, ช่วงเวลาที่ 2 ควรได้ชมรมอันดับ 2 เป็นต้น
-        target_club_for_slot = student['preferences'][period]['main'][slot-1]
-        if club == target_club_for_slot:
-            score += 500  # โบนัสพิเศษสำหรับการจัดช่วงเวลาที่ตรงกับความต้องการ
+    time_slots = initialize_time_slots(clubs)
+    for period in PERIODS:
+        merge_period_result(students, time_slots, (period, student_results[period], seed_time_slots))
     
-    return score
+    return time_slots
+
+def pack_time_slots(time_slots, students):
+    """
+    แปลงสมาชิกของแต่ละชมรมเป็น array ลำดับแถวของนักศึกษา (รักษาลำดับการเข้าชมรมซึ่งใช้ตัดสินกรณีคะแนนเท่ากัน)
+    """
+    rows = {student_id: row for row, student_id in enumerate(students)}
+    return {
+        period: {
+            slot: {club: np.fromiter((rows[student_id] for student_id in members), dtype=np.int32, count=len(members))
+                   for club, members in slot_clubs.items()}
+            for slot, slot_clubs in time_slots[period].items()
+        }
+        for period in PERIODS
+    }
 
-def initial_assignment(students, clubs):
+def unpack_time_slots(packed, students, clubs):
     """
-    จัดสรรชมรมเบื้องต้นตามความต้องการหลัก (4 อันดับแรก)
+    สร้าง TimeSlotIndex กลับจากผลของ pack_time_slots
     """
-    # สร้างโครงสร้างข้อมูลสำหรับเก็บผลการจัดสรรเบื้องต้น
+    student_ids = list(students)
+    groups = [students[student_id]['group'] for student_id in student_ids]
     time_slots = initialize_time_slots(clubs)
-    
-    print("Performing initial club assignment based on main preferences...")
-    
-    # ทำการจัดสรรชมรมเช้าและบ่ายแยกกัน
-    for period in ['morning', 'afternoon']:
-        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
-            # จัดสรรชมรมสำหรับช่วงเวลานี้ให้กับทุกนักศึกษา
-            for student_id, student in students.items():
-                # ตรวจสอบว่ามีความต้องการหลักสำหรับช่วงเวลานี้หรือไม่
-                if slot <= len(student['preferences'][period]['main']):
-                    preferred_club = student['preferences'][period]['main'][slot-1]
-                    
-                    # จัดสรรชมรมตามความต้องการเบื้องต้น (ยังไม่คำนึงถึงขีดจำกัดจำนวนและการแทนกลุ่ม)
-                    students[student_id]['assignments'][period][slot] = preferred_club
-                    time_slots[period][slot][preferred_club].append(student_id)
-    
-    # แสดงสถิติเบื้องต้นหลังการจัดสรร
-    print("Initial assignment complete.")
-    count_over_limit = 0
-    for period in ['morning', 'afternoon']:
-        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
-            for club in clubs[period]:
-                club_members = time_slots[period][slot][club]
-                if len(club_members) > MAX_STUDENTS_PER_CLUB:
-                    count_over_limit += 1
-    print(f"Number of club slots exceeding the limit of {MAX_STUDENTS_PER_CLUB} students: {count_over_limit}")
-    
+    for period, slots in packed.items():
+        for slot, slot_clubs in slots.items():
+            for club, members in slot_clubs.items():
+                for row in members.tolist():
+                    time_slots.add(student_ids[row], groups[row], period, slot, club)
     return time_slots
 
-def check_group_representation(students, time_slots, clubs):
+def save_allocation_checkpoint(checkpoint_dir, stage, file_path, students, time_slots, clubs, **extra):
     """
-    ตรวจสอบว่าทุกชมรมมีตัวแทนจากทุกกลุ่มหรือไม่
+    บันทึก snapshot ของ students, time_slots และ clubs หลังขั้นตอน stage (ถ้าระบุ checkpoint_dir)
     """
-    print("Checking group representation in each club...")
-    missing_representation = {}
-    
-    for period in ['morning', 'afternoon']:
-        missing_representation[period] = {}
-        
-        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
-            missing_representation[period][slot] = {}
-            
-            for club in clubs[period]:
-                # เริ่มต้นโดยสมมติว่าทุกกลุ่มยังไม่มีตัวแทน
-                groups_represented = {str(i): False for i in range(NUM_GROUPS)}
-                
-                # ตรวจสอบว่ามีตัวแทนจากกลุ่มใดบ้างในชมรมนี้
-                for student_id in time_slots[period][slot][club]:
-                    group = students[student_id]['group']
-                    groups_represented[group] = True
-                
-                # เก็บกลุ่มที่ยังไม่มีตัวแทน
-                missing_groups = [group for group, present in groups_represented.items() if not present]
-                
-                if missing_groups:
-                    missing_representation[period][slot][club] = missing_groups
-    
-    # สรุปผล
-    total_missing = 0
-    for period in missing_representation:
-        for slot in missing_representation[period]:
-            for club in missing_representation[period][slot]:
-                total_missing += len(missing_representation[period][slot][club])
-    
-    print(f"Found {total_missing} instances where a group is not represented in a club")
-    return missing_representation
+    if checkpoint_dir is None:
+        return None
+    state = {
+        'students': pack_students(students),
+        'time_slots': pack_time_slots(time_slots, students),
+        'clubs': clubs,
+    }
+    state.update(extra)
+    return save_checkpoint(checkpoint_dir, stage, file_path, state)
 
-def adjust_assignments(students, time_slots, clubs, missing_representation):
+def load_allocation_checkpoint(path, file_path, compact=False):
     """
-    ปรับปรุงการจัดสรรเพื่อให้มีตัวแทนจากทุกกลุ่มในทุกชมรม
-    และจำนวนนักศึกษาไม่เกินขีดจำกัด
+    โหลด snapshot จาก save_allocation_checkpoint (ตรวจสอบว่าสร้างจาก file_path ฉบับเดียวกัน)
+    คืนค่า (stage, students, time_slots, clubs, state)
     """
-    print("Adjusting assignments to ensure group representation and club size limits...")
-    
-    for period in ['morning', 'afternoon']:
-        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
-            # จัดการปัญหาการแทนกลุ่มก่อน
-            for club, missing_groups in missing_representation[period][slot].items():
-                for missing_group in missing_groups:
-                    # หาค่า suitability score สำหรับการย้ายนักศึกษาจากกลุ่มที่หายไปเข้ามาในชมรมนี้
-                    candidates = []
-                    
-                    # ดูทุกคนในกลุ่มที่ขาดตัวแทน
-                    for student_id, student in students.items():
-                        if student['group'] == missing_group:
-                            # ตรวจสอบว่าเขาอยู่ชมรมไหนในช่วงเวลานี้
-                            current_club = student['assignments'][period].get(slot)
-                            
-                            if current_club and current_club != club:  # มีการจัดสรรไว้แล้วและไม่ใช่ชมรมเดียวกัน
-                                # คำนวณคะแนนความเหมาะสมในการย้าย
-                                # คะแนนสูง = ไม่ค่อยเสียความพึงพอใจเมื่อย้าย
-                                old_score = calculate_satisfaction_score(student, current_club, period, slot)
-                                new_score = calculate_satisfaction_score(student, club, period, slot)
-                                change_score = new_score - old_score
-                                
-                                # พิจารณาจำนวนการเปลี่ยนแปลงที่เกิดขึ้นกับนักศึกษาคนนี้
-                                change_penalty = student['changes'][period] * 100
-                                
-                                # คะแนนรวมสำหรับการย้าย (ค่ายิ่งสูงยิ่งควรเลือกย้าย)
-                                move_score = change_score - change_penalty
-                                
-                                candidates.append((student_id, move_score, current_club))
-                    
-                    # เรียงลำดับคนที่เหมาะจะย้ายมากที่สุด (เสียความพึงพอใจน้อยที่สุด)
-                    candidates.sort(key=lambda x: x[1], reverse=True)  # เรียงจากคะแนนมากไปน้อย
-                    
-                    # ย้ายคนที่เหมาะสมที่สุด
-                    if candidates:
-                        student_id, _, old_club = candidates[0]
-                        
-                        # ลบออกจากชมรมเดิม
-                        time_slots[period][slot][old_club].remove(student_id)
-                        
-                        # เพิ่มเข้าชมรมใหม่
-                        time_slots[period][slot][club].append(student_id)
-                        
-                        # อัปเดตข้อมูลนักศึกษา
-                        students[student_id]['assignments'][period][slot] = club
-                        students[student_id]['changes'][period] += 1
-                        
-                        print(f"Moved student {student_id} from group {missing_group} from {old_club} to {club} in {period} slot {slot}")
-            
-            # จัดการปัญหาจำนวนเกิน
-            for club in clubs[period]:
-                club_members = time_slots[period][slot][club]
-                
-                while len(club_members) > MAX_STUDENTS_PER_CLUB:
-                    # หาคนที่เหมาะสมจะย้ายออก (คนที่เสียประโยชน์น้อยที่สุด)
-                    move_candidates = []
-                    
-                    for student_id in club_members:
-                        student = students[student_id]
-                        
-                        # ตรวจสอบว่าถ้าย้ายคนนี้ออกไป กลุ่มยังมีตัวแทนอยู่ไหม
-                        group = student['group']
-                        group_members = [sid for sid in club_members if students[sid]['group'] == group]
-                        
-                        # ถ้าเป็นคนสุดท้ายของกลุ่ม ห้ามย้าย
-                        if len(group_members) <= 1:
-                            continue
-                        
-                        # ความพึงพอใจปัจจุบัน
-                        current_score = calculate_satisfaction_score(student, club, period, slot)
-                        
-                        # หาชมรมทางเลือกที่จะย้ายไป
-                        alternatives = []
-                        for alt_club in clubs[period]:
-                            if alt_club != club and len(time_slots[period][slot][alt_club]) < MAX_STUDENTS_PER_CLUB:
-                                alt_score = calculate_satisfaction_score(student, alt_club, period, slot)
-                                score_diff = alt_score - current_score
-                                alternatives.append((alt_club, score_diff))
-                        
-                        # เรียงลำดับทางเลือกจากดีที่สุด (เสียประโยชน์น้อย/ได้ประโยชน์มาก)
-                        alternatives.sort(key=lambda x: x[1], reverse=True)
-                        
-                        # ถ้ามีทางเลือก จะพิจารณาย้าย
-                        if alternatives:
-                            best_alt_club, score_diff = alternatives[0]
-                            
-                            # คำนวณคะแนนการย้าย (คะแนนต่ำ = เหมาะสมที่จะย้ายออก)
-                            # พิจารณาทั้งความเสียประโยชน์และจำนวนครั้งที่เคยย้าย
-                            change_penalty = student['changes'][period] * 100
-                            move_score = score_diff - change_penalty
-                            
-                            move_candidates.append((student_id, move_score, best_alt_club))
-                    
-                    # เรียงลำดับคนที่ควรย้ายออก (คนที่เสียประโยชน์น้อยที่สุด)
-                    if not move_candidates:
-                        # ไม่สามารถย้ายใครได้ อาจต้องยอมให้เกินขีดจำกัด
-                        print(f"WARNING: Could not reduce club size for {club} in {period} slot {slot}. Current size: {len(club_members)}")
-                        break
-                    
-                    # เรียงจากคนที่เสียประโยชน์น้อยที่สุด (คะแนนสูงสุด) ไปหามากที่สุด
-                    move_candidates.sort(key=lambda x: x[1], reverse=True)
-                    
-                    # ย้ายคนที่เหมาะสมที่สุด
-                    student_id, _, new_club = move_candidates[0]
-                    
-                    # ลบออกจากชมรมเดิม
-                    club_members.remove(student_id)
-                    
-                    # เพิ่มเข้าชมรมใหม่
-                    time_slots[period][slot][new_club].append(student_id)
-                    
-                    # อัปเดตข้อมูลนักศึกษา
-                    students[student_id]['assignments'][period][slot] = new_club
-                    students[student_id]['changes'][period] += 1
-                    
-                    print(f"Moved student {student_id} from {club} to {new_club} in {period} slot {slot} due to overcrowding")
-    
-    # ตรวจสอบอีกครั้งว่ามีตัวแทนทุกกลุ่มหรือไม่
-    missing_after = check_group_representation(students, time_slots, clubs)
-    
-    # สรุปจำนวนที่เกินขีดจำกัด
-    over_limit_count = 0
-    for period in ['morning', 'afternoon']:
-        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
-            for club in clubs[period]:
-                count = len(time_slots[period][slot][club])
-                if count > MAX_STUDENTS_PER_CLUB:
-                    over_limit_count += 1
-                    print(f"Club {club} in {period} slot {slot} still has {count} students (over limit)")
-    
-    print(f"After adjustments: {over_limit_count} club slots still exceed the student limit")
-    
-    return time_slots
+    snapshot = load_checkpoint(path, file_path, CHECKPOINT_STAGES)
+    state = snapshot['state']
+    students = unpack_students(state['students'], rank_scorer=build_rank_scores, compact=compact)
+    clubs = state['clubs']
+    time_slots = unpack_time_slots(state['time_slots'], students, clubs)
+    return snapshot['stage'], students, time_slots, clubs, state
 
-def optimize_club_allocation(file_path):
+@profiled
+def optimize_club_allocation(file_path, engine='python', solver='greedy', time_limit=None, parallel=False,
+                             initial_strategy='rank', compact=False, local_search=False, search_iterations=None,
+                             search_time_limit=None, seeds=None, workers=None, target_gap=None,
+                             checkpoint_dir=None, resume=None, shards=None, shard_by=None, distance_weight=None,
+                             trace=None, allow_unsharded=False):
     """
     ฟังก์ชันหลักสำหรับการจัดสรรชมรมแบบองค์รวม
+    engine เลือกวิธีคำนวณคะแนนในขั้นตอนปรับปรุงการจัดสรร ('python' หรือ 'numpy')
+    solver='milp' หาคำตอบที่ดีที่สุดด้วย MILP ภายใน time_limit วินาที
+    ถ้าใช้ MILP ไม่ได้ (ไม่มี scipy หรือหาคำตอบไม่ได้) จะกลับไปใช้วิธี greedy
+    parallel=True จัดสรรคาบเช้าและบ่ายพร้อมกันใน worker process แยกกัน (ผลลัพธ์เหมือนเดิม)
+    initial_strategy เลือกวิธีจัดสรรเบื้องต้น ('rank' หรือ 'balanced' ที่กระจายตามความจุ)
+    compact=True เก็บข้อมูลนักศึกษาใน StudentStore เพื่อประหยัดหน่วยความจำ (ผลลัพธ์เหมือนเดิม)
+    local_search=True ปรับปรุงผลด้วยการค้นหาเฉพาะที่ (improve_assignments) ภายใน search_iterations ครั้ง
+    และ/หรือ search_time_limit วินาที
+    seeds (รายการ seed) จัดสรรหลายรอบโดยสุ่มลำดับการประมวลผลใน worker process (ไม่เกิน workers ตัว)
+    แล้วเลือกผลที่ดีที่สุด (allocate_with_seeds)
+    target_gap (สัดส่วน เช่น 0.02) หยุดการค้นหาเฉพาะที่ / การรันหลาย seed / MILP เมื่อระยะห่างจากขอบเขตบนไม่เกินค่านี้
+    checkpoint_dir บันทึก snapshot หลังแต่ละขั้นตอน (CHECKPOINT_STAGES) และ resume (ไฟล์ snapshot)
+    ทำต่อจากขั้นตอนนั้นโดยไม่อ่านไฟล์ CSV ใหม่ (snapshot ต้องสร้างจาก file_path ฉบับเดียวกัน)
+    shards (จำนวน) หรือ shard_by (ชื่อคอลัมน์ เช่น คณะ) แบ่งนักศึกษาเป็นส่วนๆ แล้วจัดสรรพร้อมกันใน worker process
+    ไม่เกิน workers ตัว โดยแบ่งความจุของชมรมตามสัดส่วน แล้วแก้ไขข้าม shard ในรอบสุดท้าย (allocate_in_shards)
+    ถ้ามี shard ที่นักศึกษาน้อยกว่า MIN_STUDENTS_PER_SHARD คนจะ raise ValueError (plan_shards)
+    ยกเว้นเมื่อ allow_unsharded=True ซึ่งจัดสรรแบบไม่แบ่งแทนพร้อมคำเตือน
+    distance_weight (คะแนนต่อกิโลเมตร) หักค่าปรับระยะทางเดินระหว่างชมรมที่ติดกันจากคะแนนในการจัดสรรเบื้องต้น
+    และการปรับปรุง (WalkingRoute) ใช้ได้กับวิธี greedy แบบปกติเท่านั้น
+    trace (ConvergenceTrace) เก็บค่าของแต่ละรอบใน adjust_assignments ของวิธี greedy แบบปกติ
     """
-    # 1. อ่านข้อมูลจากไฟล์ CSV
-    df = read_data(file_path)
-    
-    # 2. จัดกลุ่มนักศึกษาตามตัวเลขสุดท้ายของรหัสนักศึกษา
-    df = assign_groups(df)
-    
-    # 3. รวบรวมชมรมทั้งหมดจากข้อมูล
-    clubs = get_all_clubs(df)
-    
-    # 4. สร้างโครงสร้างข้อมูลความชอบของนักศึกษา
-    students = create_student_preferences(df)
-    
-    # 5. นับจำนวนความนิยมของชมรมทั้งหมด
-    club_counts = count_preferences(df, clubs)
-    
-    # 6. ทำการจัดสรรชมรมเบื้องต้น
-    time_slots = initial_assignment(students, clubs)
-    
-    # 7. ตรวจสอบการแทนกลุ่ม
-    missing_representation = check_group_representation(students, time_slots, clubs)
-    
-    # 8. ปรับปรุงการจัดสรรเพื่อให้ได้การแทนกลุ่มและจำนวนที่เหมาะสม
-    time_slots = adjust_assignments(students, time_slots, clubs, missing_representation)
-    
-    # 9. คืนค่าผลลัพธ์การจัดสรร
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver} (expected one of {', '.join(SOLVERS)})")
+    if distance_weight and (solver == 'milp' or parallel or seeds or shards or shard_by):
+        raise ValueError("distance_weight is only supported by the sequential greedy allocation "
+                         "(not with the MILP solver, parallel periods, seeds or shards)")
+    
+    if resume is not None:
+        # 1-5. โหลดสถานะจาก snapshot แทนการอ่านไฟล์ แล้วทำขั้นตอนที่เหลือต่อ (ด้วยวิธี greedy)
+        stage, students, time_slots, clubs, state = load_allocation_checkpoint(resume, file_path, compact)
+        missing_representation = state.get('missing_representation')
+    else:
+        # 1. อ่านข้อมูลจากไฟล์ CSV
+        df = read_data(file_path)
+        
+        # 2. จัดกลุ่มนักศึกษาตามตัวเลขสุดท้ายของรหัสนักศึกษา
+        df = assign_groups(df)
+        
+        # 3. รวบรวมชมรมทั้งหมดจากข้อมูล
+        clubs = get_all_clubs(df)
+        
+        # 4. สร้างโครงสร้างข้อมูลความชอบของนักศึกษา
+        students = create_student_preferences(df, compact)
+        
+        # 5. นับจำนวนความนิยมของชมรมทั้งหมด และตรวจสอบว่าเงื่อนไขเป็นไปได้หรือไม่
+        club_counts = count_preferences(df, clubs)
+        print_feasibility_report(check_feasibility(df, clubs, club_counts))
+        stage = None
+        time_slots = None
+    
+    # ค่าปรับระยะทางเดิน (ถ้าเลือก)
+    route = create_walking_route(clubs, distance_weight)
+    
+    # 6. ถ้าเลือกใช้ MILP ให้จัดสรรทั้งหมดในขั้นตอนเดียว
+    if stage is None and solver == 'milp':
+        time_slots = solve_allocation_milp(students, clubs, time_limit, target_gap if target_gap is not None else 1e-3)
+        if time_slots is not None:
+            check_group_representation(students, time_slots, clubs)
+            stage = 'adjusted'
+            save_allocation_checkpoint(checkpoint_dir, stage, file_path, students, time_slots, clubs)
+        else:
+            print("Falling back to the greedy allocation...")
+    
+    # แบ่ง shard ก่อนเลือกวิธีจัดสรร (None ถ้า shard เล็กเกินไปและยอมให้จัดสรรแบบไม่แบ่งแทน)
+    partition = None
+    if stage is None and not seeds and (shards or shard_by):
+        partition = plan_shards(df, shards, shard_by, allow_fallback=allow_unsharded)
+    
+    if stage is None and seeds:
+        # 6-9. จัดสรรหลายรอบด้วย seed ต่างกันแล้วเลือกผลที่ดีที่สุด (รวมการค้นหาเฉพาะที่ในแต่ละรอบ)
+        time_slots = allocate_with_seeds(students, clubs, seeds, engine, initial_strategy, club_counts,
+                                         local_search, search_iterations, search_time_limit, workers, target_gap)
+        save_allocation_checkpoint(checkpoint_dir, 'improved' if local_search else 'adjusted', file_path,
+                                   students, time_slots, clubs)
+        return students, time_slots, clubs
+    elif stage is None and partition is not None:
+        # 6-8. จัดสรรแต่ละ shard พร้อมกันใน worker process
+        shard_counts = None
+        if initial_strategy == 'balanced':
+            shard_ids = df['รหัสนักศึกษา'].astype(str)
+            shard_counts = [count_preferences(df[shard_ids.isin(shard)], clubs) for shard in partition]
+        time_slots = allocate_in_shards(students, clubs, partition, engine, initial_strategy, shard_counts, workers)
+        stage = 'adjusted'
+        save_allocation_checkpoint(checkpoint_dir, stage, file_path, students, time_slots, clubs)
+    elif stage is None and parallel:
+        # 6-8. จัดสรรเช้าและบ่ายพร้อมกันใน worker process
+        time_slots = allocate_periods_in_parallel(students, clubs, engine, initial_strategy, club_counts)
+        stage = 'adjusted'
+        save_allocation_checkpoint(checkpoint_dir, stage, file_path, students, time_slots, clubs)
+    elif stage is None:
+        # 6. ทำการจัดสรรชมรมเบื้องต้น
+        time_slots = initial_assignment(students, clubs, strategy=initial_strategy, club_counts=club_counts, route=route)
+        stage = 'initial'
+        save_allocation_checkpoint(checkpoint_dir, stage, file_path, students, time_slots, clubs)
+    
+    if stage == 'initial':
+        # 7. ตรวจสอบการแทนกลุ่ม
+        missing_representation = check_group_representation(students, time_slots, clubs)
+        stage = 'representation'
+        save_allocation_checkpoint(checkpoint_dir, stage, file_path, students, time_slots, clubs,
+                                   missing_representation=missing_representation)
+    
+    if stage == 'representation':
+        # 8. ปรับปรุงการจัดสรรเพื่อให้ได้การแทนกลุ่มและจำนวนที่เหมาะสม
+        time_slots = adjust_assignments(students, time_slots, clubs, missing_representation, engine, route=route,
+                                        trace=trace)
+        stage = 'adjusted'
+        save_allocation_checkpoint(checkpoint_dir, stage, file_path, students, time_slots, clubs)
+    
+    # 9. ค้นหาเฉพาะที่เพื่อเพิ่มความพึงพอใจ (ถ้าเลือก และยังไม่ได้ทำใน snapshot)
+    if local_search and stage == 'adjusted':
+        improve_assignments(students, time_slots, clubs, search_iterations, search_time_limit, target_gap=target_gap)
+        stage = 'improved'
+        save_allocation_checkpoint(checkpoint_dir, stage, file_path, students, time_slots, clubs)
+    
+    # 10. คืนค่าผลลัพธ์การจัดสรร
     return students, time_slots, clubs
 
-def calculate_statistics(students, time_slots, clubs):
+def describe_gap(statistics, bound='ideal'):
+    """
+    ข้อความต่อท้าย optimality gap: จำนวนที่ผิดเงื่อนไข (gap ของการจัดสรรที่ผิดเงื่อนไขเทียบกับคำตอบที่ถูกต้องไม่ได้)
+    การใช้ 'ideal' แทน 'lp' ที่ขอ และ gap ที่ติดลบแล้วถูกปัดเป็น 0 (ข้อความว่างถ้าไม่มีสิ่งเหล่านี้)
+    """
+    notes = []
+    if not statistics['feasible']:
+        notes.append(f"allocation violates the limits: {statistics['over_limit']} over-limit slots, "
+                     f"{statistics['missing_groups']} missing groups")
+        if bound == 'lp':
+            notes.append("the lp bound assumes a feasible allocation, ideal bound used")
+    elif bound == 'lp' and statistics['bound'] != 'lp':
+        notes.append("lp bound not solved (scipy missing or time limit reached), ideal bound used")
+    if statistics['gap_clamped']:
+        notes.append("negative gap clamped to 0")
+    return f" ({'; '.join(notes)})" if notes else ""
+
+@profiled
+def calculate_statistics(students, time_slots, clubs, bound='ideal', time_limit=None, upper_bound=None):
     """
-    คำนวณสถิติต่างๆ จากผลการจัดสรรชมรม
+    คำนวณสถิติต่างๆ จากผลการจัดสรรชมรม ในรอบเดียวจากการจัดสรรในรูป array (StudentStore ถ้าเป็น dict จะถูกแปลงครั้งเดียว)
+    จำนวนการเปลี่ยนแปลง ขนาดชมรม และการแทนกลุ่มนับด้วย np.unique / np.bincount ส่วนคะแนนความพึงพอใจ
+    ขอบเขตบน และระยะทางเดินคำนวณทุกคนพร้อมกัน (time_slots ตรงกับการจัดสรรของนักศึกษาเสมอ จึงไม่ต้องอ่านซ้ำ)
+    bound เลือกขอบเขตบนของความพึงพอใจที่ใช้คำนวณ optimality_gap ('ideal' หรือ 'lp' ซึ่งถ้าแก้ไม่ได้จะใช้ 'ideal' แทน)
+    ขอบเขต 'lp' คิดขีดจำกัดและการแทนกลุ่ม จึงใช้ได้เฉพาะการจัดสรรที่ไม่ผิดเงื่อนไข (feasible) การจัดสรรที่ผิดเงื่อนไข
+    จะใช้ 'ideal' ซึ่งเป็นขอบเขตบนของทุกการจัดสรรแทน จำนวนที่ผิดเงื่อนไขอยู่ใน over_limit / missing_groups
+    time_limit (วินาที) จำกัดเวลาแก้ LP ของขอบเขต 'lp' ถ้าหมดเวลาจะใช้ 'ideal' แทนเช่นกัน
+    และ gap ที่ติดลบ (จากความคลาดเคลื่อนของ solver) ถูกปัดเป็น 0 โดยตั้ง gap_clamped
+    upper_bound คือขอบเขตบนแบบ 'ideal' (ความพึงพอใจรวม) ที่คำนวณไว้แล้ว ถ้าไม่ระบุจะคำนวณจากความต้องการของนักศึกษา
     """
+    if bound not in BOUNDS:
+        raise ValueError(f"Unknown bound: {bound} (expected one of {', '.join(BOUNDS)})")
+    store = students if isinstance(students, StudentStore) else StudentStore.from_students(students)
+    
     statistics = {
         'total_students': len(students),
         'change_counts': {'morning': {}, 'afternoon': {}},
@@ -442,116 +403,145 @@ def calculate_statistics(students, time_slots, clubs):
         'group_representation': {'morning': {}, 'afternoon': {}}
     }
     
-    # นับจำนวนการเปลี่ยนแปลง
-    for student_id, student in students.items():
-        for period in ['morning', 'afternoon']:
-            changes = student['changes'][period]
-            if changes not in statistics['change_counts'][period]:
-                statistics['change_counts'][period][changes] = 0
-            statistics['change_counts'][period][changes] += 1
+    # รหัสกลุ่มของ StudentStore -> ตำแหน่งใน GROUP_LABELS (กลุ่มอื่นหรือไม่มีกลุ่มได้ -1)
+    group_lookup = np.array([GROUP_LABELS.index(label) if label in GROUP_LABELS else -1 for label in store.group_labels]
+                            + [-1], dtype=np.intp)
+    groups = group_lookup[store.groups]
     
-    # นับขนาดชมรม
-    for period in ['morning', 'afternoon']:
+    for index, period in enumerate(PERIODS):
+        # นับจำนวนการเปลี่ยนแปลง
+        values, counts = np.unique(store.changes[:, index], return_counts=True)
+        statistics['change_counts'][period] = dict(zip(values.tolist(), counts.tolist()))
+        
+        # รหัสชมรม -> ตำแหน่งใน clubs[period] (ช่อง NO_CLUB อ่านค่าสุดท้ายซึ่งเป็น -1)
+        club_lookup = np.full(len(store.codec) + 1, -1, dtype=np.intp)
+        for position, club in enumerate(clubs[period]):
+            code = store.codec.codes.get(club)
+            if code is not None:
+                club_lookup[code] = position
+        num_clubs = len(clubs[period])
+        
         for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
-            if slot not in statistics['club_sizes'][period]:
-                statistics['club_sizes'][period][slot] = {}
+            columns = club_lookup[store.assignments[:, index, slot-1]]
+            assigned = columns >= 0
             
-            for club in clubs[period]:
-                club_size = len(time_slots[period][slot][club])
-                statistics['club_sizes'][period][slot][club] = club_size
-    
-    # นับการแทนกลุ่ม
-    for period in ['morning', 'afternoon']:
-        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
-            if slot not in statistics['group_representation'][period]:
-                statistics['group_representation'][period][slot] = {}
+            # นับขนาดชมรม
+            sizes = np.bincount(columns[assigned], minlength=num_clubs)
+            statistics['club_sizes'][period][slot] = dict(zip(clubs[period], sizes.tolist()))
             
-            for club in clubs[period]:
-                group_counts = {str(i): 0 for i in range(NUM_GROUPS)}
-                for student_id in time_slots[period][slot][club]:
-                    group = students[student_id]['group']
-                    group_counts[group] += 1
-                statistics['group_representation'][period][slot][club] = group_counts
+            # นับการแทนกลุ่ม (ชมรม x กลุ่ม)
+            grouped = assigned & (groups >= 0)
+            group_counts = np.bincount(columns[grouped] * NUM_GROUPS + groups[grouped],
+                                       minlength=num_clubs * NUM_GROUPS).reshape(num_clubs, NUM_GROUPS)
+            statistics['group_representation'][period][slot] = {
+                club: dict(zip(GROUP_LABELS, row)) for club, row in zip(clubs[period], group_counts.tolist())
+            }
     
     # คำนวณคะแนนความพึงพอใจโดยรวม
-    total_satisfaction = 0
-    for student_id, student in students.items():
-        student_satisfaction = 0
-        for period in ['morning', 'afternoon']:
-            for slot, club in student['assignments'][period].items():
-                student_satisfaction += calculate_satisfaction_score(student, club, period, slot)
-        
-        statistics['satisfaction_scores'].append({
-            'student_id': student_id,
-            'score': student_satisfaction,
-            'group': student['group']
-        })
-        total_satisfaction += student_satisfaction
+    student_totals = calculate_store_satisfaction(store)
+    group_labels = np.array(store.group_labels + [''], dtype=object)[store.groups]
+    statistics['satisfaction_scores'] = [
+        {'student_id': student_id, 'score': score, 'group': group}
+        for student_id, score, group in zip(store.student_ids, student_totals.tolist(), group_labels.tolist())
+    ]
+    total_satisfaction = int(student_totals.sum())
     
     statistics['average_satisfaction'] = total_satisfaction / len(students) if students else 0
     
+    # ชมรมที่เกินขีดจำกัดและกลุ่มที่ขาดตัวแทน (ขอบเขตบนแบบ lp ใช้ได้เฉพาะเมื่อไม่มีทั้งสองอย่าง)
+    over_limit, missing_groups = count_violations(time_slots, clubs)
+    statistics['over_limit'] = over_limit
+    statistics['missing_groups'] = missing_groups
+    statistics['feasible'] = not over_limit and not missing_groups
+    
+    # ขอบเขตบนและระยะห่างจากคำตอบที่ดีที่สุด (สัดส่วนของขอบเขตบน)
+    lp_bound = (calculate_lp_upper_bound(students, clubs, time_limit)
+                if bound == 'lp' and statistics['feasible'] else None)
+    statistics['bound'] = 'lp' if lp_bound is not None else 'ideal'
+    if lp_bound is not None:
+        upper_bound = lp_bound
+    elif upper_bound is None:
+        upper_bound = calculate_satisfaction_upper_bound(store)
+    statistics['upper_bound'] = upper_bound / len(students) if students else 0
+    gap = calculate_gap(total_satisfaction, upper_bound)
+    statistics['gap_clamped'] = gap < 0
+    statistics['optimality_gap'] = max(gap, 0.0)
+    
+    # ระยะทางเดินรวมระหว่างชมรมที่ติดกัน (กิโลเมตร ตามพิกัดชมรมของ WalkingRoute)
+    route = WalkingRoute(clubs)
+    total_distance = float(calculate_store_distances(store, route).sum())
+    statistics['total_distance'] = total_distance
+    statistics['average_distance'] = total_distance / len(students) if students else 0
+    statistics['unlocated_clubs'] = route.unlocated
+    record(students=len(students))
+    
     return statistics
 
-def save_results(students, clubs, statistics, output_file):
+def results_frame(students):
     """
-    บันทึกผลลัพธ์การจัดสรรลงไฟล์ CSV โดยแบ่งตามกลุ่ม
+    สร้าง DataFrame ผลการจัดสรร (หนึ่งแถวต่อนักศึกษา เรียงตามกลุ่มแล้วตามรหัสนักศึกษา) จาก array ของ StudentStore
+    ทีละคอลัมน์ แทนการสร้าง dict ทีละแถว (dict ของนักศึกษาแบบเดิมถูกแปลงเป็น StudentStore ก่อน)
     """
-    # แยกนักศึกษาตามกลุ่ม
-    students_by_group = {str(i): [] for i in range(NUM_GROUPS)}
-    for student_id, student in students.items():
-        group = student['group']
-        students_by_group[group].append((student_id, student))
-    
-    # เรียงลำดับนักศึกษาในแต่ละกลุ่มตามรหัสนักศึกษา
-    for group in students_by_group:
-        students_by_group[group].sort(key=lambda x: x[0])
-    
-    results = []
+    store = students if isinstance(students, StudentStore) else StudentStore.from_students(students)
+    
+    # เรียงตามกลุ่มแล้วตามรหัสนักศึกษา (เทียบแบบสตริงเหมือนเดิม)
+    ids = np.array(store.student_ids, dtype=str)
+    group_order = np.argsort(np.argsort(np.array(store.group_labels, dtype=str), kind='stable'))
+    order = np.lexsort((ids, group_order[store.groups])) if len(ids) else np.array([], dtype=int)
+    
+    columns = {
+        'รหัสนักศึกษา': ids[order],
+        'กลุ่ม': np.array(store.group_labels, dtype=object)[store.groups[order]],
+        'การเปลี่ยนแปลงชมรมเช้า': store.changes[order, PERIODS.index('morning')],
+        'การเปลี่ยนแปลงชมรมบ่าย': store.changes[order, PERIODS.index('afternoon')],
+    }
     
-    # เพิ่มข้อมูลนักศึกษาตามกลุ่ม
-    for group in sorted(students_by_group.keys()):
-        group_students = students_by_group[group]
-        
-        # เพิ่มหัวกลุ่ม
-        if group_students:  # ในกรณีที่กลุ่มมีนักศึกษา
-            results.append({
-                'รหัสนักศึกษา': f'*** กลุ่ม {group} ({len(group_students)} คน) ***',
-                'กลุ่ม': group
-            })
-            
-            # เพิ่มข้อมูลนักศึกษาแต่ละคนในกลุ่ม
-            for student_id, student in group_students:
-                row = {
-                    'รหัสนักศึกษา': student_id,
-                    'กลุ่ม': student['group'],
-                    'การเปลี่ยนแปลงชมรมเช้า': student['changes']['morning'],
-                    'การเปลี่ยนแปลงชมรมบ่าย': student['changes']['afternoon']
-                }
-                
-                # เพิ่มความต้องการหลักและสำรอง
-                for period in ['morning', 'afternoon']:
-                    for i, club in enumerate(student['preferences'][period]['main']):
-                        row[f'ฐาน{"เช้า" if period == "morning" else "บ่าย"} อันดับที่ {i+1}'] = club
-                    
-                    for i, club in enumerate(student['preferences'][period]['backup']):
-                        row[f'ฐาน{"เช้า" if period == "morning" else "บ่าย"} อันดับที่ {i+5}'] = club
-                
-                # เพิ่มการจัดสรร
-                for period in ['morning', 'afternoon']:
-                    for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
-                        assigned_club = student['assignments'][period].get(slot, "")
-                        row[f'ชมรม{"เช้า" if period == "morning" else "บ่าย"} ช่วงที่ {slot}'] = assigned_club
-                
-                results.append(row)
+    # ความต้องการหลัก (อันดับ 1-4) และสำรอง (อันดับ 5-8) ช่องที่ไม่มีชมรมเป็นค่าว่าง (None)
+    for period in PERIODS:
+        period_display = "เช้า" if period == "morning" else "บ่าย"
+        index = PERIODS.index(period)
+        main = store.codec.decode_array(store.main[order, index], empty=None)
+        backup = store.codec.decode_array(store.backup[order, index], empty=None)
+        for i in range(main.shape[1]):
+            columns[f'ฐาน{period_display} อันดับที่ {i+1}'] = main[:, i]
+        for i in range(backup.shape[1]):
+            columns[f'ฐาน{period_display} อันดับที่ {i+main.shape[1]+1}'] = backup[:, i]
+    
+    # การจัดสรร
+    for period in PERIODS:
+        period_display = "เช้า" if period == "morning" else "บ่าย"
+        assignments = store.codec.decode_array(store.assignments[order, PERIODS.index(period)], empty=None)
+        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+            columns[f'ชมรม{period_display} ช่วงที่ {slot}'] = assignments[:, slot - 1]
     
-    # บันทึกไฟล์ CSV
-    pd.DataFrame(results).to_csv(output_file, index=False, encoding='utf-8-sig')
-    print(f"Results saved to {output_file} with students grouped by their group number")
+    return pd.DataFrame(columns)
+
+@profiled
+def save_results(students, clubs, statistics, output_file, format=None, group_headers=True):
+    """
+    บันทึกผลลัพธ์การจัดสรรลงไฟล์ เรียงตามกลุ่ม รูปแบบไฟล์ (csv / parquet / feather) ดูจาก format หรือนามสกุลของ output_file
+    ไฟล์ CSV มีแถวหัวกลุ่มก่อนนักศึกษาของแต่ละกลุ่มเมื่อ group_headers=True ส่วน Parquet/Feather ไม่มีแถวหัวกลุ่ม
+    """
+    results = results_frame(students)
+    format = write_results(results, output_file, format=format, group_headers=group_headers)
+    record(rows=len(results))
+    print(f"Results saved to {output_file} ({format}) with students grouped by their group number")
 
-def generate_club_size_report(time_slots, clubs, output_file):
+@profiled
+def generate_club_size_report(time_slots, clubs, output_file, statistics=None):
     """
     สร้างรายงานจำนวนนักศึกษาในแต่ละชมรมในแต่ละช่วงเวลา
+    statistics (จาก calculate_statistics) ใช้ขนาดชมรมที่นับไว้แล้วแทนการนับจาก time_slots ใหม่
     """
+    if statistics is not None:
+        club_sizes = statistics['club_sizes']
+    else:
+        club_sizes = {
+            period: {slot: {club: len(time_slots[period][slot][club]) for club in clubs[period]}
+                     for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)}
+            for period in PERIODS
+        }
+    
     # สร้างข้อมูลสำหรับรายงาน
     report_data = []
     
@@ -584,10 +574,9 @@ def generate_club_size_report(time_slots, clubs, output_file):
             })
             
             # เรียงชมรมตามจำนวนนักศึกษาจากมากไปน้อย
-            club_sizes = [(club, len(time_slots[period][slot][club])) for club in clubs[period]]
-            club_sizes.sort(key=lambda x: x[1], reverse=True)
+            slot_sizes = sorted(club_sizes[period][slot].items(), key=lambda x: x[1], reverse=True)
             
-            for club, size in club_sizes:
+            for club, size in slot_sizes:
                 # กำหนดสถานะตามจำนวนนักศึกษา
                 status = "OK"
                 if size > MAX_STUDENTS_PER_CLUB:
@@ -603,7 +592,7 @@ def generate_club_size_report(time_slots, clubs, output_file):
                 })
     
     # บันทึกรายงานลงไฟล์ CSV
-    report_filename = output_file.replace('.csv', '_club_sizes.csv')
+    report_filename = os.path.splitext(output_file)[0] + '_club_sizes.csv'
     pd.DataFrame(report_data).to_csv(report_filename, index=False, encoding='utf-8-sig')
     print(f"Club size report saved to {report_filename}")
     
@@ -614,28 +603,238 @@ def generate_club_size_report(time_slots, clubs, output_file):
         for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
             for club in clubs[period]:
                 clubs_count += 1
-                if len(time_slots[period][slot][club]) > MAX_STUDENTS_PER_CLUB:
+                if club_sizes[period][slot][club] > MAX_STUDENTS_PER_CLUB:
                     over_limit_count += 1
     
     print(f"Club size summary: {over_limit_count} out of {clubs_count} club slots exceed the limit of {MAX_STUDENTS_PER_CLUB} students ({over_limit_count/clubs_count*100:.2f}%)")
     
     return report_filename
 
-if __name__ == "__main__":
+def find_batch_files(batch):
+    """
+    รายการไฟล์นำเข้าของโหมด batch: batch เป็นโฟลเดอร์ (ใช้ไฟล์ .csv ทั้งหมดในโฟลเดอร์) หรือรูปแบบ glob
+    (เช่น "cohorts/*.csv") เรียงตามชื่อไฟล์
+    """
+    pattern = os.path.join(batch, '*.csv') if os.path.isdir(batch) else batch
+    files = sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+    if not files:
+        raise ValueError(f"No input files match {batch}")
+    return files
+
+def batch_output_file(input_file, output_dir):
+    """
+    ไฟล์ผลลัพธ์ของไฟล์นำเข้าหนึ่งไฟล์ในโหมด batch (ชื่อตามไฟล์นำเข้า ในโฟลเดอร์ output_dir)
+    """
+    name = os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.join(output_dir, f'{name}_results.csv')
+
+def run_batch_file(input_file, output_file, bound='ideal', **options):
+    """
+    จัดสรร คำนวณสถิติ และบันทึกผลของไฟล์นำเข้าหนึ่งไฟล์ (งานของ worker process ใน run_batch)
+    ข้อความระหว่างทำงาน (logging และ print) ถูกบันทึกในไฟล์ .log ข้างไฟล์ผลลัพธ์ผ่าน capture_to_file
+    ถ้าเกิดข้อผิดพลาดจะบันทึก traceback ลงไฟล์เดียวกันโดยไม่ raise แต่คืนค่าแถวสรุปที่มี status='failed'
+    และข้อความผิดพลาด เพื่อไม่ให้ไฟล์อื่นใน batch หยุดตาม options ส่งต่อให้ optimize_club_allocation
+    """
+    row = {'input_file': input_file, 'output_file': output_file, 'status': 'ok', 'error': ''}
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    with capture_to_file(os.path.splitext(output_file)[0] + '.log'):
+        try:
+            students, time_slots, clubs = optimize_club_allocation(input_file, **options)
+            statistics = calculate_statistics(students, time_slots, clubs, bound=bound,
+                                              time_limit=options.get('time_limit'))
+            save_results(students, clubs, statistics, output_file)
+            generate_club_size_report(time_slots, clubs, output_file, statistics)
+            row.update({
+                'students': statistics['total_students'],
+                'average_satisfaction': statistics['average_satisfaction'],
+                'upper_bound': statistics['upper_bound'],
+                'optimality_gap': statistics['optimality_gap'],
+                'over_limit': statistics['over_limit'],
+                'missing_groups': statistics['missing_groups'],
+                'total_distance': statistics['total_distance'],
+            })
+        except Exception as error:
+            batch_logger.exception("Allocation of %s failed", input_file)
+            row.update({'status': 'failed', 'error': f"{type(error).__name__}: {error}"})
+    row['seconds'] = time.perf_counter() - start
+    row['cpu_seconds'] = time.process_time() - start_cpu
+    return row
+
+def run_batch(input_files, output_dir, workers=None, summary_file=None, bound='ideal', **options):
+    """
+    จัดสรรหลายไฟล์นำเข้า (เช่น หนึ่งไฟล์ต่อคณะ/วัน) พร้อมกันใน process pool ไม่เกิน workers ตัว
+    บันทึกผลของแต่ละไฟล์ใน output_dir (batch_output_file) และตารางสรุปเวลาและคุณภาพของทุกไฟล์
+    ใน summary_file (ค่าเริ่มต้น BATCH_SUMMARY_FILE ใน output_dir) ไฟล์ที่ผิดพลาดจะถูกบันทึกในตารางสรุป
+    โดยไม่หยุดไฟล์อื่น คืนค่าตารางสรุป (DataFrame ตามลำดับของ input_files)
+    """
+    output_files = [batch_output_file(input_file, output_dir) for input_file in input_files]
+    duplicates = sorted(path for path, count in Counter(output_files).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Input files with the same name would overwrite each other's results: {', '.join(duplicates)}")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    batch_logger.info("Allocating %s input files in parallel worker processes...", len(input_files))
+    start = time.perf_counter()
+    rows = [None] * len(input_files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_batch_file, input_file, output_file, bound, **options): index
+                   for index, (input_file, output_file) in enumerate(zip(input_files, output_files))}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                row = future.result()
+            except Exception as error:
+                # worker process หยุดทำงานเอง (เช่น หน่วยความจำไม่พอ) จึงไม่ได้คืนค่าแถวสรุป
+                row = {'input_file': input_files[index], 'output_file': output_files[index], 'status': 'failed',
+                       'error': f"{type(error).__name__}: {error}"}
+            rows[index] = row
+            if row['status'] == 'ok':
+                batch_logger.info("%s: %s students, average satisfaction %.2f, gap %.2f%%, %s over-limit slots, "
+                                  "%s missing groups (%.2f seconds)", row['input_file'], row['students'],
+                                  row['average_satisfaction'], row['optimality_gap'] * 100, row['over_limit'],
+                                  row['missing_groups'], row['seconds'])
+            else:
+                batch_logger.warning("WARNING: %s: failed (%s)", row['input_file'], row['error'])
+    
+    summary = pd.DataFrame(rows, columns=['input_file', 'status', 'students', 'average_satisfaction', 'upper_bound',
+                                          'optimality_gap', 'over_limit', 'missing_groups', 'total_distance',
+                                          'seconds', 'cpu_seconds',
+                                          'output_file', 'error'])
+    # ไฟล์ที่ผิดพลาดไม่มีตัวชี้วัด จึงใช้ชนิดจำนวนเต็มที่มีค่าว่างได้
+    summary = summary.astype({'students': 'Int64', 'over_limit': 'Int64', 'missing_groups': 'Int64'})
+    summary_file = summary_file or os.path.join(output_dir, BATCH_SUMMARY_FILE)
+    summary.to_csv(summary_file, index=False, encoding='utf-8-sig')
+    
+    failed = int((summary['status'] != 'ok').sum())
+    batch_logger.info("\n===== Batch Summary =====")
+    batch_logger.info("%s", summary.drop(columns=['output_file', 'error']).to_string(index=False))
+    batch_logger.info("%s of %s files allocated in %.2f seconds%s", len(input_files) - failed, len(input_files),
+                      time.perf_counter() - start, f", {failed} failed" if failed else "")
+    batch_logger.info("Batch summary saved to %s", summary_file)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocate students to clubs")
+    parser.add_argument('input_file', nargs='?', default="test_250.csv", help="input CSV with student preferences")
+    parser.add_argument('--output', default="club_assignment_results_optimal.csv", help="output file for the allocation results")
+    parser.add_argument('--format', choices=RESULT_FORMATS, default=None, help="results file format (default: from the --output extension)")
+    parser.add_argument('--no-group-headers', action='store_true', help="omit the group header rows from CSV results")
+    parser.add_argument('--engine', choices=SCORING_ENGINES, default='python', help="satisfaction scoring engine")
+    parser.add_argument('--solver', choices=SOLVERS, default='greedy',
+                        help="allocation method (milp: about a minute for 1,000 students; at 10,000 it found no "
+                             "solution within a 600 second limit and fell back to greedy)")
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help="time limit in seconds for the MILP solver and the --bound lp relaxation "
+                             "(the lp bound alone takes about 75 seconds for 10,000 students)")
+    parser.add_argument('--parallel', action='store_true', help="allocate morning and afternoon in separate processes")
+    parser.add_argument('--compact', action='store_true', help="keep student data in a compact array-backed store")
+    parser.add_argument('--initial-strategy', choices=INITIAL_STRATEGIES, default='rank', help="initial assignment strategy")
+    parser.add_argument('--local-search', action='store_true', help="improve the allocation with local search")
+    parser.add_argument('--search-iterations', type=int, default=None, help="move evaluations for the local search")
+    parser.add_argument('--search-time', type=float, default=None, help="time limit in seconds for the local search")
+    parser.add_argument('--bound', choices=BOUNDS, default='ideal', help="satisfaction upper bound used for the optimality gap")
+    parser.add_argument('--target-gap', type=float, default=None, help="stop improving once the relative gap is at most this (e.g. 0.02)")
+    parser.add_argument('--distance-weight', type=float, default=None, help="satisfaction points per km walked between consecutive clubs")
+    parser.add_argument('--check-only', action='store_true', help="only run the feasibility check")
+    parser.add_argument('--seeds', type=int, nargs='+', default=None, help="run one shuffled allocation per seed and keep the best")
+    parser.add_argument('--delta', default=None, help="CSV of added/removed/changed students to apply to a previous result")
+    parser.add_argument('--previous', default=None, help="previous results file for --delta (default: the --output file)")
+    parser.add_argument('--checkpoint-dir', default=None, help="save a snapshot of the allocation after each stage here")
+    parser.add_argument('--resume', default=None, help="snapshot file to resume the allocation from")
+    parser.add_argument('--shards', type=shard_count, default=None, help="split students into this many shards allocated in parallel")
+    parser.add_argument('--shard-by', default=None, help="input column to shard by instead (e.g. a faculty column)")
+    parser.add_argument('--allow-unsharded-fallback', action='store_true',
+                        help="allocate without shards (with a warning) when the shards would be too small")
+    parser.add_argument('--batch', default=None, help="directory or glob of input CSVs to allocate concurrently")
+    parser.add_argument('--output-dir', default="batch_results", help="directory for the --batch results and summary")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for --seeds/--shards/--batch (default: all CPUs)")
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default='info', help="console detail of the repair steps (debug: every move)")
+    parser.add_argument('--move-log', default=None, help="write every repair move to this file (buffered)")
+    parser.add_argument('--profile', default=None, help="write a JSON report of time, CPU and peak memory per stage here")
+    parser.add_argument('--profile-no-memory', action='store_true', help="skip tracemalloc in --profile (lower overhead)")
+    parser.add_argument('--trace', default=None, help="write the adjust_assignments convergence trace here (.csv or .json)")
+    args = parser.parse_args()
+    if args.trace and (args.seeds or args.parallel or args.shards or args.shard_by or args.batch or args.delta):
+        parser.error("--trace follows adjust_assignments of the sequential greedy solver and cannot be combined "
+                     "with --seeds, --parallel, --shards, --shard-by, --batch or --delta")
+    if args.delta:
+        unsupported = ['--' + option.replace('_', '-') for option in DELTA_UNSUPPORTED_OPTIONS
+                       if getattr(args, option) != parser.get_default(option)]
+        if unsupported:
+            parser.error(f"--delta repairs the previous allocation in place and does not use {', '.join(unsupported)}")
+    configure_logging(args.log_level, args.move_log)
+    
+    if args.profile:
+        start_profiling(trace_memory=not args.profile_no_memory)
+    try:
+        run_allocation(args)
+    finally:
+        if args.profile:
+            print_profile(stop_profiling(args.profile, input_file=args.input_file))
+
+def run_allocation(args):
+    """
+    ทำงานตามตัวเลือกจาก command line (main): ตรวจสอบอย่างเดียว / batch / delta หรือจัดสรรปกติ แล้วบันทึกผล
+    """
     print("Starting club allocation process...")
-    input_file = "test_250.csv"  # ถ้ามีไฟล์อื่นให้เปลี่ยนชื่อไฟล์ตรงนี้
-    output_file = "club_assignment_results_optimal.csv"
-    
-    # รันอัลกอริทึมการจัดสรร
-    students, time_slots, clubs = optimize_club_allocation(input_file)
+    input_file = args.input_file
+    output_file = args.output
+    if not args.check_only and not args.batch:
+        result_format(output_file, args.format)  # ตรวจสอบรูปแบบไฟล์ผลลัพธ์ (และ pyarrow) ก่อนเริ่มจัดสรร
+    
+    # ตรวจสอบความเป็นไปได้อย่างเดียว (ไม่จัดสรร)
+    if args.check_only:
+        df = assign_groups(read_data(input_file))
+        clubs = get_all_clubs(df)
+        print_feasibility_report(check_feasibility(df, clubs, count_preferences(df, clubs)))
+        return
+    
+    # จัดสรรหลายไฟล์พร้อมกัน (แต่ละไฟล์จัดสรรใน process เดียว จึงไม่ส่ง --parallel/--seeds/--shards ต่อ)
+    if args.batch:
+        run_batch(find_batch_files(args.batch), args.output_dir, workers=args.workers, bound=args.bound,
+                  engine=args.engine, solver=args.solver, time_limit=args.time_limit,
+                  initial_strategy=args.initial_strategy, compact=args.compact, local_search=args.local_search,
+                  search_iterations=args.search_iterations, search_time_limit=args.search_time,
+                  target_gap=args.target_gap, distance_weight=args.distance_weight)
+        return
+    
+    # รันอัลกอริทึมการจัดสรร (หรือแก้ไขผลครั้งก่อนตาม delta)
+    trace = ConvergenceTrace('adjust_assignments', 'satisfaction') if args.trace else None
+    if args.delta:
+        students, time_slots, clubs = reallocate_incremental(args.previous or output_file, args.delta)
+    else:
+        students, time_slots, clubs = optimize_club_allocation(input_file, engine=args.engine,
+                                                              solver=args.solver, time_limit=args.time_limit,
+                                                              parallel=args.parallel, initial_strategy=args.initial_strategy,
+                                                              compact=args.compact, local_search=args.local_search,
+                                                              search_iterations=args.search_iterations,
+                                                              search_time_limit=args.search_time,
+                                                              seeds=args.seeds, workers=args.workers,
+                                                              target_gap=args.target_gap,
+                                                              checkpoint_dir=args.checkpoint_dir, resume=args.resume,
+                                                              shards=args.shards, shard_by=args.shard_by,
+                                                              distance_weight=args.distance_weight,
+                                                              trace=trace, allow_unsharded=args.allow_unsharded_fallback)
+    if trace is not None:
+        if len(trace):
+            trace.save(args.trace)
+        else:
+            print("No convergence trace recorded (--trace follows adjust_assignments of the sequential greedy solver)")
     
     # คำนวณสถิติ
-    statistics = calculate_statistics(students, time_slots, clubs)
+    statistics = calculate_statistics(students, time_slots, clubs, bound=args.bound, time_limit=args.time_limit)
     
     # แสดงสถิติบางส่วน
     print(f"\n===== Club Allocation Statistics =====")
     print(f"Total students: {statistics['total_students']}")
     print(f"Average satisfaction score: {statistics['average_satisfaction']:.2f}")
+    print(f"Satisfaction upper bound ({statistics['bound']}): {statistics['upper_bound']:.2f}, "
+          f"optimality gap {statistics['optimality_gap'] * 100:.2f}%{describe_gap(statistics, args.bound)}")
+    unlocated = statistics['unlocated_clubs']
+    unlocated_note = f" (no coordinates for {len(unlocated)} clubs: {', '.join(unlocated)})" if unlocated else ""
+    print(f"Total walking distance: {statistics['total_distance']:.2f} km "
+          f"({statistics['average_distance'] * 1000:.0f} m per student){unlocated_note}")
     
     print("\nMorning club change statistics:")
     for changes, count in sorted(statistics['change_counts']['morning'].items()):
@@ -646,9 +845,12 @@ if __name__ == "__main__":
         print(f"  {changes} changes: {count} students ({count/statistics['total_students']*100:.2f}%)")
     
     # บันทึกผลลัพธ์การจัดสรร
-    save_results(students, clubs, statistics, output_file)
+    save_results(students, clubs, statistics, output_file, format=args.format, group_headers=not args.no_group_headers)
     
     # สร้างรายงานจำนวนนักศึกษาในแต่ละชมรม
-    generate_club_size_report(time_slots, clubs, output_file)
+    generate_club_size_report(time_slots, clubs, output_file, statistics)
     
     print(f"\nClub allocation completed successfully!")
+
+if __name__ == "__main__":
+    main()
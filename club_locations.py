@@ -0,0 +1,140 @@
+#พิกัดของอาคารและชมรม และการคำนวณระยะทางเดินระหว่างชมรม ที่ Pathoptimize.py และการจัดสรร (WalkingRoute) ใช้ร่วมกัน
+#ชมรมหรืออาคารที่ไม่มีพิกัดมีระยะทางเป็น UNKNOWN_DISTANCE (อนันต์) ในทุกโมดูล
+import math
+
+import numpy as np
+
+UNKNOWN_DISTANCE = float('inf')  # ระยะทางเมื่อไม่พบพิกัดของอาคาร/ชมรมใดชมรมหนึ่ง (ไม่ทราบระยะทาง)
+
+# กำหนดพิกัดของแต่ละอาคารที่ชมรมตั้งอยู่ (building_id: [latitude, longitude])
+# ใช้ค่าพิกัดจริงเพื่อความแม่นยำในการคำนวณระยะทาง
+building_locations = {
+    'อาคาร 1': [18.790902, 98.972707],  # Coverdance/Devil location
+    'อาคาร 2': [18.792078, 98.971493],  # Chorus location
+    'อาคาร 3': [18.790902, 98.972707],  # Devil location (same as Coverdance)
+    'อาคาร 4': [18.791527, 98.972063],  # Pingpong location
+    'อาคาร 5': [18.789980, 98.973104],  # Art location
+    'อาคาร 6': [18.790933, 98.972240],  # Bridge location
+    'อาคาร 7': [18.789990, 98.972625],  # E-Sport location
+    'อาคาร 8': [18.789990, 98.972625],  # IMSU location (same as E-Sport)
+    'อาคาร 9': [18.789990, 98.972625],  # Libir/Research location (same as E-Sport)
+    'สนามกีฬา': [18.791656, 98.971530],  # Tennis, Basketball, Football, etc.
+    'สระว่ายน้ำ': [18.790549, 98.972482]   # Swimming location
+}
+
+# กำหนดชมรมอยู่ที่อาคารไหน (club_name: building_id)
+club_buildings = {
+    # ชมรมช่วงเช้า
+    'บาสเก็ตบอล': { 'lat': 18.791278, 'lng': 98.971319 },
+    'แชร์บอล': { 'lat': 18.791527, 'lng': 98.972063 },
+    'CHORUS': { 'lat': 18.792078, 'lng': 98.971493 },
+    'DEVIL': { 'lat': 18.790902, 'lng': 98.972707 },
+    'ฟุตบอล': { 'lat': 18.789815, 'lng': 98.971550 },
+    'เทนนิส': { 'lat': 18.791656, 'lng': 98.971530 },  
+    'ดนตรีไทย': { 'lat': 18.790943, 'lng': 98.971439 },
+    'วิ่ง': { 'lat': 18.789815, 'lng': 98.971550 },
+    'วอลเลย์บอล': { 'lat': 18.791283, 'lng': 98.971479 },
+    'MUAN': { 'lat': 18.789980, 'lng': 98.973104 },
+    'ART': { 'lat': 18.789980, 'lng': 98.973104 },
+    'เปตอง': { 'lat': 18.789815, 'lng': 98.971550 },    
+    'Swimming (ชมรมว่ายน้ำและโปโลน้ำ)': { 'lat': 18.790549, 'lng': 98.972482 },
+    'Swimming': { 'lat': 18.790549, 'lng': 98.972482 },  # ชื่อที่ใช้ในไฟล์ความต้องการ (test_250.csv)
+    # ชมรมช่วงบ่าย
+    'Bridge': { 'lat': 18.790933, 'lng': 98.972240 },
+    'E-sport': { 'lat': 18.789990, 'lng': 98.972625 },
+    'IMSU': { 'lat': 18.789990, 'lng': 98.972625 },
+    'Libir': { 'lat': 18.789990, 'lng': 98.972625 },
+    'MCCC': { 'lat': 18.789990, 'lng': 98.972625 }, 
+    'พอช.': { 'lat': 18.789980, 'lng': 98.973104 },
+    'Research': { 'lat': 18.789990, 'lng': 98.972625 },
+    'หมอน้อย': { 'lat': 18.789980, 'lng': 98.973104 },
+    'ปิงปอง': { 'lat': 18.791527, 'lng': 98.972063 },
+    'แบตมินตัน': { 'lat': 18.791527, 'lng': 98.972063 },
+    'ดนตรีสากล': { 'lat': 18.790943, 'lng': 98.971439 },
+    'cheerleader': { 'lat': 18.790549, 'lng': 98.972482 },
+    'CMSO': { 'lat': 18.790257, 'lng': 98.972933 },
+    'coverdance': { 'lat': 18.790902, 'lng': 98.972707 },
+}
+
+# คำนวณระยะทางระหว่างสองอาคาร
+def calculate_distance(building1, building2):
+    """
+    คำนวณระยะทางระหว่างสองตำแหน่งโดยใช้ Haversine formula (สำหรับคำนวณระยะทางบนพื้นผิวโลก)
+    ผลลัพธ์เป็นระยะทางในหน่วยกิโลเมตร
+    สามารถรับ parameter ได้ทั้งชื่ออาคารหรือ dict ที่มี keys 'lat' และ 'lng'
+    """
+    # กรณีที่รับชื่ออาคารมา
+    if isinstance(building1, str) and isinstance(building2, str):
+        if building1 not in building_locations or building2 not in building_locations:
+            return UNKNOWN_DISTANCE  # ถ้าไม่พบอาคาร ให้ถือว่าระยะทางเป็นอนันต์
+        
+        lat1, lon1 = building_locations[building1]
+        lat2, lon2 = building_locations[building2]
+    # กรณีที่รับ dict ที่มี keys 'lat' และ 'lng' มา
+    elif isinstance(building1, dict) and isinstance(building2, dict):
+        lat1 = building1['lat']
+        lon1 = building1['lng']
+        lat2 = building2['lat']
+        lon2 = building2['lng']
+    else:
+        return UNKNOWN_DISTANCE  # ถ้าข้อมูลไม่ถูกต้อง ให้ถือว่าระยะทางเป็นอนันต์
+    
+    # แปลงเป็นเรเดียน
+    lat1 = math.radians(lat1)
+    lon1 = math.radians(lon1)
+    lat2 = math.radians(lat2)
+    lon2 = math.radians(lon2)
+    
+    # Haversine formula
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    r = 6371  # รัศมีของโลกในกิโลเมตร
+    
+    return c * r  # ระยะทางในหน่วยกิโลเมตร
+
+class ClubDistanceMatrix:
+    """
+    ระยะทางระหว่างทุกคู่ชมรม (กิโลเมตร) คำนวณด้วย calculate_distance ครั้งเดียวต่อคู่ (ตามลำดับ club1, club2
+    จึงได้ค่าเดียวกับการคำนวณทีละครั้งทุกบิต) เก็บใน NumPy matrix ที่ใช้เลขประจำชมรม (index) เป็นตำแหน่ง
+    ชมรมที่ไม่มีพิกัดมีระยะทางเป็นอนันต์ และ rows เก็บ matrix ในรูป list ของ float เพื่อให้ค้นค่าทีละคู่ได้เร็ว
+    """
+
+    def __init__(self, locations):
+        self.names = list(locations)
+        self.index = {club: code for code, club in enumerate(self.names)}
+        self.matrix = np.array([[calculate_distance(locations[club1], locations[club2]) for club2 in self.names]
+                                for club1 in self.names], dtype=np.float64).reshape(len(self.names), len(self.names))
+        self.rows = self.matrix.tolist()
+    
+    def code(self, club):
+        """
+        เลขประจำชมรม (-1 ถ้าไม่มีพิกัด เช่นช่วงเวลาที่ว่าง)
+        """
+        return self.index.get(club, -1)
+    
+    def codes(self, clubs):
+        """
+        เลขประจำชมรมของทุกชมรมใน clubs เป็น NumPy array (-1 สำหรับชมรมที่ไม่มีพิกัด)
+        """
+        return np.array([self.index.get(club, -1) for club in clubs], dtype=np.int64)
+    
+    def distance(self, club1, club2):
+        """
+        ระยะทางระหว่างสองชมรม (อนันต์ถ้าไม่พบชมรมใดชมรมหนึ่ง)
+        """
+        code1 = self.index.get(club1)
+        code2 = self.index.get(club2)
+        if code1 is None or code2 is None:
+            return UNKNOWN_DISTANCE
+        return self.rows[code1][code2]
+    
+    def lookup(self, codes1, codes2):
+        """
+        ระยะทางของหลายคู่พร้อมกันจาก array ของเลขประจำชมรม (อนันต์เมื่อเลขใดเลขหนึ่งเป็น -1)
+        """
+        codes1 = np.asarray(codes1)
+        codes2 = np.asarray(codes2)
+        known = (codes1 >= 0) & (codes2 >= 0)
+        return np.where(known, self.matrix[np.where(known, codes1, 0), np.where(known, codes2, 0)], UNKNOWN_DISTANCE)
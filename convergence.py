@@ -0,0 +1,54 @@
+#เก็บลำดับค่าของรอบการปรับปรุง (convergence trace) ของ adjust_assignments และ Pathoptimize.perform_swaps
+#แต่ละแถวคือหนึ่งรอบ: เวลาที่ผ่านไป ค่าเป้าหมาย (ความพึงพอใจรวมหรือระยะทางรวม) จำนวนที่ผิดเงื่อนไข และจำนวนตัวเลือกที่ประเมิน
+#บันทึกเป็น CSV หรือ JSON เพื่อเลือก max_swaps / งบเวลาจากข้อมูล และดูว่าการปรับปรุงหยุดดีขึ้นตั้งแต่รอบใด
+import json
+import os
+import time
+
+import pandas as pd
+
+TRACE_FORMATS = {'.csv': 'csv', '.json': 'json'}  # นามสกุลไฟล์ -> รูปแบบ (นามสกุลอื่นถือเป็น CSV)
+
+class ConvergenceTrace:
+    """
+    ลำดับค่าของรอบการปรับปรุงหนึ่งลูป (loop เช่น 'adjust_assignments') ที่มีค่าเป้าหมายชื่อ objective
+    ('satisfaction' หรือ 'distance') เวลาของแต่ละแถวนับจากแถวแรก (รอบที่ 0 = ก่อนเริ่มปรับปรุง)
+    """
+
+    def __init__(self, loop, objective):
+        self.loop = loop
+        self.objective = objective
+        self.rows = []
+        self.start = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, iteration, objective, candidates=0, **values):
+        """
+        เพิ่มรอบที่ iteration ด้วยค่าเป้าหมาย objective จำนวนตัวเลือกที่ประเมินในรอบนี้ candidates
+        และค่าอื่นๆ ของลูป (เช่น over_limit, missing_groups, moves, benefit)
+        """
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        self.rows.append({'iteration': iteration, 'seconds': round(now - self.start, 6), 'objective': objective,
+                          **values, 'candidates': candidates})
+
+    def to_frame(self):
+        """
+        DataFrame ของทุกรอบ (หนึ่งแถวต่อรอบ)
+        """
+        return pd.DataFrame(self.rows)
+
+    def save(self, output_file):
+        """
+        บันทึกเป็น CSV หรือ JSON ตามนามสกุลของ output_file
+        """
+        if TRACE_FORMATS.get(os.path.splitext(output_file)[1].lower(), 'csv') == 'json':
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump({'loop': self.loop, 'objective': self.objective, 'rows': self.rows}, f, indent=2)
+        else:
+            self.to_frame().to_csv(output_file, index=False, encoding='utf-8-sig')
+        print(f"Convergence trace ({len(self.rows)} iterations of {self.loop}) saved to {output_file}")
+        return output_file
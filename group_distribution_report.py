@@ -2,6 +2,8 @@ import sys
 import pandas as pd
 from collections import defaultdict, Counter
 
+from result_io import read_results
+
 # ตั้งค่าเพื่อให้แสดงผลภาษาไทยใน terminal ได้
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
@@ -11,12 +13,10 @@ NUM_GROUPS = 10
 
 def load_assignments(file_path):
     """
-    โหลดข้อมูลการจัดสรรชมรมจากไฟล์ CSV
+    โหลดข้อมูลการจัดสรรชมรมจากไฟล์ผลการจัดสรร (CSV / Parquet / Feather)
+    แถวหัวกลุ่มของไฟล์ CSV ถูกตัดออกใน read_results แล้ว
     """
-    df = pd.read_csv(file_path, encoding='utf-8-sig')
-    # กรองเฉพาะแถวที่เป็นข้อมูลนักศึกษาจริง (ไม่ใช่แถวหัวกลุ่ม)
-    df = df[~df['รหัสนักศึกษา'].astype(str).str.contains('กลุ่ม')]
-    return df
+    return read_results(file_path)
 
 def analyze_club_distribution(df):
     """
@@ -0,0 +1,336 @@
+#แก้ไขผลการจัดสรรครั้งก่อนตามไฟล์ delta (เพิ่ม/ลบ/เปลี่ยนความต้องการของนักศึกษา) แทนการจัดสรรใหม่ทั้งหมด
+#โดยย้ายนักศึกษาเดิมให้น้อยที่สุด และแก้ไขเฉพาะชมรมที่ได้รับผลกระทบ
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from student_store import StudentStore, NO_CLUB, NO_RANK, PERIOD_INDEX
+from allocation_core import (NUM_SLOTS_PER_PERIOD, PERIODS, assign_club, assign_groups, build_rank_scores,
+                             calculate_move_delta, calculate_satisfaction_score, get_all_clubs, initialize_time_slots,
+                             move_student, read_data, unassign_club)
+from result_io import read_results
+from allocation_log import RepairLog
+from profiling import profiled, record
+
+DELTA_ACTION_COLUMN = 'การดำเนินการ'  # คอลัมน์ในไฟล์ delta ที่ระบุการเปลี่ยนแปลงของนักศึกษาแต่ละคน
+DELTA_ACTIONS = ('add', 'remove', 'change')  # เพิ่มนักศึกษาใหม่ / ลบนักศึกษา / เปลี่ยนความต้องการ
+
+def read_previous_results(file_path):
+    """
+    อ่านผลการจัดสรรครั้งก่อน (ไฟล์จาก save_results ทุกรูปแบบ) โดยตัดแถวหัวกลุ่มออก
+    """
+    print(f"Reading data from {file_path}...")
+    return assign_groups(read_results(file_path))
+
+def restore_assignments(students, df, clubs):
+    """
+    นำการจัดสรรและจำนวนการเปลี่ยนแปลงจากผลครั้งก่อน (df) กลับมาใส่ใน StudentStore ที่สร้างจาก df (แถวตรงกัน)
+    แปลงทั้งคอลัมน์ในครั้งเดียวแล้วเพิ่มสมาชิกทีละชมรม คืนค่า TimeSlotIndex
+    """
+    time_slots = initialize_time_slots(clubs)
+    student_ids = np.array(students.student_ids, dtype=object)
+    groups = np.array(students.group_labels, dtype=object)[students.groups]
+    for period in PERIODS:
+        period_display = "เช้า" if period == "morning" else "บ่าย"
+        p = PERIOD_INDEX[period]
+        columns = [f'ชมรม{period_display} ช่วงที่ {slot}' for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)]
+        present = [column for column in columns if column in df.columns]
+        # ช่องว่าง ("") ในไฟล์คือไม่มีชมรม
+        students.assignments[:, p] = students.codec.encode_columns(df[present].replace("", np.nan), columns)
+        
+        for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+            codes = students.assignments[:, p, slot - 1]
+            order = np.argsort(codes, kind='stable')  # คงลำดับแถวเดิมภายในชมรม
+            values, starts = np.unique(codes[order], return_index=True)
+            for code, start, stop in zip(values.tolist(), starts.tolist(), starts[1:].tolist() + [len(order)]):
+                if code != NO_CLUB:
+                    rows = order[start:stop]
+                    time_slots.add_members(period, slot, students.codec.names[code],
+                                           student_ids[rows].tolist(), groups[rows].tolist())
+        
+        column = f'การเปลี่ยนแปลงชมรม{period_display}'
+        if column in df.columns:
+            students.changes[:, p] = df[column].fillna(0).astype(int).to_numpy()
+    return time_slots
+
+def release_period(students, time_slots, student_id, period):
+    """
+    นำนักศึกษาออกจากทุกชมรมในคาบหนึ่ง คืนค่ารายการ (คาบ, ช่วงเวลา, ชมรม) ที่ได้รับผลกระทบ
+    """
+    student = students[student_id]
+    cells = []
+    for slot in list(student['assignments'][period]):
+        club = unassign_club(student, period, slot)
+        time_slots.remove(student_id, period, slot, club)
+        cells.append((period, slot, club))
+    return cells
+
+def place_student(students, time_slots, clubs, student_id, period):
+    """
+    จัดชมรมให้นักศึกษาที่ยังไม่มีการจัดสรรในคาบหนึ่ง โดยไม่ย้ายใคร: แต่ละช่วงเวลาเลือกชมรมที่ได้คะแนนสูงสุด
+    ในบรรดาชมรมที่ยังไม่เต็ม (ถ้าเต็มทุกชมรมจะใช้ชมรมที่ได้คะแนนสูงสุดแล้วให้ repair_cells แก้ไข)
+    คืนค่ารายการ (คาบ, ช่วงเวลา, ชมรม) ที่ได้รับผลกระทบ
+    """
+    student = students[student_id]
+    cells = []
+    for slot in range(1, min(len(student['preferences'][period]['main']), NUM_SLOTS_PER_PERIOD) + 1):
+        held = set(student['assignments'][period].values())
+        options = [club for club in clubs[period] if club not in held]
+        open_clubs = [club for club in options if time_slots.size(period, slot, club) < time_slots.capacity]
+        club = max(open_clubs or options, key=lambda club: calculate_satisfaction_score(student, club, period, slot))
+        assign_club(student, period, slot, club)
+        time_slots.add(student_id, student['group'], period, slot, club)
+        cells.append((period, slot, club))
+    return cells
+
+def find_incremental_representative(students, time_slots, clubs, period, slot, club, group, movable, arrivals=None):
+    """
+    หานักศึกษากลุ่ม group ในช่วงเวลาเดียวกันที่จะย้ายเข้าชมรมเพื่อเป็นตัวแทนกลุ่ม โดยไม่ทำให้ชมรมเดิมขาดตัวแทน
+    เลือกจากนักศึกษาใน delta (movable) ก่อน แล้วจึงเป็นนักศึกษาเดิมที่เสียคะแนนน้อยที่สุด (find_store_representative)
+    arrivals: รหัสนักศึกษา -> ลำดับการเข้าชมรมของคนที่ถูกย้ายระหว่าง repair_cells
+    คืนค่า (รหัสนักศึกษา, ชมรมเดิม) หรือ None
+    """
+    best = None
+    best_delta = None
+    # นักศึกษาใน delta มีจำนวนน้อย จึงตรวจก่อนโดยไม่ต้องค้นทั้ง StudentStore
+    for student_id in movable:
+        student = students[student_id]
+        old_club = student['assignments'][period].get(slot)
+        if (old_club is None or old_club == club or student['group'] != group
+                or time_slots.group_count(period, slot, old_club, group) <= 1
+                or club in student['assignments'][period].values()):
+            continue
+        delta = calculate_move_delta(student, period, slot, club)
+        if best is None or delta > best_delta:
+            best = (student_id, old_club)
+            best_delta = delta
+    if best is not None:
+        return best
+    return find_store_representative(students, time_slots, clubs, period, slot, club, group, arrivals or {})
+
+def find_store_representative(store, time_slots, clubs, period, slot, club, group, arrivals):
+    """
+    หานักศึกษาเดิมที่จะย้ายเข้าชมรมเป็นตัวแทนกลุ่ม จาก array ของ StudentStore ในครั้งเดียว แทนการไล่สมาชิกทุกชมรม
+    ผลต่างคะแนนของคนที่ไม่ได้ชมรมเดิมซ้ำคำนวณจาก rank_table โดยตรง (เท่ากับ calculate_move_delta)
+    ส่วนคนที่ได้ชมรมเดิมซ้ำหลายช่วงเวลาใช้ calculate_move_delta ทีละคน
+    คะแนนเท่ากันเลือกตามลำดับชมรมใน clubs แล้วตามลำดับการเข้าชมรม (ลำดับแถว หรือ arrivals ของคนที่ถูกย้าย)
+    คืนค่า (รหัสนักศึกษา, ชมรมเดิม) หรือ None
+    """
+    if group not in store.group_labels:
+        return None
+    p = PERIOD_INDEX[period]
+    codes = store.codec.codes
+    code = codes.get(club)
+    
+    # ลำดับของชมรมเดิมใน clubs เฉพาะชมรมที่มีสมาชิกกลุ่มนี้มากกว่าหนึ่งคน (ช่องสุดท้ายสำหรับ NO_CLUB เป็น -1)
+    positions = np.full(len(store.codec) + 1, -1)
+    for index, old_club in enumerate(clubs[period]):
+        if (old_club != club and old_club in codes
+                and time_slots.group_count(period, slot, old_club, group) > 1):
+            positions[codes[old_club]] = index
+    
+    held = store.assignments[:, p]
+    eligible = (store.groups == store.group_labels.index(group)) & (positions[held[:, slot - 1]] >= 0)
+    if code is not None:
+        eligible &= (held != code).all(axis=1)
+    rows = np.flatnonzero(eligible)
+    if not len(rows):
+        return None
+    held = held[rows]
+    old = held[:, slot - 1]
+    
+    # คะแนนตามอันดับ (0 ถ้าไม่อยู่ในรายการความชอบ) และโบนัสช่วงเวลาตรงอันดับ ของชมรมใหม่และชมรมเดิม
+    table = store.rank_table
+    def rank(club_codes):
+        known = club_codes < table.shape[2]
+        scores = table[rows, p, np.where(known, club_codes, 0)].astype(np.int64)
+        return np.where(known & (scores != NO_RANK), scores, 0)
+    wanted = store.main[rows, p, slot - 1]
+    gain = (rank(np.full(len(rows), code)) + 500 * (wanted == code)) if code is not None else 0
+    deltas = gain - rank(old) - 500 * (wanted == old)
+    for index in np.flatnonzero((held == old[:, None]).sum(axis=1) > 1).tolist():
+        deltas[index] = calculate_move_delta(store[store.student_ids[rows[index]]], period, slot, club)
+    
+    order = rows.copy()
+    for student_id, arrival in arrivals.items():
+        index = np.searchsorted(rows, store.rows[student_id])
+        if index < len(rows) and rows[index] == store.rows[student_id]:
+            order[index] = arrival
+    best = np.lexsort((order, positions[old], -deltas))[0]
+    return store.student_ids[rows[best]], store.codec.names[old[best]]
+
+def find_incremental_eviction(students, time_slots, clubs, period, slot, club, movable):
+    """
+    หานักศึกษาที่จะย้ายออกจากชมรมที่เกินขีดจำกัดไปชมรมที่ยังไม่เต็ม โดยไม่ทำให้ชมรมขาดตัวแทนกลุ่ม
+    เลือกนักศึกษาใน delta (movable) ก่อน แล้วจึงเป็นคนที่เสียคะแนนน้อยที่สุด คืนค่า (รหัสนักศึกษา, ชมรมใหม่) หรือ None
+    """
+    open_clubs = [other for other in clubs[period]
+                  if other != club and time_slots.size(period, slot, other) < time_slots.capacity]
+    best = None
+    best_key = None
+    for student_id, group in time_slots[period][slot][club].items():
+        if time_slots.group_count(period, slot, club, group) <= 1:
+            continue
+        student = students[student_id]
+        for new_club in open_clubs:
+            if new_club in student['assignments'][period].values():
+                continue
+            key = (student_id not in movable, -calculate_move_delta(student, period, slot, new_club))
+            if best is None or key < best_key:
+                best = (student_id, new_club)
+                best_key = key
+    return best
+
+def repair_cells(students, time_slots, clubs, affected, movable, previous_sizes):
+    """
+    แก้ไขการแทนกลุ่มและจำนวนที่เกินขีดจำกัด เฉพาะ (คาบ, ช่วงเวลา, ชมรม) ที่ได้รับผลกระทบจาก delta
+    โดยย้ายนักศึกษาใน delta (movable) ก่อนนักศึกษาเดิม
+    affected: (คาบ, ช่วงเวลา, ชมรม) -> กลุ่มของนักศึกษาที่ออกจากชมรมนั้น ตรวจการแทนกลุ่มเฉพาะกลุ่มเหล่านี้
+    และลดจำนวนไม่ให้เกินขีดจำกัดหรือขนาดเดิมก่อน delta (previous_sizes) ปัญหาที่มีอยู่แล้วในผลครั้งก่อน
+    จึงไม่ถูกแก้ เพื่อไม่ให้ย้ายนักศึกษาเดิมโดยไม่จำเป็น (students เป็น StudentStore)
+    คืนค่า (จำนวนการย้าย, ชุดรหัสนักศึกษาเดิมที่ถูกย้าย)
+    """
+    moves = 0
+    moved_existing = set()
+    arrivals = {}  # ลำดับการเข้าชมรมของคนที่ถูกย้าย (ต่อจากลำดับแถวของ StudentStore)
+    log = RepairLog()
+    
+    def move(student_id, period, slot, old_club, new_club, reason):
+        nonlocal moves
+        move_student(students, time_slots, student_id, period, slot, new_club)
+        arrivals[student_id] = len(students) + moves
+        moves += 1
+        if student_id not in movable:
+            moved_existing.add(student_id)
+        log.move(period, slot, reason, student_id, old_club, new_club)
+    
+    for (period, slot, club), lost_groups in affected.items():
+        # จัดการปัญหาการแทนกลุ่มก่อน (ย้ายตัวแทนเข้ามา ถ้าชมรมเต็มจะย้ายคนอื่นออกในขั้นถัดไป)
+        for missing_group in time_slots.missing_groups(period, slot, club):
+            if missing_group not in lost_groups:
+                continue
+            candidate = find_incremental_representative(students, time_slots, clubs, period, slot, club,
+                                                        missing_group, movable, arrivals)
+            if candidate is None:
+                log.warning(period, slot, 'unrepresented', club, time_slots.size(period, slot, club))
+                continue
+            student_id, old_club = candidate
+            move(student_id, period, slot, old_club, club, 'representation')
+        
+        # จัดการปัญหาจำนวนเกิน
+        limit = max(time_slots.capacity, previous_sizes[period][slot][club])
+        while time_slots.size(period, slot, club) > limit:
+            candidate = find_incremental_eviction(students, time_slots, clubs, period, slot, club, movable)
+            if candidate is None:
+                log.warning(period, slot, 'over_limit', club, time_slots.size(period, slot, club))
+                break
+            student_id, new_club = candidate
+            move(student_id, period, slot, club, new_club, 'overcrowding')
+    
+    log.report("Incremental repair moves")
+    return moves, moved_existing
+
+@profiled
+def reallocate_incremental(previous_file, delta_file):
+    """
+    จัดสรรเพิ่มเติมจากผลการจัดสรรครั้งก่อน (previous_file จาก save_results) แทนการจัดสรรใหม่ทั้งหมด
+    delta_file มีคอลัมน์เหมือนไฟล์ข้อมูลนำเข้า และคอลัมน์ DELTA_ACTION_COLUMN ระบุ add / remove / change
+    นักศึกษาใหม่และคาบที่เปลี่ยนความต้องการจะถูกจัดลงชมรมที่ยังว่าง แล้วแก้ไขเฉพาะชมรมที่ได้รับผลกระทบ
+    โดยย้ายนักศึกษาเดิมให้น้อยที่สุด ผลเดิมถูกอ่านเป็น StudentStore ทั้งคอลัมน์ในครั้งเดียว ส่วนที่วนทีละคน
+    มีเฉพาะนักศึกษาใน delta (ใช้เวลาตามขนาดของ delta ยกเว้นการอ่านไฟล์และงาน NumPy ทั้ง array) คืนค่า StudentStore
+    """
+    previous = read_previous_results(previous_file)
+    delta = assign_groups(read_data(delta_file))
+    if DELTA_ACTION_COLUMN not in delta.columns:
+        raise ValueError(f"Delta file {delta_file} has no '{DELTA_ACTION_COLUMN}' column")
+    actions = delta[DELTA_ACTION_COLUMN].astype(str).str.strip().str.lower()
+    unknown = sorted(set(actions) - set(DELTA_ACTIONS))
+    if unknown:
+        raise ValueError(f"Unknown delta actions: {', '.join(unknown)} (expected one of {', '.join(DELTA_ACTIONS)})")
+    
+    # ชมรมทั้งหมดจากผลครั้งก่อนรวมกับ delta (ชมรมที่ไม่มีใครเลือกแล้วยังคงอยู่ เพื่อให้ผลเดิมใช้ได้)
+    clubs = get_all_clubs(pd.concat([previous, delta], ignore_index=True))
+    
+    # นักศึกษาเดิมและนักศึกษาใหม่ใน delta อยู่ใน StudentStore เดียวที่สร้างทั้งคอลัมน์ในครั้งเดียว (ไม่วนทีละแถว)
+    # นักศึกษาใหม่ยังไม่อยู่ในผล (absent) จนกว่าจะถูกเพิ่ม ส่วนนักศึกษาที่ถูกลบถูกตัดออกตอนท้าย
+    delta_ids = delta['รหัสนักศึกษา'].astype(str)
+    new_rows = delta[(actions != 'remove').to_numpy() & ~delta_ids.isin(previous['รหัสนักศึกษา'].astype(str)).to_numpy()]
+    new_rows = new_rows[~new_rows['รหัสนักศึกษา'].astype(str).duplicated().to_numpy()]
+    combined = pd.concat([previous, new_rows], ignore_index=True)
+    students = StudentStore.from_preferences(combined, rank_scorer=build_rank_scores)
+    time_slots = restore_assignments(students, combined, clubs)
+    absent = set(new_rows['รหัสนักศึกษา'].astype(str))
+    previous_sizes = {period: {slot: {club: len(members) for club, members in slot_clubs.items()}
+                               for slot, slot_clubs in time_slots[period].items()}
+                      for period in PERIODS}
+    delta_main, delta_backup = students.encode_preferences(delta)
+    
+    print("Applying changes to the previous allocation...")
+    start = time.perf_counter()
+    affected = {}  # (คาบ, ช่วงเวลา, ชมรม) -> กลุ่มที่มีนักศึกษาออกจากชมรม
+    
+    def release(student_id, period):
+        group = students[student_id]['group']
+        for cell in release_period(students, time_slots, student_id, period):
+            affected.setdefault(cell, set()).add(group)
+    
+    placements = []
+    action_counts = Counter()
+    for index, (student_id, action) in enumerate(zip(delta_ids, actions)):
+        present = student_id in students and student_id not in absent
+        if action == 'remove':
+            if not present:
+                print(f"WARNING: Student {student_id} is not in the previous results, nothing to remove")
+                continue
+            for period in PERIODS:
+                release(student_id, period)
+            absent.add(student_id)
+            action_counts[action] += 1
+            continue
+        
+        if action == 'add' and present:
+            print(f"WARNING: Student {student_id} is already allocated, treating the addition as a change")
+            action = 'change'
+        elif action == 'change' and not present:
+            print(f"WARNING: Student {student_id} is not in the previous results, treating the change as an addition")
+            action = 'add'
+        action_counts[action] += 1
+        
+        # จัดสรรใหม่เฉพาะคาบที่ความต้องการเปลี่ยน คาบอื่นคงชมรมและจำนวนการเปลี่ยนแปลงเดิมไว้
+        row = students.rows[student_id]
+        periods = list(PERIODS)
+        if present:
+            periods = [period for period, p in PERIOD_INDEX.items()
+                       if not (np.array_equal(students.main[row, p], delta_main[index, p])
+                               and np.array_equal(students.backup[row, p], delta_backup[index, p]))]
+        student = students[student_id]
+        for period in periods:
+            release(student_id, period)
+            student['changes'][period] = 0
+        students.set_preferences([row], delta_main[index:index + 1], delta_backup[index:index + 1])
+        absent.discard(student_id)
+        placements.append((student_id, periods))
+    
+    # จัดนักศึกษาใหม่หลังนำนักศึกษาที่ถูกลบออกแล้ว เพื่อใช้ที่ว่างที่เกิดขึ้น
+    movable = {}  # นักศึกษาใน delta ตามลำดับในไฟล์ (ไม่ใช้ set เพื่อให้ลำดับการตรวจไม่ขึ้นกับ hash ของรหัส)
+    for student_id, periods in placements:
+        if student_id in absent:
+            continue
+        movable[student_id] = True
+        for period in periods:
+            for cell in place_student(students, time_slots, clubs, student_id, period):
+                affected.setdefault(cell, set())
+    
+    moves, moved_existing = repair_cells(students, time_slots, clubs, affected, movable, previous_sizes)
+    
+    print(f"Incremental update: {action_counts['add']} added, {action_counts['remove']} removed, "
+          f"{action_counts['change']} changed")
+    print(f"Repaired {len(affected)} affected club slots with {moves} moves "
+          f"({len(moved_existing)} existing students moved) in {time.perf_counter() - start:.3f} seconds")
+    if absent:
+        students = students.subset([student_id for student_id in students if student_id not in absent])
+    record(students=len(students), moves=moves)
+    
+    return students, time_slots, clubs
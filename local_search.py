@@ -0,0 +1,275 @@
+#ค้นหาเฉพาะที่ (hill climbing ตามด้วย simulated annealing) หลัง adjust_assignments เพื่อเพิ่มความพึงพอใจรวม
+#โดยสลับชมรมระหว่างนักศึกษาสองคนหรือย้ายไปชมรมที่ยังไม่เต็มในช่วงเวลาเดียวกัน
+import math
+import random
+import time
+
+from allocation_core import (NUM_SLOTS_PER_PERIOD, PERIODS, assign_club, calculate_gap, calculate_move_delta,
+                             calculate_period_satisfaction, calculate_satisfaction_upper_bound)
+from profiling import profiled, record
+
+DEFAULT_SEARCH_ITERATIONS = 200000  # งบของการค้นหาเฉพาะที่เมื่อไม่ได้ระบุจำนวนครั้งหรือเวลา
+
+class LocalSearch:
+    """
+    ค้นหาเฉพาะที่หลัง adjust_assignments เพื่อเพิ่มความพึงพอใจรวม โดยไม่ทำให้ชมรมเกินขีดจำกัดหรือเสียตัวแทนกลุ่ม
+    การเปลี่ยนแปลงมีสองแบบภายใน (คาบ, ช่วงเวลา) เดียวกัน:
+    - exchange: นักศึกษาสองคนสลับชมรมกัน (ขนาดชมรมไม่เปลี่ยน)
+    - relocate: ย้ายนักศึกษาไปชมรมที่ยังไม่เต็ม
+    ผลต่างของคะแนน (delta) คำนวณจากคาบของนักศึกษาที่เกี่ยวข้องเท่านั้น (ไม่เกิน 4 ช่วงเวลาต่อคน)
+    """
+
+    def __init__(self, students, time_slots, clubs, periods=PERIODS, seed=0):
+        self.students = students
+        self.time_slots = time_slots
+        self.clubs = clubs
+        self.periods = list(periods)
+        self.rng = random.Random(seed)
+        self.student_ids = list(students)
+        self.gain = 0
+        self.exchanges = 0
+        self.relocations = 0
+        self.original = {}  # (รหัสนักศึกษา, คาบ, ช่วงเวลา) -> ชมรมก่อนการค้นหา (ใช้นับ changes ตอนจบ)
+
+    def _delta(self, student_id, period, slot, new_club):
+        """
+        ผลต่างของคะแนนคาบนี้ของนักศึกษาเมื่อเปลี่ยนชมรมในช่วงเวลา slot เป็น new_club
+        """
+        return calculate_move_delta(self.students[student_id], period, slot, new_club)
+
+    def _can_leave(self, student_id, period, slot, club):
+        """
+        นักศึกษาออกจากชมรมได้ถ้าไม่ใช่คนสุดท้ายของกลุ่มในชมรมนั้น
+        """
+        group = self.students[student_id]['group']
+        return self.time_slots.group_count(period, slot, club, group) > 1
+
+    def exchange_delta(self, period, slot, student_a, student_b):
+        """
+        ผลต่างของคะแนนเมื่อ student_a และ student_b สลับชมรมกัน หรือ None ถ้าสลับไม่ได้
+        """
+        club_a = self.students[student_a]['assignments'][period][slot]
+        club_b = self.students[student_b]['assignments'][period][slot]
+        if club_a == club_b:
+            return None
+        if self.students[student_a]['group'] != self.students[student_b]['group']:
+            if not (self._can_leave(student_a, period, slot, club_a) and self._can_leave(student_b, period, slot, club_b)):
+                return None
+        return self._delta(student_a, period, slot, club_b) + self._delta(student_b, period, slot, club_a)
+
+    def relocate_delta(self, period, slot, student_id, new_club):
+        """
+        ผลต่างของคะแนนเมื่อย้ายนักศึกษาไป new_club หรือ None ถ้าย้ายไม่ได้
+        """
+        club = self.students[student_id]['assignments'][period][slot]
+        if club == new_club or self.time_slots.size(period, slot, new_club) >= self.time_slots.capacity:
+            return None
+        if not self._can_leave(student_id, period, slot, club):
+            return None
+        return self._delta(student_id, period, slot, new_club)
+
+    def _set_club(self, student_id, period, slot, new_club):
+        student = self.students[student_id]
+        old_club = student['assignments'][period][slot]
+        self.original.setdefault((student_id, period, slot), old_club)
+        self.time_slots.move(student_id, period, slot, old_club, new_club)
+        assign_club(student, period, slot, new_club)
+        return old_club
+
+    def apply(self, move, delta):
+        """
+        ทำการเปลี่ยนแปลง move = ('exchange', คาบ, ช่วงเวลา, นักศึกษา a, นักศึกษา b)
+        หรือ ('relocate', คาบ, ช่วงเวลา, นักศึกษา, ชมรมใหม่) คืนค่าการเปลี่ยนแปลงที่ย้อนกลับ
+        """
+        kind, period, slot, first, second = move
+        self.gain += delta
+        if kind == 'exchange':
+            club_a = self._set_club(first, period, slot, self.students[second]['assignments'][period][slot])
+            self._set_club(second, period, slot, club_a)
+            self.exchanges += 1
+            return move
+        old_club = self._set_club(first, period, slot, second)
+        self.relocations += 1
+        return ('relocate', period, slot, first, old_club)
+
+    def candidate_clubs(self, student_id, period):
+        """
+        ชมรมที่นักศึกษาเลือกไว้ (หลักและสำรอง) ในคาบนี้ ซึ่งเป็นชมรมเดียวที่การย้ายเข้าไปจะได้คะแนน
+        """
+        return [club for club in self.students[student_id]['rank_scores'][period] if club in self.time_slots[period][1]]
+
+    def is_satisfied(self, student_id, period, slot):
+        """
+        นักศึกษาได้ชมรมอันดับที่ตรงกับช่วงเวลานี้ (และไม่ซ้ำกับช่วงเวลาอื่น) ซึ่งเป็นคะแนนสูงสุดของช่วงเวลานี้แล้ว
+        """
+        student = self.students[student_id]
+        main = student['preferences'][period]['main']
+        club = student['assignments'][period][slot]
+        return (slot <= len(main) and main[slot-1] == club
+                and list(student['assignments'][period].values()).count(club) == 1)
+
+    def hill_climb(self, budget):
+        """
+        ลองทุกการสลับ/ย้ายไปยังชมรมที่นักศึกษาเลือกไว้ และทำทันทีเมื่อคะแนนเพิ่ม วนจนไม่มีการปรับปรุงหรือหมดงบ
+        """
+        improved = True
+        while improved and not budget.exhausted():
+            improved = False
+            for period in self.periods:
+                for slot in range(1, NUM_SLOTS_PER_PERIOD + 1):
+                    for student_id in self.student_ids:
+                        if slot not in self.students[student_id]['assignments'][period]:
+                            continue
+                        # คนที่ได้ชมรมตรงอันดับของช่วงเวลานี้อยู่แล้วไม่มีทางดีขึ้น การสลับที่ช่วยคู่สลับจะพบจากฝั่งคู่สลับเอง
+                        if self.is_satisfied(student_id, period, slot):
+                            continue
+                        for club in self.candidate_clubs(student_id, period):
+                            if budget.exhausted():
+                                return
+                            budget.iterations += 1
+                            move = ('relocate', period, slot, student_id, club)
+                            delta = self.relocate_delta(period, slot, student_id, club)
+                            if delta is None or delta <= 0:
+                                move, delta = None, 0
+                                for other_id in list(self.time_slots[period][slot][club]):
+                                    budget.iterations += 1
+                                    exchange_delta = self.exchange_delta(period, slot, student_id, other_id)
+                                    if exchange_delta is not None and exchange_delta > 0:
+                                        move, delta = ('exchange', period, slot, student_id, other_id), exchange_delta
+                                        break
+                            if move is not None:
+                                self.apply(move, delta)
+                                improved = True
+                                break
+
+    def anneal(self, budget, start_temperature=200.0, end_temperature=1.0):
+        """
+        Simulated annealing ด้วยงบที่เหลือ: สุ่มการสลับ/ย้าย รับการเปลี่ยนแปลงที่แย่ลงด้วยความน่าจะเป็น exp(delta / T)
+        เมื่อจบจะย้อนกลับไปยังคำตอบที่ดีที่สุดที่เคยพบ (คะแนนจึงไม่ต่ำกว่าก่อนเริ่ม)
+        """
+        best_gain = self.gain
+        since_best = []
+        while not budget.exhausted():
+            budget.iterations += 1
+            period = self.rng.choice(self.periods)
+            slot = self.rng.randint(1, NUM_SLOTS_PER_PERIOD)
+            student_id = self.rng.choice(self.student_ids)
+            if slot not in self.students[student_id]['assignments'][period]:
+                continue
+            choices = self.candidate_clubs(student_id, period)
+            if not choices:
+                continue
+            club = self.rng.choice(choices)
+            
+            delta = self.relocate_delta(period, slot, student_id, club)
+            move = ('relocate', period, slot, student_id, club)
+            if delta is None:
+                members = self.time_slots[period][slot][club]
+                if not members:
+                    continue
+                other_id = self.rng.choice(list(members))
+                delta = self.exchange_delta(period, slot, student_id, other_id)
+                move = ('exchange', period, slot, student_id, other_id)
+                if delta is None:
+                    continue
+            
+            temperature = start_temperature * (end_temperature / start_temperature) ** budget.progress()
+            if delta >= 0 or self.rng.random() < math.exp(delta / temperature):
+                since_best.append((self.apply(move, delta), delta))
+                if self.gain > best_gain:
+                    best_gain = self.gain
+                    since_best = []
+        
+        # ย้อนกลับการเปลี่ยนแปลงหลังจากคำตอบที่ดีที่สุด
+        for move, delta in reversed(since_best):
+            self.apply(move, -delta)
+            if move[0] == 'exchange':
+                self.exchanges -= 2
+            else:
+                self.relocations -= 2
+
+    def finish(self):
+        """
+        นับจำนวนการเปลี่ยนแปลงของนักศึกษาจากช่วงเวลาที่ชมรมต่างจากก่อนการค้นหา (ไม่นับการเปลี่ยนไปมา)
+        """
+        for (student_id, period, slot), club in self.original.items():
+            if self.students[student_id]['assignments'][period][slot] != club:
+                self.students[student_id]['changes'][period] += 1
+
+class SearchBudget:
+    """
+    งบของการค้นหาเฉพาะที่: จำนวนครั้งที่ประเมินการเปลี่ยนแปลง (max_iterations) และ/หรือเวลา (time_limit วินาที)
+    หรือหยุดเมื่อ stop() เป็นจริง
+    """
+
+    def __init__(self, max_iterations=None, time_limit=None, stop=None):
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        self.stop = stop  # ฟังก์ชันที่คืนค่า True เมื่อควรหยุดก่อนหมดงบ (เช่น ถึง gap เป้าหมายแล้ว)
+        self.iterations = 0
+        self.start = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def progress(self):
+        """
+        สัดส่วนของงบที่ใช้ไปแล้ว (0-1) ใช้กำหนดอุณหภูมิของ simulated annealing
+        """
+        used = 0.0
+        if self.max_iterations:
+            used = self.iterations / self.max_iterations
+        if self.time_limit:
+            used = max(used, self.elapsed() / self.time_limit)
+        return min(used, 1.0)
+
+    def exhausted(self):
+        if self.stop is not None and self.stop():
+            return True
+        if self.max_iterations is not None and self.iterations >= self.max_iterations:
+            return True
+        return self.time_limit is not None and self.elapsed() >= self.time_limit
+
+@profiled
+def improve_assignments(students, time_slots, clubs, max_iterations=None, time_limit=None, seed=0, periods=PERIODS,
+                        target_gap=None, upper_bound=None):
+    """
+    ขั้นตอนค้นหาเฉพาะที่หลัง adjust_assignments: hill climbing ด้วยการสลับ/ย้าย แล้วตามด้วย simulated annealing
+    ในงบที่เหลือ ถ้าไม่ระบุงบเลยจะใช้ DEFAULT_SEARCH_ITERATIONS ครั้ง
+    target_gap หยุดทันทีเมื่อระยะห่างจากขอบเขตบน (calculate_satisfaction_upper_bound หรือ upper_bound
+    ที่คำนวณไว้แล้ว) ไม่เกินค่านี้ คืนค่าสรุปผล (dict)
+    """
+    if max_iterations is None and time_limit is None:
+        max_iterations = DEFAULT_SEARCH_ITERATIONS
+    
+    print("Improving assignments with local search...")
+    search = LocalSearch(students, time_slots, clubs, periods, seed)
+    stop = None
+    if target_gap is not None:
+        if upper_bound is None:
+            upper_bound = calculate_satisfaction_upper_bound(students, periods)
+        start_total = sum(calculate_period_satisfaction(student, period)
+                          for student in students.values() for period in periods)
+        stop = lambda: calculate_gap(start_total + search.gain, upper_bound) <= target_gap
+    budget = SearchBudget(max_iterations, time_limit, stop)
+    search.hill_climb(budget)
+    search.anneal(budget)
+    search.finish()
+    if stop is not None and stop():
+        print(f"Local search reached the target gap of {target_gap * 100:.2f}%")
+    
+    elapsed = budget.elapsed()
+    summary = {
+        'gain': search.gain,
+        'exchanges': search.exchanges,
+        'relocations': search.relocations,
+        'iterations': budget.iterations,
+        'seconds': elapsed,
+        'gain_per_second': search.gain / elapsed if elapsed > 0 else 0.0
+    }
+    print(f"Local search: {summary['exchanges']} exchanges, {summary['relocations']} relocations, "
+          f"{summary['iterations']} moves evaluated in {elapsed:.2f} seconds")
+    print(f"Local search gain: +{search.gain} total satisfaction "
+          f"(+{search.gain / len(students) if students else 0:.2f} per student, {summary['gain_per_second']:.1f} per second)")
+    record(moves_evaluated=summary['iterations'], exchanges=summary['exchanges'], relocations=summary['relocations'])
+    return summary
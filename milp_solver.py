@@ -0,0 +1,178 @@
+#จัดสรรแต่ละคาบแบบหาคำตอบที่ดีที่สุดด้วย MILP (HiGHS ผ่าน SciPy) และขอบเขตบนจาก LP relaxation ของปัญหาเดียวกัน
+import time
+
+import numpy as np
+
+try:
+    # ตัวแก้ปัญหา MILP (HiGHS ผ่าน SciPy) ใช้เฉพาะเมื่อเลือก solver='milp' หรือ bound='lp'
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    from scipy.sparse import coo_matrix
+except ImportError:
+    milp = None
+
+from allocation_core import MAX_STUDENTS_PER_CLUB, PERIODS, SatisfactionTensor, assign_club, initialize_time_slots
+from profiling import profiled
+
+def solve_period_milp(students, clubs, period, time_limit=None, mip_rel_gap=1e-3, relax=False):
+    """
+    จัดสรรชมรมในคาบเดียวแบบหาคำตอบที่ดีที่สุดด้วย MILP (HiGHS)
+    
+    ตัวแปร x[s, c, t] = 1 เมื่อนักศึกษา s ได้ชมรม c ในช่วงเวลา t (เฉพาะช่วงเวลาที่มีความต้องการหลัก)
+    เงื่อนไข:
+        - ทุกนักศึกษาได้หนึ่งชมรมในแต่ละช่วงเวลา
+        - นักศึกษาได้แต่ละชมรมไม่เกินหนึ่งครั้ง
+        - แต่ละ (ช่วงเวลา, ชมรม) มีสมาชิกไม่เกิน MAX_STUDENTS_PER_CLUB
+        - แต่ละ (ช่วงเวลา, ชมรม) มีสมาชิกจากทุกกลุ่มอย่างน้อยหนึ่งคน
+    เป้าหมายคือคะแนนความพึงพอใจรวมสูงสุดตาม calculate_satisfaction_score
+    เวลาที่ใช้เพิ่มขึ้นเร็วตามจำนวนนักศึกษา จึงควรกำหนด time_limit สำหรับข้อมูลขนาดใหญ่
+    (HiGHS จะคืนคำตอบที่ดีที่สุดที่หาได้พร้อมค่า gap เทียบกับขอบเขตบน)
+    relax=True แก้ LP relaxation (ไม่บังคับให้ตัวแปรเป็นจำนวนเต็ม) ใช้เป็นขอบเขตบน โดยคืนเฉพาะ info['objective']
+    คืนค่า (รายการ (แถวนักศึกษา, ช่วงเวลา, คอลัมน์ชมรม), ข้อมูลสรุปการแก้ปัญหา) หรือ (None, ข้อมูลสรุป) ถ้าหาคำตอบไม่ได้
+    """
+    tensor = SatisfactionTensor(students, clubs)
+    base = tensor.base[period]
+    num_students, num_clubs, num_slots = base.shape
+    info = {'period': period, 'status': None, 'relaxed_groups': []}
+    
+    # ช่วงเวลาที่นักศึกษาแต่ละคนต้องได้รับการจัดสรร (เหมือน initial_assignment: เฉพาะช่วงที่มีความต้องการหลัก)
+    num_main = np.array([min(len(student['preferences'][period]['main']), num_slots) for student in students.values()], dtype=np.intp)
+    active = np.arange(num_slots)[None, :] < num_main[:, None]
+    pair_students, pair_slots = np.nonzero(active)
+    num_pairs = pair_students.size
+    
+    # ตรวจสอบความจุรวม ถ้าไม่พอจะไม่มีคำตอบที่เป็นไปได้
+    students_per_slot = active.sum(axis=0)
+    if (students_per_slot > num_clubs * MAX_STUDENTS_PER_CLUB).any():
+        info['status'] = 'infeasible: total capacity is below demand'
+        return None, info
+    
+    var_students = np.repeat(pair_students, num_clubs)
+    var_slots = np.repeat(pair_slots, num_clubs)
+    var_clubs = np.tile(np.arange(num_clubs), num_pairs)
+    num_vars = var_students.size
+    cost = -base[var_students, var_clubs, var_slots].astype(float)
+    
+    # 1) หนึ่งชมรมต่อ (นักศึกษา, ช่วงเวลา)
+    rows_one = np.repeat(np.arange(num_pairs), num_clubs)
+    # 2) แต่ละชมรมไม่เกินหนึ่งครั้งต่อนักศึกษา
+    rows_unique = var_students * num_clubs + var_clubs
+    # 3) ความจุของ (ชมรม, ช่วงเวลา)
+    rows_capacity = var_clubs * num_slots + var_slots
+    # 4) การแทนกลุ่มใน (ชมรม, ช่วงเวลา, กลุ่ม)
+    num_codes = tensor.num_group_codes
+    rows_group = (var_clubs * num_slots + var_slots) * num_codes + tensor.group_codes[var_students]
+    
+    offsets = np.cumsum([0, num_pairs, num_students * num_clubs, num_clubs * num_slots])
+    rows = np.concatenate([rows_one, rows_unique + offsets[1], rows_capacity + offsets[2], rows_group + offsets[3]])
+    columns = np.tile(np.arange(num_vars), 4)
+    num_rows = offsets[3] + num_clubs * num_slots * num_codes
+    matrix = coo_matrix((np.ones(rows.size), (rows, columns)), shape=(num_rows, num_vars)).tocsr()
+    
+    lower = np.concatenate([
+        np.ones(num_pairs),
+        np.zeros(num_students * num_clubs),
+        np.zeros(num_clubs * num_slots),
+        np.ones(num_clubs * num_slots * num_codes),
+    ])
+    upper = np.concatenate([
+        np.ones(num_pairs),
+        np.ones(num_students * num_clubs),
+        np.full(num_clubs * num_slots, MAX_STUDENTS_PER_CLUB),
+        np.full(num_clubs * num_slots * num_codes, np.inf),
+    ])
+    
+    # กลุ่มที่มีสมาชิกในช่วงเวลานั้นน้อยกว่าจำนวนชมรม ไม่สามารถมีตัวแทนครบทุกชมรมได้
+    # จึงผ่อนเงื่อนไขการแทนกลุ่มของกลุ่มนั้นในช่วงเวลานั้น
+    group_active = np.zeros((num_codes, num_slots), dtype=np.int64)
+    np.add.at(group_active, tensor.group_codes[pair_students], (pair_slots == np.arange(num_slots)[:, None]).T.astype(np.int64))
+    group_labels = sorted(tensor.group_rows)
+    for code, slot_index in zip(*np.nonzero(group_active < num_clubs)):
+        relaxed = (np.arange(num_clubs) * num_slots + slot_index) * num_codes + code + offsets[3]
+        lower[relaxed] = 0
+        info['relaxed_groups'].append((group_labels[code], int(slot_index) + 1))
+    
+    options = {'disp': False, 'mip_rel_gap': mip_rel_gap}
+    if time_limit is not None:
+        options['time_limit'] = time_limit
+    
+    start = time.perf_counter()
+    integrality = np.zeros(num_vars) if relax else np.ones(num_vars)
+    result = milp(cost, constraints=LinearConstraint(matrix, lower, upper),
+                  integrality=integrality, bounds=Bounds(0, 1), options=options)
+    info['runtime'] = time.perf_counter() - start
+    info['status'] = result.message
+    info['optimal'] = result.status == 0
+    info['variables'] = num_vars
+    info['constraints'] = int(num_rows)
+    
+    if result.x is None:
+        return None, info
+    
+    info['objective'] = -result.fun
+    info['mip_gap'] = getattr(result, 'mip_gap', None)
+    if relax:
+        return None, info
+    chosen = np.flatnonzero(result.x > 0.5)
+    return list(zip(var_students[chosen].tolist(), (var_slots[chosen] + 1).tolist(), var_clubs[chosen].tolist())), info
+
+@profiled
+def solve_allocation_milp(students, clubs, time_limit=None, mip_rel_gap=1e-3):
+    """
+    จัดสรรชมรมทั้งเช้าและบ่ายด้วย MILP (solve_period_milp) แทนขั้นตอน greedy
+    time_limit คือเวลาสูงสุด (วินาที) รวมทั้งสองคาบ ถ้าหมดเวลาจะใช้คำตอบที่ดีที่สุดที่หาได้
+    จำนวนการเปลี่ยนแปลงนับจากช่วงเวลาที่ได้ชมรมไม่ตรงกับอันดับความต้องการหลัก
+    คืนค่า time_slots หรือ None ถ้าไม่สามารถใช้ MILP ได้ (ให้ผู้เรียกใช้ greedy แทน)
+    """
+    if milp is None:
+        print("WARNING: scipy is not installed, the MILP solver is unavailable")
+        return None
+    
+    print("Solving club allocation with MILP (HiGHS)...")
+    period_limit = time_limit / 2 if time_limit is not None else None
+    solutions = {}
+    for period in ['morning', 'afternoon']:
+        solution, info = solve_period_milp(students, clubs, period, time_limit=period_limit, mip_rel_gap=mip_rel_gap)
+        for group, slot in info['relaxed_groups']:
+            print(f"WARNING: group {group} has fewer {period} slot {slot} students than clubs, representation relaxed")
+        if solution is None:
+            print(f"WARNING: MILP found no solution for {period} ({info['status']})")
+            return None
+        gap = f", gap {info['mip_gap'] * 100:.3f}%" if info['mip_gap'] is not None else ""
+        print(f"MILP {period}: {info['variables']} variables, {info['constraints']} constraints, "
+              f"objective {info['objective']:.0f}{gap}, {info['runtime']:.2f}s ({info['status']})")
+        solutions[period] = solution
+    
+    # นำคำตอบมาสร้างโครงสร้างการจัดสรร (เรียงตามลำดับนักศึกษาเพื่อให้ลำดับสมาชิกคงที่)
+    time_slots = initialize_time_slots(clubs)
+    student_ids = list(students)
+    for period, solution in solutions.items():
+        for row, slot, column in sorted(solution):
+            student_id = student_ids[row]
+            student = students[student_id]
+            club = clubs[period][column]
+            assign_club(student, period, slot, club)
+            time_slots.add(student_id, student['group'], period, slot, club)
+            if student['preferences'][period]['main'][slot-1] != club:
+                student['changes'][period] += 1
+    
+    return time_slots
+
+def calculate_lp_upper_bound(students, clubs, time_limit=None):
+    """
+    ขอบเขตบนของความพึงพอใจรวมจาก LP relaxation ของแต่ละคาบ (ใช้ได้กับการจัดสรรที่ไม่เกินขีดจำกัด)
+    แน่นกว่าแบบ ideal แต่ต้องใช้ scipy และคืนค่า None ถ้าแก้ไม่ได้ (เช่น ความจุรวมน้อยกว่าจำนวนนักศึกษา)
+    time_limit คือเวลาสูงสุด (วินาที) รวมทั้งสองคาบ (10,000 คนใช้ราว 75 วินาที) ถ้าหมดเวลาก่อนได้คำตอบที่ดีที่สุด
+    ค่าที่ได้ไม่ใช่ขอบเขตบน จึงคืนค่า None เช่นกัน
+    """
+    if milp is None:
+        return None
+    period_limit = time_limit / 2 if time_limit is not None else None
+    total = 0
+    for period in PERIODS:
+        _, info = solve_period_milp(students, clubs, period, time_limit=period_limit, relax=True)
+        if info.get('objective') is None or not info['optimal']:
+            if info['status'] is not None:
+                print(f"WARNING: LP bound for {period} not solved to optimality ({info['status']})")
+            return None
+        total += info['objective']
+    return total
@@ -0,0 +1,185 @@
+#วัดเวลา (wall และ CPU) หน่วยความจำสูงสุด (tracemalloc) และจำนวนรายการของแต่ละขั้นตอน แล้วบันทึกเป็นรายงาน JSON
+#เปิดด้วย start_profiling (--profile) เมื่อไม่ได้เปิด ฟังก์ชันที่ถูกวัดจะถูกเรียกตรงๆ หลังตรวจค่าเดียว จึงแทบไม่มีค่าใช้จ่าย
+import functools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+PROFILE_VERSION = 1  # เปลี่ยนเมื่อรูปแบบของรายงาน JSON เปลี่ยน
+
+active = None  # RunProfile ที่กำลังวัดอยู่ (None = ไม่ได้วัด)
+
+class RunProfile:
+    """
+    ผลการวัดของการรันหนึ่งครั้ง: ขั้นตอนที่ชื่อและตำแหน่งเดียวกัน (เช่น find_best_swaps ที่ถูกเรียกซ้ำใน perform_swaps)
+    ถูกรวมเป็นรายการเดียว (จำนวนครั้ง เวลารวม หน่วยความจำสูงสุด และจำนวนรายการรวม)
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = {}  # เส้นทางของขั้นตอน ('a/b') -> ผลรวมของขั้นตอน
+        self.stack = []  # ขั้นตอนที่กำลังทำงาน: [เส้นทาง, ค่าสูงสุดของหน่วยความจำที่พบแล้ว]
+        self.peak_memory = 0  # ค่าสูงสุดของหน่วยความจำตลอดการรัน
+        self.started = time.time()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _peak(self):
+        """
+        ค่าสูงสุดของหน่วยความจำตั้งแต่ reset_peak ครั้งล่าสุด แล้วเริ่มนับใหม่
+        """
+        if not self.trace_memory:
+            return 0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        self.peak_memory = max(self.peak_memory, peak)
+        return peak
+
+    def enter(self, name):
+        path = '/'.join([entry[0] for entry in self.stack[-1:]] + [name])
+        if self.stack:
+            # เก็บค่าสูงสุดของขั้นตอนที่ครอบอยู่ก่อนเริ่มนับใหม่สำหรับขั้นตอนย่อย
+            self.stack[-1][1] = max(self.stack[-1][1], self._peak())
+        else:
+            self._peak()
+        self.stack.append([path, 0])
+        stage = self.stages.setdefault(path, {'name': name, 'path': path, 'calls': 0, 'wall_seconds': 0.0,
+                                              'cpu_seconds': 0.0, 'peak_memory_bytes': 0, 'counts': Counter()})
+        return stage, time.perf_counter(), time.process_time()
+
+    def exit(self, stage, start_wall, start_cpu):
+        path, peak = self.stack.pop()
+        peak = max(peak, self._peak())
+        stage['calls'] += 1
+        stage['wall_seconds'] += time.perf_counter() - start_wall
+        stage['cpu_seconds'] += time.process_time() - start_cpu
+        stage['peak_memory_bytes'] = max(stage['peak_memory_bytes'], peak)
+        if self.stack:
+            # ค่าสูงสุดของขั้นตอนย่อยเป็นส่วนหนึ่งของขั้นตอนที่ครอบอยู่ด้วย
+            self.stack[-1][1] = max(self.stack[-1][1], peak)
+
+    def record(self, counts):
+        if self.stack:
+            self.stages[self.stack[-1][0]]['counts'].update(counts)
+
+    def report(self, **metadata):
+        """
+        รายงานในรูป dict ที่แปลงเป็น JSON ได้ (metadata เช่นไฟล์นำเข้าถูกเก็บไว้ในรายงานด้วย)
+        """
+        stages = []
+        for stage in self.stages.values():
+            entry = {key: value for key, value in stage.items() if key != 'counts'}
+            entry['wall_seconds'] = round(entry['wall_seconds'], 6)
+            entry['cpu_seconds'] = round(entry['cpu_seconds'], 6)
+            entry.update(stage['counts'])
+            stages.append(entry)
+        return {
+            'version': PROFILE_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'command': sys.argv,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'trace_memory': self.trace_memory,
+            **metadata,
+            'wall_seconds': round(time.perf_counter() - self.start_wall, 6),
+            'cpu_seconds': round(time.process_time() - self.start_cpu, 6),
+            'peak_memory_bytes': max(self.peak_memory, self._peak()),
+            'stages': stages,
+        }
+
+class ProfileStage:
+    """
+    context manager ของขั้นตอนหนึ่ง (profile_stage) ไม่ทำอะไรเมื่อไม่ได้เปิดการวัด
+    """
+    __slots__ = ('name', 'state')
+
+    def __init__(self, name):
+        self.name = name
+        self.state = None
+
+    def __enter__(self):
+        if active is not None:
+            self.state = active.enter(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.state is not None:
+            active.exit(*self.state)
+            self.state = None
+        return False
+
+def profile_stage(name):
+    """
+    วัดช่วงของโค้ดเป็นขั้นตอนชื่อ name: with profile_stage('stage'): ...
+    """
+    return ProfileStage(name)
+
+def profiled(function):
+    """
+    decorator วัดการเรียกฟังก์ชันเป็นขั้นตอนตามชื่อฟังก์ชัน (เรียกตรงๆ เมื่อไม่ได้เปิดการวัด)
+    """
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if active is None:
+            return function(*args, **kwargs)
+        state = active.enter(name)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            active.exit(*state)
+    return wrapper
+
+def record(**counts):
+    """
+    เพิ่มจำนวนรายการ (เช่น students=250, moves=12) ให้ขั้นตอนที่กำลังทำงานอยู่ ค่าเดิมถูกบวกเพิ่ม
+    """
+    if active is not None:
+        active.record(counts)
+
+def start_profiling(trace_memory=True):
+    """
+    เริ่มวัดขั้นตอนทั้งหมดที่ถูกเรียกหลังจากนี้ trace_memory=False ไม่ใช้ tracemalloc (tracemalloc ทำให้โค้ดช้าลง)
+    """
+    global active
+    active = RunProfile(trace_memory)
+    return active
+
+def stop_profiling(output_file=None, **metadata):
+    """
+    หยุดวัดและคืนค่ารายงาน (RunProfile.report) ถ้าระบุ output_file จะบันทึกรายงานเป็นไฟล์ JSON ด้วย
+    """
+    global active
+    if active is None:
+        return None
+    report = active.report(**metadata)
+    if active.trace_memory:
+        tracemalloc.stop()
+    active = None
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Profile report saved to {output_file}")
+    return report
+
+def print_profile(report):
+    """
+    แสดงตารางสรุปของรายงาน: เวลา wall/CPU หน่วยความจำสูงสุด และจำนวนรายการของแต่ละขั้นตอน
+    """
+    print(f"\n===== Profile ({report['wall_seconds']:.2f}s wall, {report['cpu_seconds']:.2f}s CPU) =====")
+    for stage in report['stages']:
+        counts = {key: value for key, value in stage.items()
+                  if key not in ('name', 'path', 'calls', 'wall_seconds', 'cpu_seconds', 'peak_memory_bytes')}
+        counts_text = ', '.join(f"{key} {value}" for key, value in counts.items())
+        depth = stage['path'].count('/')
+        print(f"  {'  ' * depth}{stage['name']:<{32 - 2 * depth}} {stage['calls']:>5}x {stage['wall_seconds']:9.3f}s "
+              f"{stage['cpu_seconds']:9.3f}s CPU {stage['peak_memory_bytes'] / 2**20:9.1f} MB"
+              + (f"  ({counts_text})" if counts_text else ""))
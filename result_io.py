@@ -0,0 +1,90 @@
+#อ่านและเขียนไฟล์ผลการจัดสรร (save_results) ได้ทั้ง CSV, Parquet และ Feather
+#Parquet/Feather เก็บข้อมูลเป็นคอลัมน์และไม่มีแถวหัวกลุ่ม จึงอ่านกลับได้เร็วกว่า CSV มาก (ต้องติดตั้ง pyarrow)
+#CSV ยังใช้ส่งออกได้เหมือนเดิม โดยจะแทรกแถวหัวกลุ่ม ('*** กลุ่ม 0 (25 คน) ***') ก่อนนักศึกษาของแต่ละกลุ่มหรือไม่ก็ได้
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    # ใช้เขียน/อ่าน Parquet และ Feather เท่านั้น (CSV ไม่ต้องใช้)
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+RESULT_FORMATS = ('csv', 'parquet', 'feather')  # รูปแบบไฟล์ผลการจัดสรรที่รองรับ
+FORMAT_EXTENSIONS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.feather': 'feather', '.arrow': 'feather'}
+STUDENT_ID_COLUMN = 'รหัสนักศึกษา'
+GROUP_COLUMN = 'กลุ่ม'
+GROUP_HEADER_PREFIX = '***'  # แถวหัวกลุ่มในไฟล์ CSV ขึ้นต้นด้วยข้อความนี้ในคอลัมน์รหัสนักศึกษา
+
+def result_format(file_path, format=None):
+    """
+    รูปแบบของไฟล์ผลการจัดสรร: ใช้ format ถ้าระบุ ไม่เช่นนั้นดูจากนามสกุลไฟล์ (นามสกุลอื่นถือเป็น CSV)
+    """
+    if format is None:
+        format = FORMAT_EXTENSIONS.get(os.path.splitext(file_path)[1].lower(), 'csv')
+    if format not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format '{format}' (expected one of {', '.join(RESULT_FORMATS)})")
+    if format != 'csv' and pyarrow is None:
+        raise ImportError(f"pyarrow is required to read or write {format} files (pip install pyarrow)")
+    return format
+
+def insert_group_headers(df):
+    """
+    แทรกแถวหัวกลุ่มก่อนนักศึกษาคนแรกของแต่ละกลุ่ม (df ต้องเรียงตามกลุ่มแล้ว) คอลัมน์อื่นของแถวหัวกลุ่มเป็นค่าว่าง
+    """
+    groups = df[GROUP_COLUMN].to_numpy()
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(groups) else np.array([], dtype=int)
+    sizes = np.diff(np.r_[starts, len(groups)])
+    labels = [f'{GROUP_HEADER_PREFIX} กลุ่ม {groups[start]} ({size} คน) {GROUP_HEADER_PREFIX}'
+              for start, size in zip(starts, sizes)]
+
+    columns = {}
+    for column in df.columns:
+        values = df[column].to_numpy(dtype=object)
+        if column == STUDENT_ID_COLUMN:
+            header = labels
+        elif column == GROUP_COLUMN:
+            header = groups[starts]
+        else:
+            header = ''
+        columns[column] = np.insert(values, starts, header)
+    return pd.DataFrame(columns)
+
+def write_results(df, output_file, format=None, group_headers=True):
+    """
+    บันทึก DataFrame ผลการจัดสรรตามรูปแบบไฟล์ (result_format) group_headers ใช้กับ CSV เท่านั้น
+    """
+    format = result_format(output_file, format)
+    if format == 'parquet':
+        df.to_parquet(output_file, index=False)
+    elif format == 'feather':
+        df.to_feather(output_file)
+    else:
+        if group_headers:
+            df = insert_group_headers(df)
+        df.to_csv(output_file, index=False, encoding='utf-8-sig')
+    return format
+
+def drop_group_headers(df):
+    """
+    ตัดแถวหัวกลุ่มของไฟล์ CSV ออก (ไฟล์ที่บันทึกโดยไม่มีหัวกลุ่มจะไม่ถูกเปลี่ยน)
+    """
+    headers = df[STUDENT_ID_COLUMN].astype(str).str.startswith(GROUP_HEADER_PREFIX).to_numpy()
+    if not headers.any():
+        return df
+    return df[~headers].reset_index(drop=True)
+
+def read_results(file_path, format=None):
+    """
+    อ่านไฟล์ผลการจัดสรร (CSV / Parquet / Feather) คืนค่า DataFrame ที่มีเฉพาะแถวของนักศึกษา
+    """
+    format = result_format(file_path, format)
+    if format == 'parquet':
+        return pd.read_parquet(file_path)
+    if format == 'feather':
+        return pd.read_feather(file_path)
+    # อ่านรหัสนักศึกษาเป็นสตริงเสมอ (เหมือน Parquet/Feather) ไม่ว่าไฟล์จะมีแถวหัวกลุ่มหรือไม่
+    df = pd.read_csv(file_path, encoding='utf-8-sig', dtype={STUDENT_ID_COLUMN: str})
+    return drop_group_headers(df)
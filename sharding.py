@@ -0,0 +1,218 @@
+#แบ่งนักศึกษาเป็น shard แล้วจัดสรรแต่ละ shard พร้อมกันใน process pool ด้วยความจุต่อชมรมบางส่วน
+#จากนั้นรวมผลและแก้ไขสิ่งที่ shard แก้ไม่ได้ (ชมรมเกินขีดจำกัด กลุ่มที่ขาดตัวแทน) บนผลที่รวมแล้ว
+import argparse
+import contextlib
+import io
+import logging
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from student_store import StudentStore
+from allocation_log import LOGGER_NAME
+from allocation_core import (GROUP_LABELS, MAX_STUDENTS_PER_CLUB, PERIODS, adjust_assignments, assign_club,
+                             check_group_representation, count_violations, initial_assignment, initialize_time_slots)
+from profiling import profiled
+
+logger = logging.getLogger(LOGGER_NAME + '.shards')
+
+MIN_STUDENTS_PER_SHARD = 500  # shard ที่เล็กกว่านี้เสียความพึงพอใจมาก จึงไม่แบ่ง (ดู plan_shards)
+
+def partition_students(df, num_shards=None, shard_by=None):
+    """
+    แบ่งนักศึกษาเป็น shard คืนค่ารายการของรายการรหัสนักศึกษา (เรียงตามลำดับในไฟล์)
+    shard_by แบ่งตามค่าในคอลัมน์ที่ระบุ (เช่น คณะ) ไม่เช่นนั้นแบ่งเป็น num_shards ส่วน โดยเรียงนักศึกษาแต่ละกลุ่ม
+    ตาม hash ของรหัส (crc32) แล้วแจกวนกันไป ทุก shard จึงมีนักศึกษาทุกกลุ่มในสัดส่วนใกล้เคียงกัน
+    """
+    student_ids = df['รหัสนักศึกษา'].astype(str).tolist()
+    if shard_by is not None:
+        if shard_by not in df.columns:
+            raise ValueError(f"Cannot shard by '{shard_by}': no such column in the input")
+        keys = df[shard_by].fillna('').astype(str).tolist()
+        shard_index = {key: index for index, key in enumerate(sorted(set(keys)))}
+        shard_of = [shard_index[key] for key in keys]
+        num_shards = len(shard_index)
+    else:
+        shard_of = [0] * len(student_ids)
+        for rows in df.groupby('group', sort=True).indices.values():
+            ordered = sorted(rows, key=lambda row: (zlib.crc32(student_ids[row].encode('utf-8')), row))
+            for rank, row in enumerate(ordered):
+                shard_of[row] = rank % num_shards
+    
+    shards = [[] for _ in range(num_shards)]
+    seen = set()
+    for student_id, shard in zip(student_ids, shard_of):
+        # รหัสซ้ำในไฟล์ใช้ข้อมูลเดียวกัน (เหมือน create_student_preferences) จึงอยู่ใน shard แรกที่พบ
+        if student_id not in seen:
+            seen.add(student_id)
+            shards[shard].append(student_id)
+    return [shard for shard in shards if shard]
+
+def shard_count(value):
+    """
+    ตรวจสอบค่า --shards ตอนอ่าน argument: ต้องเป็นจำนวนเต็มตั้งแต่ 1 ถึง MAX_STUDENTS_PER_CLUB
+    (ความจุของแต่ละชมรมถูกแบ่งให้ทุก shard จึงต้องได้อย่างน้อย 1 ที่ต่อ shard)
+    """
+    try:
+        shards = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard count: {value!r}")
+    if not 1 <= shards <= MAX_STUDENTS_PER_CLUB:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {MAX_STUDENTS_PER_CLUB} "
+                                         f"(the limit of {MAX_STUDENTS_PER_CLUB} students per club is split across shards)")
+    return shards
+
+def plan_shards(df, num_shards=None, shard_by=None, min_students=MIN_STUDENTS_PER_SHARD, allow_fallback=False):
+    """
+    แบ่งนักศึกษาด้วย partition_students โดยทุก shard ต้องมีนักศึกษาอย่างน้อย min_students คน
+    เพราะ shard เล็กได้ความจุต่อชมรมเพียงบางส่วนและจัดตัวแทนกลุ่มได้ยาก (test_250.csv: 2 shard ความพึงพอใจเฉลี่ย
+    ลดจาก 8775 เป็น 7859 หรือ 10% ส่วน shard ละ 500 คนขึ้นไปเสียไม่ถึง 1%) ถ้าแบ่งไม่ได้ (shard เดียวหรือ shard เล็กเกินไป)
+    จะ raise ValueError ยกเว้นเมื่อ allow_fallback=True ซึ่งบันทึกคำเตือนแล้วคืนค่า None (ให้จัดสรรแบบไม่แบ่งแทน)
+    """
+    partition = partition_students(df, num_shards, shard_by)
+    problem = None
+    if len(partition) < 2:
+        problem = "Only one shard"
+    else:
+        smallest = min(len(shard) for shard in partition)
+        if smallest < min_students:
+            problem = (f"The smallest of {len(partition)} shards has {smallest} students (minimum {min_students}); "
+                       f"small shards lose satisfaction")
+    if problem is None:
+        return partition
+    if not allow_fallback:
+        raise ValueError(f"{problem} (pass --allow-unsharded-fallback to allocate without shards instead)")
+    logger.warning("WARNING: %s, allocating without shards", problem)
+    return None
+
+def split_capacity(sizes, capacity=None):
+    """
+    แบ่งความจุของชมรมให้แต่ละ shard ตามสัดส่วนจำนวนนักศึกษา (วิธีเศษเหลือมากที่สุด รวมกันเท่ากับ capacity พอดี)
+    """
+    if capacity is None:
+        capacity = MAX_STUDENTS_PER_CLUB
+    total = sum(sizes)
+    quotas = [capacity * size / total for size in sizes]
+    shares = [int(quota) for quota in quotas]
+    by_remainder = sorted(range(len(sizes)), key=lambda shard: (shares[shard] - quotas[shard], shard))
+    for shard in by_remainder[:capacity - sum(shares)]:
+        shares[shard] += 1
+    return shares
+
+def assign_representation_duties(clubs, shard_groups):
+    """
+    กำหนดว่า shard ใดต้องจัดตัวแทนของแต่ละกลุ่มในแต่ละชมรม: กลุ่ม g ของชมรมลำดับที่ c เป็นหน้าที่ของ
+    shard ลำดับที่ (c + g) ในบรรดา shard ที่มีนักศึกษากลุ่มนั้น (shard_groups: ชุดกลุ่มของแต่ละ shard)
+    ทุกกลุ่มของทุกชมรมจึงมี shard รับผิดชอบไม่เกินหนึ่ง shard และงานกระจายเท่าๆ กัน
+    คืนค่า required_groups ของแต่ละ shard (คาบ -> ชมรม -> รายชื่อกลุ่ม) สำหรับ TimeSlotIndex
+    """
+    duties = [{period: {club: [] for club in clubs[period]} for period in PERIODS} for _ in shard_groups]
+    for group_index, group in enumerate(GROUP_LABELS):
+        owners = [shard for shard, groups in enumerate(shard_groups) if group in groups]
+        if not owners:
+            continue
+        for period in PERIODS:
+            for club_index, club in enumerate(clubs[period]):
+                owner = owners[(club_index + group_index) % len(owners)]
+                duties[owner][period][club].append(group)
+    return duties
+
+def allocate_shard(students, clubs, shard, capacity, required_groups, engine='python', initial_strategy='rank',
+                   club_counts=None):
+    """
+    จัดสรรนักศึกษาใน shard หนึ่งด้วยความจุ capacity ต่อชมรม และตัวแทนเฉพาะกลุ่มที่เป็นหน้าที่ของ shard นี้
+    ใช้เป็นงานของ worker process ใน allocate_in_shards
+    คืนค่า (shard, ตัวชี้วัด, ผลของนักศึกษาแต่ละคนแยกตามคาบ, time_slots)
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        time_slots = initialize_time_slots(clubs, capacity, required_groups)
+        time_slots = initial_assignment(students, clubs, strategy=initial_strategy, club_counts=club_counts,
+                                        time_slots=time_slots)
+        missing_representation = check_group_representation(students, time_slots, clubs)
+        time_slots = adjust_assignments(students, time_slots, clubs, missing_representation, engine)
+    
+    over_limit, missing = count_violations(time_slots, clubs)
+    metrics = {
+        'students': len(students),
+        'capacity': capacity,
+        'over_limit': over_limit,
+        'missing_groups': missing,
+        'seconds': time.perf_counter() - start
+    }
+    student_results = {
+        period: {
+            student_id: (dict(student['assignments'][period]), student['changes'][period])
+            for student_id, student in students.items()
+        }
+        for period in PERIODS
+    }
+    return shard, metrics, student_results, time_slots
+
+def merge_shard_result(students, time_slots, result):
+    """
+    รวมผลการจัดสรรของ shard หนึ่ง (จาก allocate_shard) เข้ากับ students และ time_slots
+    """
+    _, _, student_results, shard_time_slots = result
+    for period, period_results in student_results.items():
+        for student_id, (assignments, changes) in period_results.items():
+            student = students[student_id]
+            for slot, club in assignments.items():
+                assign_club(student, period, slot, club)
+            student['changes'][period] = changes
+        for slot, slot_clubs in shard_time_slots[period].items():
+            for club, members in slot_clubs.items():
+                for student_id, group in members.items():
+                    time_slots.add(student_id, group, period, slot, club)
+
+@profiled
+def allocate_in_shards(students, clubs, shards, engine='python', initial_strategy='rank', club_counts=None,
+                       workers=None):
+    """
+    จัดสรรแต่ละ shard (รายการรหัสนักศึกษาจาก partition_students) พร้อมกันใน process pool โดยแบ่งความจุ
+    ของชมรมตามสัดส่วน (split_capacity) และแบ่งหน้าที่จัดตัวแทนกลุ่ม (assign_representation_duties)
+    แล้วรวมผลและแก้ไขชมรมที่เกินขีดจำกัดหรือขาดตัวแทนข้าม shard ในรอบสุดท้าย (adjust_assignments)
+    club_counts เป็นรายการจำนวนผู้เลือกของแต่ละ shard (ใช้กับ initial_strategy='balanced')
+    """
+    if len(shards) > MAX_STUDENTS_PER_CLUB:
+        raise ValueError(f"Cannot split a club of {MAX_STUDENTS_PER_CLUB} students across {len(shards)} shards")
+    
+    capacities = split_capacity([len(shard) for shard in shards])
+    duties = assign_representation_duties(clubs, [{students[student_id]['group'] for student_id in shard}
+                                                  for shard in shards])
+    print(f"Allocating {len(shards)} shards in parallel worker processes "
+          f"(capacity per club: {', '.join(str(capacity) for capacity in capacities)})...")
+    
+    if isinstance(students, StudentStore):
+        # ส่งเฉพาะแถวของ shard ไปยัง worker แทน StudentRecord ที่อ้างถึงข้อมูลทั้งหมด
+        shard_students = [students.subset(shard) for shard in shards]
+    else:
+        shard_students = [{student_id: students[student_id] for student_id in shard} for shard in shards]
+    
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(allocate_shard, shard_students[index], clubs, index, capacities[index], duties[index],
+                                   engine, initial_strategy, club_counts[index] if club_counts else None)
+                   for index in range(len(shards))]
+        results = [future.result() for future in futures]
+    shard_time = time.perf_counter() - start
+    
+    for shard, metrics, _, _ in results:
+        print(f"Shard {shard}: {metrics['students']} students, capacity {metrics['capacity']}, "
+              f"{metrics['over_limit']} over-limit slots, {metrics['missing_groups']} missing groups "
+              f"({metrics['seconds']:.2f} seconds)")
+    
+    time_slots = initialize_time_slots(clubs)
+    for result in results:
+        merge_shard_result(students, time_slots, result)
+    
+    # รอบสุดท้าย: แก้ไขสิ่งที่ shard แก้ไม่ได้ (เช่น shard ที่ไม่มีนักศึกษาบางกลุ่ม) บนผลที่รวมแล้ว
+    over_limit, missing = count_violations(time_slots, clubs)
+    print(f"Merged shards: {over_limit} over-limit slots, {missing} missing groups before reconciliation")
+    start_reconcile = time.perf_counter()
+    if over_limit or missing:
+        missing_representation = check_group_representation(students, time_slots, clubs)
+        time_slots = adjust_assignments(students, time_slots, clubs, missing_representation, engine)
+    print(f"Shards took {shard_time:.2f} seconds, reconciliation {time.perf_counter() - start_reconcile:.2f} seconds")
+    
+    return time_slots
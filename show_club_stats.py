@@ -1,19 +1,18 @@
-import pandas as pd
 import os
 import sys
 from collections import defaultdict
 
+from result_io import read_results
+
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
 def load_assignment_results(file_path):
     """
-    โหลดข้อมูลการจัดสรรชมรมจากไฟล์ CSV
+    โหลดข้อมูลการจัดสรรชมรมจากไฟล์ผลการจัดสรร (CSV / Parquet / Feather)
+    แถวหัวกลุ่มของไฟล์ CSV ถูกตัดออกใน read_results แล้ว
     """
-    df = pd.read_csv(file_path, encoding='utf-8-sig')
-    # กรองเฉพาะแถวที่เป็นข้อมูลนักศึกษาจริง (ไม่ใช่แถวหัวกลุ่ม)
-    df = df[~df['รหัสนักศึกษา'].astype(str).str.contains('กลุ่ม')]
-    return df
+    return read_results(file_path)
 
 def count_club_members(df):
     """
@@ -97,7 +96,8 @@ def print_club_stats(morning_clubs, afternoon_clubs):
     print(f"จำนวนรวมช่วงเวลา-ชมรมที่มีนักศึกษาน้อยกว่า 10 คน: {morning_under_10 + afternoon_under_10}")
 
 def main():
-    file_path = "club_assignment_results_optimal.csv"
+    # รับชื่อไฟล์จาก command line argument (CSV / Parquet / Feather)
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "club_assignment_results_optimal.csv"
     if not os.path.exists(file_path):
         print(f"ไม่พบไฟล์ {file_path} กรุณาตรวจสอบชื่อไฟล์")
         return
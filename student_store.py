@@ -0,0 +1,497 @@
+#เก็บข้อมูลนักศึกษาแบบกะทัดรัด: แปลงชื่อชมรมเป็นรหัสตัวเลขครั้งเดียว แล้วเก็บความชอบ การจัดสรร กลุ่ม
+#และจำนวนการเปลี่ยนแปลงไว้ใน NumPy array แทน dict ซ้อนกันหลายชั้นของนักศึกษาแต่ละคน
+from collections import Counter
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+import pandas as pd
+
+PERIODS = ('morning', 'afternoon')
+PERIOD_INDEX = {period: index for index, period in enumerate(PERIODS)}
+PERIOD_LABELS = {'morning': 'เช้า', 'afternoon': 'บ่าย'}  # ใช้ประกอบชื่อคอลัมน์ในไฟล์ CSV
+NUM_SLOTS_PER_PERIOD = 4  # จำนวนช่วงเวลาต่อคาบ
+NUM_CHOICES = 4  # จำนวนความต้องการหลัก (และสำรอง) ต่อคาบ
+NO_CLUB = -1  # รหัสของช่องที่ไม่มีชมรม
+NO_RANK = np.iinfo(np.int16).min  # ค่าในตารางคะแนนตามอันดับของชมรมที่ไม่อยู่ในรายการความชอบ
+
+class ClubCodec:
+    """
+    แปลงชื่อชมรมเป็นรหัสตัวเลข (ชื่อเดียวกันได้รหัสเดียวกันเสมอ) และแปลงกลับเป็นชื่อ
+    """
+    __slots__ = ('names', 'codes')
+
+    def __init__(self, names=()):
+        self.names = []
+        self.codes = {}
+        for name in names:
+            self.encode(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def encode(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = len(self.names)
+            self.names.append(name)
+            self.codes[name] = code
+        return code
+
+    def decode(self, code):
+        return None if code == NO_CLUB else self.names[code]
+
+    def decode_array(self, codes, empty=''):
+        """
+        แปลง array รหัสทั้งก้อนกลับเป็นชื่อชมรม (ช่อง NO_CLUB ได้ค่า empty) ใช้ตอนบันทึกไฟล์
+        """
+        lookup = np.array(self.names + [empty], dtype=object)
+        return lookup[codes]
+
+    def encode_columns(self, df, columns, fill=None):
+        """
+        แปลงหลายคอลัมน์ของ DataFrame เป็น array รหัสขนาด (จำนวนแถว, จำนวนคอลัมน์)
+        ช่องว่างหรือคอลัมน์ที่ไม่มีได้ NO_CLUB (หรือรหัสของ fill ถ้าระบุ)
+        """
+        codes = np.full((len(df), len(columns)), NO_CLUB, dtype=np.int16)
+        for index, column in enumerate(columns):
+            if column not in df.columns:
+                continue
+            values = df[column] if fill is None else df[column].fillna(fill)
+            present = values.notna().to_numpy()
+            for name in pd.unique(values[present]):
+                self.encode(name)
+            codes[present, index] = values[present].map(self.codes).to_numpy()
+        return codes
+
+def pack_left(codes):
+    """
+    เลื่อนรหัสที่ไม่ใช่ NO_CLUB ไปทางซ้ายของแต่ละแถวโดยรักษาลำดับเดิม (เหมือนการ append เฉพาะช่องที่มีค่า)
+    """
+    order = np.argsort(codes == NO_CLUB, axis=1, kind='stable')
+    return np.take_along_axis(codes, order, axis=1)
+
+class StudentStore(Mapping):
+    """
+    ข้อมูลนักศึกษาทั้งหมดในรูป array: main/backup/assignments ขนาด (นักศึกษา, คาบ, ช่อง) เป็นรหัสชมรม int16
+    groups เป็นรหัสกลุ่ม int16 และ changes ขนาด (นักศึกษา, คาบ) เป็น int32
+    ใช้แทน dict ของนักศึกษาได้โดยตรง: students[student_id] คืนค่า StudentRecord ที่อ่าน/เขียนผ่าน key เดิม
+    ('group', 'preferences', 'assignments', 'changes', ...) ชื่อชมรมถูกแปลงกลับเฉพาะเมื่อมีการอ่านเท่านั้น
+    rank_table (ถ้ามี rank_scorer) คือคะแนนตามอันดับขนาด (นักศึกษา, คาบ, รหัสชมรม) int16 สร้างครั้งเดียว
+    ให้ 'rank_scores' ค้นคะแนนได้ทันทีโดยไม่ต้องสร้างตารางใหม่ทุกครั้งที่อ่าน
+    รหัสนักศึกษาต้องไม่ซ้ำกัน (ValueError)
+    """
+
+    def __init__(self, student_ids, groups, codec=None, names=None, rank_scorer=None):
+        self.student_ids = list(student_ids)
+        self.rows = {student_id: row for row, student_id in enumerate(self.student_ids)}
+        if len(self.rows) != len(self.student_ids):
+            duplicates = [student_id for student_id, count in Counter(self.student_ids).items() if count > 1]
+            raise ValueError(f"Duplicate student IDs: {', '.join(map(str, duplicates[:10]))}"
+                             + (f" and {len(duplicates) - 10} more" if len(duplicates) > 10 else ""))
+        self.codec = codec if codec is not None else ClubCodec()
+        self.names = names  # ชื่อนักศึกษา (มีเฉพาะข้อมูลที่อ่านจากไฟล์ผลการจัดสรร)
+        self.rank_scorer = rank_scorer  # ฟังก์ชันสร้างตารางคะแนนตามอันดับจาก preferences (ถ้ามี)
+        self.rank_table = None  # คะแนนตามอันดับ (นักศึกษา, คาบ, รหัสชมรม) สร้างโดย set_rank_scorer
+
+        group_codes, group_labels = pd.factorize(pd.Series(list(groups), dtype=object))
+        self.groups = group_codes.astype(np.int16)
+        self.group_labels = list(group_labels)
+
+        shape = (len(self.student_ids), len(PERIODS), NUM_SLOTS_PER_PERIOD)
+        self.main = np.full(shape, NO_CLUB, dtype=np.int16)
+        self.backup = np.full(shape, NO_CLUB, dtype=np.int16)
+        self.assignments = np.full(shape, NO_CLUB, dtype=np.int16)
+        self.changes = np.zeros((len(self.student_ids), len(PERIODS)), dtype=np.int32)
+
+    @classmethod
+    def from_preferences(cls, df, rank_scorer=None):
+        """
+        สร้างจาก DataFrame ความชอบ (หลัง assign_groups) ให้ผลเหมือน create_student_preferences
+        แต่แปลงทั้งคอลัมน์ในครั้งเดียวแทนการวนทีละแถว
+        """
+        store = cls(df['รหัสนักศึกษา'].astype(str), df['group'].astype(str), rank_scorer=rank_scorer)
+        store.main[:], store.backup[:] = store.encode_preferences(df)
+        store.set_rank_scorer(rank_scorer)
+        return store
+
+    def encode_preferences(self, df):
+        """
+        แปลงคอลัมน์ความชอบของ DataFrame เป็นรหัสชมรม (ชมรมใหม่ได้รหัสถัดไปใน codec)
+        คืนค่า (main, backup) ขนาด (จำนวนแถว, คาบ, ช่อง) เรียงชิดซ้ายแล้ว
+        """
+        shape = (len(df), len(PERIODS), NUM_CHOICES)
+        main = np.full(shape, NO_CLUB, dtype=np.int16)
+        backup = np.full(shape, NO_CLUB, dtype=np.int16)
+        for period, label in PERIOD_LABELS.items():
+            columns = [f'ฐาน{label} อันดับที่ {i}' for i in range(1, 2 * NUM_CHOICES + 1)]
+            codes = self.codec.encode_columns(df, columns)
+            main[:, PERIOD_INDEX[period]] = pack_left(codes[:, :NUM_CHOICES])
+            backup[:, PERIOD_INDEX[period]] = pack_left(codes[:, NUM_CHOICES:])
+        return main, backup
+
+    @classmethod
+    def from_assignments(cls, df):
+        """
+        สร้างจาก DataFrame ผลการจัดสรร (ไฟล์ที่ save_results บันทึก) แทน Pathoptimize.create_student_data
+        ช่องที่ว่างในไฟล์ถูกเก็บเป็นชมรมชื่อ '' ซึ่งไม่มีพิกัด (ระยะทางเป็นอนันต์เหมือนเดิม)
+        """
+        names = df['ชื่อ นามสกุล'].tolist() if 'ชื่อ นามสกุล' in df.columns else None
+        groups = df['กลุ่ม'].tolist() if 'กลุ่ม' in df.columns else [''] * len(df)
+        store = cls(df['รหัสนักศึกษา'].tolist(), groups, names=names)
+        for period, label in PERIOD_LABELS.items():
+            columns = [f'ชมรม{label} ช่วงที่ {slot}' for slot in range(1, NUM_SLOTS_PER_PERIOD + 1)]
+            store.assignments[:, PERIOD_INDEX[period]] = store.codec.encode_columns(df, columns, fill='')
+        return store
+
+    @classmethod
+    def from_students(cls, students, rank_scorer=None):
+        """
+        แปลง dict ของนักศึกษาแบบเดิมเป็น StudentStore
+        """
+        store = cls(students.keys(), [student['group'] for student in students.values()], rank_scorer=rank_scorer)
+        codes = store.codec.codes
+        empty = [NO_CLUB] * NUM_SLOTS_PER_PERIOD
+
+        # เก็บเป็น list แบนๆ ก่อนแล้วแปลงเป็น array ครั้งเดียว (เร็วกว่าเขียนลง array ทีละช่อง และไม่สร้าง list ย่อยค้างไว้)
+        # ชื่อใหม่ได้รหัสถัดไปผ่าน setdefault โดยตรงแทนการเรียก encode ทีละชื่อ แล้วเติม codec.names ตอนท้าย
+        main, backup, assignments, changes = [], [], [], []
+        for student in students.values():
+            for period in PERIODS:
+                preferences = student['preferences'][period]
+                row = [codes.setdefault(club, len(codes)) for club in preferences['main']]
+                main += row
+                main += empty[len(row):]
+                row = [codes.setdefault(club, len(codes)) for club in preferences['backup']]
+                backup += row
+                backup += empty[len(row):]
+                row = list(empty)
+                for slot, club in student['assignments'][period].items():
+                    row[slot - 1] = codes.setdefault(club, len(codes))
+                assignments += row
+                changes.append(student['changes'][period])
+        store.codec.names.extend(list(codes)[len(store.codec.names):])
+
+        store.main[:] = np.array(main, dtype=np.int16).reshape(store.main.shape)
+        store.backup[:] = np.array(backup, dtype=np.int16).reshape(store.backup.shape)
+        store.assignments[:] = np.array(assignments, dtype=np.int16).reshape(store.assignments.shape)
+        store.changes[:] = np.array(changes, dtype=np.int32).reshape(store.changes.shape)
+        store.set_rank_scorer(rank_scorer)
+        return store
+
+    def set_rank_scorer(self, rank_scorer):
+        """
+        กำหนดฟังก์ชันสร้างตารางคะแนนตามอันดับ (เช่น build_rank_scores) แล้วสร้าง rank_table ของนักศึกษาทุกคนในครั้งเดียว
+        rank_scorer ต้องให้คะแนนตามตำแหน่งในรายการหลัก/สำรองเท่านั้น จึงเรียกครั้งเดียวกับรายการตำแหน่ง
+        ชมรมที่อยู่หลายตำแหน่งได้คะแนนของตำแหน่งแรก (หลักก่อนสำรอง) เหมือน build_rank_scores
+        rank_scorer=None ลบตารางออก (เช่นก่อนบันทึก snapshot)
+        """
+        self.rank_scorer = rank_scorer
+        self.rank_table = None
+        if rank_scorer is None:
+            return
+        self.rank_table = self._rank_rows(self.main, self.backup)
+
+    def _rank_rows(self, main, backup):
+        """
+        ตารางคะแนนตามอันดับ (แถว, คาบ, รหัสชมรม) ของความชอบ main/backup ที่ระบุ (ความกว้างเท่าจำนวนรหัสใน codec)
+        """
+        num_main = main.shape[2]
+        positions = list(range(num_main + backup.shape[2]))
+        scores = self.rank_scorer({'period': {'main': positions[:num_main], 'backup': positions[num_main:]}})['period']
+        choices = np.concatenate([main, backup], axis=2)
+        table = np.full((len(choices), len(PERIODS), max(len(self.codec), 1)), NO_RANK, dtype=np.int16)
+        rows = np.arange(len(choices))
+        # เขียนจากตำแหน่งท้ายไปตำแหน่งแรก ตำแหน่งแรกของชมรมจึงเขียนทับเป็นค่าสุดท้าย
+        for position in reversed(positions):
+            for p in range(len(PERIODS)):
+                codes = choices[:, p, position]
+                present = codes != NO_CLUB
+                table[rows[present], p, codes[present]] = scores[position]
+        return table
+
+    def set_preferences(self, rows, main, backup):
+        """
+        เขียนความชอบใหม่ของแถวที่ระบุ (รหัสชมรมจาก codec เดียวกัน ขนาด (แถว, คาบ, ช่อง) เรียงชิดซ้ายแล้ว)
+        แล้วสร้าง rank_table เฉพาะแถวเหล่านั้นใหม่ (ขยายตารางเมื่อ codec มีชมรมใหม่)
+        """
+        self.main[rows] = main
+        self.backup[rows] = backup
+        if self.rank_table is None:
+            return
+        width = max(len(self.codec), 1)
+        if self.rank_table.shape[2] < width:
+            extra = np.full(self.rank_table.shape[:2] + (width - self.rank_table.shape[2],), NO_RANK, dtype=np.int16)
+            self.rank_table = np.concatenate([self.rank_table, extra], axis=2)
+        self.rank_table[rows] = self._rank_rows(self.main[rows], self.backup[rows])
+
+    def subset(self, student_ids):
+        """
+        StudentStore ใหม่ที่มีเฉพาะนักศึกษาที่ระบุ (ใช้รหัสชมรมชุดเดียวกัน) สำหรับส่งข้อมูลบางส่วนไปยัง worker process
+        """
+        student_ids = list(student_ids)
+        rows = np.array([self.rows[student_id] for student_id in student_ids], dtype=np.intp)
+        groups = [self.group_labels[code] if code >= 0 else '' for code in self.groups[rows].tolist()]
+        names = [self.names[row] for row in rows.tolist()] if self.names is not None else None
+        store = type(self)(student_ids, groups, codec=self.codec, names=names, rank_scorer=self.rank_scorer)
+        store.main = self.main[rows]
+        store.backup = self.backup[rows]
+        store.assignments = self.assignments[rows]
+        store.changes = self.changes[rows]
+        if self.rank_table is not None:
+            store.rank_table = self.rank_table[rows]
+        return store
+
+    def to_students(self):
+        """
+        แปลงกลับเป็น dict ของนักศึกษาแบบเดิม (สำหรับโค้ดที่ต้องการ dict จริงๆ)
+        """
+        # แปลงทั้ง array เป็น list ครั้งเดียวแทนการอ่านผ่าน StudentRecord ทีละคน
+        names = self.codec.names
+        main = self.main.tolist()
+        backup = self.backup.tolist()
+        slots = self.assignments.tolist()
+        changes = self.changes.tolist()
+        groups = self.groups.tolist()
+
+        students = {}
+        for row, student_id in enumerate(self.student_ids):
+            preferences = {
+                period: {'main': [names[code] for code in main[row][p] if code != NO_CLUB],
+                         'backup': [names[code] for code in backup[row][p] if code != NO_CLUB]}
+                for period, p in PERIOD_INDEX.items()
+            }
+            assignments = {
+                period: {slot: names[code] for slot, code in enumerate(slots[row][p], 1) if code != NO_CLUB}
+                for period, p in PERIOD_INDEX.items()
+            }
+            student = {
+                'group': self.group_labels[groups[row]] if groups[row] >= 0 else '',
+                'preferences': preferences,
+                'assignments': assignments,
+                'changes': {period: changes[row][p] for period, p in PERIOD_INDEX.items()},
+                'assigned_clubs': {period: Counter(assignments[period].values()) for period in PERIOD_INDEX},
+            }
+            if self.names is not None:
+                student['name'] = self.names[row]
+            if self.rank_scorer is not None:
+                student['rank_scores'] = self.rank_scorer(preferences)
+            students[student_id] = student
+        return students
+
+    def __getitem__(self, student_id):
+        return StudentRecord(self, self.rows[student_id])
+
+    def __iter__(self):
+        return iter(self.student_ids)
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def __contains__(self, student_id):
+        return student_id in self.rows
+
+    def decode_row(self, codes):
+        """
+        แปลงรหัสชมรมหนึ่งแถวเป็นรายการชื่อ (ข้ามช่อง NO_CLUB)
+        """
+        names = self.codec.names
+        return [names[code] for code in codes.tolist() if code != NO_CLUB]
+
+    def rank_score(self, row, period, club):
+        """
+        คะแนนตามอันดับของชมรมในคาบ (period เป็นตำแหน่งคาบ) จาก rank_table หรือ None ถ้าไม่อยู่ในรายการความชอบ
+        """
+        code = self.codec.codes.get(club)
+        if code is None or code >= self.rank_table.shape[2]:
+            return None
+        score = self.rank_table[row, period, code]
+        return None if score == NO_RANK else int(score)
+
+class StudentRecord(Mapping):
+    """
+    มุมมองของนักศึกษาหนึ่งคนใน StudentStore ใช้ key เดียวกับ dict ของนักศึกษาแบบเดิม
+    """
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def _keys(self):
+        keys = ['id', 'group', 'preferences', 'assignments', 'changes']
+        if self.store.names is not None:
+            keys.append('name')
+        if self.store.rank_table is not None:
+            keys.append('rank_scores')
+        return keys
+
+    def __getitem__(self, key):
+        store, row = self.store, self.row
+        if key == 'group':
+            code = store.groups[row]
+            return store.group_labels[code] if code >= 0 else ''
+        if key == 'assignments':
+            return PeriodViews(store, row, SlotAssignments)
+        if key == 'changes':
+            return ChangeCounts(store, row)
+        if key == 'preferences':
+            return PeriodViews(store, row, PeriodPreferences)
+        if key == 'rank_scores' and store.rank_table is not None:
+            return PeriodViews(store, row, RankScores)
+        if key == 'id':
+            return store.student_ids[row]
+        if key == 'name' and store.names is not None:
+            return store.names[row]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def assign(self, period, slot, club):
+        """
+        กำหนดชมรมในช่วงเวลาที่ระบุ
+        """
+        self.store.assignments[self.row, PERIOD_INDEX[period], slot - 1] = self.store.codec.encode(club)
+
+class PeriodViews(Mapping):
+    """
+    คาบ -> มุมมองของข้อมูลคาบนั้น (ใช้กับ assignments preferences และ rank_scores)
+    """
+    __slots__ = ('store', 'row', 'view')
+
+    def __init__(self, store, row, view):
+        self.store = store
+        self.row = row
+        self.view = view
+
+    def __getitem__(self, period):
+        return self.view(self.store, self.row, period)
+
+    def __iter__(self):
+        return iter(PERIODS)
+
+    def __len__(self):
+        return len(PERIODS)
+
+class SlotAssignments(MutableMapping):
+    """
+    ช่วงเวลา -> ชื่อชมรมที่ได้รับ ของนักศึกษาหนึ่งคนในคาบหนึ่ง (ช่วงเวลาที่ยังไม่ได้รับชมรมไม่มี key)
+    """
+    __slots__ = ('store', 'row', 'period')
+
+    def __init__(self, store, row, period):
+        self.store = store
+        self.row = row
+        self.period = PERIOD_INDEX[period]
+
+    def __getitem__(self, slot):
+        if not 1 <= slot <= NUM_SLOTS_PER_PERIOD:
+            raise KeyError(slot)
+        code = self.store.assignments[self.row, self.period, slot - 1]
+        if code == NO_CLUB:
+            raise KeyError(slot)
+        return self.store.codec.names[code]
+
+    def __setitem__(self, slot, club):
+        if not 1 <= slot <= NUM_SLOTS_PER_PERIOD:
+            raise KeyError(slot)
+        self.store.assignments[self.row, self.period, slot - 1] = self.store.codec.encode(club)
+
+    def __delitem__(self, slot):
+        self[slot]
+        self.store.assignments[self.row, self.period, slot - 1] = NO_CLUB
+
+    def __iter__(self):
+        codes = self.store.assignments[self.row, self.period].tolist()
+        return iter([slot for slot, code in enumerate(codes, 1) if code != NO_CLUB])
+
+    def __len__(self):
+        return int(np.count_nonzero(self.store.assignments[self.row, self.period] != NO_CLUB))
+
+    def copy(self):
+        return dict(self)
+
+class PeriodPreferences(Mapping):
+    """
+    'main' / 'backup' -> รายการชื่อชมรมตามอันดับของนักศึกษาหนึ่งคนในคาบหนึ่ง (แปลงเฉพาะรายการที่อ่าน)
+    """
+    __slots__ = ('store', 'row', 'period')
+
+    def __init__(self, store, row, period):
+        self.store = store
+        self.row = row
+        self.period = PERIOD_INDEX[period]
+
+    def __getitem__(self, key):
+        if key == 'main':
+            return self.store.decode_row(self.store.main[self.row, self.period])
+        if key == 'backup':
+            return self.store.decode_row(self.store.backup[self.row, self.period])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('main', 'backup'))
+
+    def __len__(self):
+        return 2
+
+class RankScores(Mapping):
+    """
+    ชื่อชมรม -> คะแนนตามอันดับของนักศึกษาหนึ่งคนในคาบหนึ่ง (ค้นจาก rank_table แทน dict ของ build_rank_scores)
+    เรียงตามลำดับเดียวกับ build_rank_scores: รายการหลักแล้วสำรอง โดยนับชมรมที่ซ้ำครั้งเดียว
+    """
+    __slots__ = ('store', 'row', 'period')
+
+    def __init__(self, store, row, period):
+        self.store = store
+        self.row = row
+        self.period = PERIOD_INDEX[period]
+
+    def get(self, club, default=None):
+        score = self.store.rank_score(self.row, self.period, club)
+        return default if score is None else score
+
+    def __getitem__(self, club):
+        score = self.store.rank_score(self.row, self.period, club)
+        if score is None:
+            raise KeyError(club)
+        return score
+
+    def __contains__(self, club):
+        return self.store.rank_score(self.row, self.period, club) is not None
+
+    def __iter__(self):
+        codes = self.store.main[self.row, self.period].tolist() + self.store.backup[self.row, self.period].tolist()
+        names = self.store.codec.names
+        return iter([names[code] for code in dict.fromkeys(codes) if code != NO_CLUB])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+class ChangeCounts(MutableMapping):
+    """
+    คาบ -> จำนวนการเปลี่ยนแปลงของนักศึกษาหนึ่งคน
+    """
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, period):
+        return int(self.store.changes[self.row, PERIOD_INDEX[period]])
+
+    def __setitem__(self, period, changes):
+        self.store.changes[self.row, PERIOD_INDEX[period]] = changes
+
+    def __delitem__(self, period):
+        raise TypeError("Change counts cannot be deleted")
+
+    def __iter__(self):
+        return iter(PERIODS)
+
+    def __len__(self):
+        return len(PERIODS)
@@ -0,0 +1,17 @@
+#fixture ที่การทดสอบใช้ร่วมกัน: ผลการจัดสรร test_250.csv ที่คำนวณครั้งเดียวต่อการรันทดสอบ
+import pytest
+
+import club_allocation_optimal as allocation
+
+from helpers import INPUT_FILE, quietly
+
+@pytest.fixture(scope='session')
+def input_file():
+    return INPUT_FILE
+
+@pytest.fixture(scope='session')
+def dict_allocation(input_file):
+    """
+    ผลการจัดสรร test_250.csv แบบ dict และ engine python (students, time_slots, clubs)
+    """
+    return quietly(allocation.optimize_club_allocation, input_file)
@@ -0,0 +1,32 @@
+#ฟังก์ชันที่การทดสอบใช้ร่วมกัน: จัดสรร test_250.csv โดยไม่แสดงข้อความระหว่างทาง และแปลงผลให้เทียบกันได้
+import contextlib
+import io
+import os
+
+import club_allocation_optimal as allocation
+
+INPUT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_250.csv')
+
+def quietly(function, *args, **kwargs):
+    """
+    เรียกฟังก์ชันโดยไม่แสดงข้อความที่พิมพ์ออกมา
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+def snapshot(students, time_slots):
+    """
+    ผลการจัดสรรในรูปที่เทียบกันได้: ตารางผล (results_frame) และสมาชิกของทุกชมรมตามลำดับที่เข้าชมรม
+    """
+    members = {(period, slot, club): list(slot_members.items())
+               for period in time_slots for slot in time_slots[period]
+               for club, slot_members in time_slots[period][slot].items()}
+    return allocation.results_frame(students), members
+
+def assert_same_allocation(actual, expected):
+    """
+    ตรวจสอบว่าผลการจัดสรรสองชุด (จาก snapshot) เหมือนกันทุกคอลัมน์และทุกชมรม
+    """
+    (actual_frame, actual_members), (expected_frame, expected_members) = actual, expected
+    assert actual_frame.equals(expected_frame)
+    assert actual_members == expected_members
@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+
+import allocation_core as core
+import allocation_log
+import club_allocation_optimal as allocation
+from allocation_log import RepairLog, configure_logging
+
+from helpers import INPUT_FILE
+
+@pytest.fixture
+def restore_logging():
+    """
+    คืนค่า handler และระดับของ logger หลักหลังการทดสอบที่เรียก configure_logging
+    """
+    logger = allocation_log.logger
+    handlers, level, console_level = list(logger.handlers), logger.level, allocation_log.console_handler.level
+    yield
+    for handler in logger.handlers:
+        if handler not in handlers:
+            handler.close()
+    logger.handlers[:] = handlers
+    logger.setLevel(level)
+    allocation_log.console_handler.setLevel(console_level)
+
+def test_repair_log_summarises_moves_per_slot(capsys):
+    log = RepairLog()
+    assert not log.detail
+    for student_id in range(3):
+        log.move('morning', 2, 'overcrowding', student_id, 'A', 'B')
+    log.move('morning', 2, 'representation', 9, 'B', 'A')
+    log.move('afternoon', 1, 'overcrowding', 4, 'A', 'B')
+    log.warning('afternoon', 1, 'over_limit', 'A', 40)
+    log.report("Repair moves")
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == ["Repair moves by period and slot:",
+                     "  morning slot 2: 4 moves (overcrowding 3, representation 1)",
+                     "  afternoon slot 1: 1 moves (overcrowding 1)",
+                     "  WARNING: afternoon slot 1: 1 clubs not fixed (could not reduce 1)"]
+
+def test_warning_level_hides_the_summary(restore_logging, capsys):
+    configure_logging('warning')
+    log = RepairLog()
+    log.move('morning', 1, 'overcrowding', 1, 'A', 'B')
+    log.warning('morning', 1, 'unrepresented', 'A')
+    log.report("Repair moves")
+    assert capsys.readouterr().out.splitlines() == ["  WARNING: morning slot 1: 1 clubs not fixed (no representative 1)"]
+
+def test_move_log_records_every_move(restore_logging, tmp_path, capsys):
+    move_log = tmp_path / 'moves.log'
+    configure_logging('info', str(move_log))
+    students, time_slots, clubs = allocation.optimize_club_allocation(INPUT_FILE)
+    out = capsys.readouterr().out
+    assert 'moved student' not in out
+
+    moves = [line for line in move_log.read_text(encoding='utf-8').splitlines() if 'moved student' in line]
+    total = int(next(line for line in out.splitlines() if line.startswith('Total repair moves:')).split(':')[1])
+    assert len(moves) == total
+    assert all(line.startswith('selectclub.moves DEBUG ') for line in moves)
+    assert core.count_violations(time_slots, clubs) == (0, 21)
+    assert logging.getLogger(allocation_log.LOGGER_NAME).isEnabledFor(logging.DEBUG)
@@ -0,0 +1,66 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+import club_allocation_optimal as allocation
+from allocation_log import capture_to_file
+from result_io import read_results
+
+from helpers import quietly
+
+@pytest.fixture(scope='module')
+def batch_dir(input_file, tmp_path_factory):
+    """
+    โฟลเดอร์นำเข้าที่มีไฟล์ที่ถูกต้องหนึ่งไฟล์ (test_250.csv) และไฟล์ที่ไม่มีคอลัมน์ความต้องการหนึ่งไฟล์
+    """
+    directory = tmp_path_factory.mktemp('batch')
+    shutil.copy(input_file, directory / 'cohort_a.csv')
+    pd.DataFrame({'รหัสนักศึกษา': [680710001], 'ชื่อ นามสกุล': ['']}).to_csv(directory / 'cohort_b.csv', index=False)
+    return directory
+
+@pytest.fixture(scope='module')
+def batch_run(batch_dir, tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp('batch_results')
+    summary = quietly(allocation.run_batch, allocation.find_batch_files(str(batch_dir)), str(output_dir), workers=1)
+    return summary, output_dir
+
+def test_batch_summary_records_each_file(batch_run, dict_allocation):
+    summary, output_dir = batch_run
+    assert summary['status'].tolist() == ['ok', 'failed']
+    assert summary['error'].iloc[1] != ''
+
+    students, time_slots, clubs = dict_allocation
+    statistics = quietly(allocation.calculate_statistics, students, time_slots, clubs)
+    assert summary['students'].iloc[0] == len(students)
+    assert summary['average_satisfaction'].iloc[0] == statistics['average_satisfaction']
+    assert len(read_results(summary['output_file'].iloc[0])) == len(students)
+
+    saved = pd.read_csv(output_dir / allocation.BATCH_SUMMARY_FILE, encoding='utf-8-sig')
+    assert saved['status'].tolist() == ['ok', 'failed']
+
+def test_batch_logs_go_to_one_file_per_input(batch_run):
+    _, output_dir = batch_run
+    ok_log = (output_dir / 'cohort_a_results.log').read_text(encoding='utf-8')
+    assert 'Reading data from' in ok_log  # print ของขั้นตอนจัดสรร
+    assert 'Repair moves by period and slot' in ok_log  # ข้อความของ RepairLog
+
+    failed_log = (output_dir / 'cohort_b_results.log').read_text(encoding='utf-8')
+    assert 'Allocation of' in failed_log and 'Traceback' in failed_log
+
+def test_batch_progress_is_logged_on_the_console(batch_dir, tmp_path, capsys):
+    allocation.run_batch(allocation.find_batch_files(str(batch_dir / 'cohort_a.csv')), str(tmp_path), workers=1)
+    out = capsys.readouterr().out
+    assert '===== Batch Summary =====' in out
+    assert '1 of 1 files allocated' in out
+
+def test_capture_to_file_restores_the_console(tmp_path, capsys):
+    path = tmp_path / 'capture.log'
+    with capture_to_file(str(path)):
+        print("printed inside")
+        allocation.batch_logger.info("logged inside")
+    allocation.batch_logger.info("logged after")
+
+    assert path.read_text(encoding='utf-8').splitlines() == ["printed inside", "logged inside"]
+    out = capsys.readouterr().out
+    assert 'inside' not in out and 'logged after' in out
@@ -0,0 +1,45 @@
+import shutil
+
+import pytest
+
+import club_allocation_optimal as allocation
+from checkpoint import StaleCheckpointError, checkpoint_path
+
+from helpers import assert_same_allocation, quietly, snapshot
+
+@pytest.fixture(scope='module')
+def checkpointed(input_file, tmp_path_factory):
+    """
+    จัดสรร test_250.csv พร้อมบันทึก snapshot ทุกขั้นตอน คืนค่า (โฟลเดอร์ snapshot, ผลการจัดสรร)
+    """
+    checkpoint_dir = str(tmp_path_factory.mktemp('checkpoints'))
+    result = quietly(allocation.optimize_club_allocation, input_file, checkpoint_dir=checkpoint_dir)
+    return checkpoint_dir, result
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_load_returns_the_saved_allocation(input_file, checkpointed, compact):
+    checkpoint_dir, (students, time_slots, clubs) = checkpointed
+    stage, loaded_students, loaded_time_slots, loaded_clubs, _ = quietly(
+        allocation.load_allocation_checkpoint, checkpoint_path(checkpoint_dir, 'adjusted'), input_file, compact)
+
+    assert stage == 'adjusted'
+    assert loaded_clubs == clubs
+    assert_same_allocation(snapshot(loaded_students, loaded_time_slots), snapshot(students, time_slots))
+
+@pytest.mark.parametrize('stage', ['initial', 'representation', 'adjusted'])
+def test_resume_matches_the_uninterrupted_run(input_file, checkpointed, stage):
+    checkpoint_dir, (students, time_slots, _) = checkpointed
+    resumed = quietly(allocation.optimize_club_allocation, input_file,
+                      resume=checkpoint_path(checkpoint_dir, stage))
+
+    assert_same_allocation(snapshot(*resumed[:2]), snapshot(students, time_slots))
+
+def test_changed_input_is_rejected(input_file, tmp_path):
+    copied_input = str(tmp_path / 'input.csv')
+    shutil.copyfile(input_file, copied_input)
+    quietly(allocation.optimize_club_allocation, copied_input, checkpoint_dir=str(tmp_path))
+    with open(copied_input, 'a', encoding='utf-8') as f:
+        f.write('\n')
+
+    with pytest.raises(StaleCheckpointError):
+        quietly(allocation.load_allocation_checkpoint, checkpoint_path(str(tmp_path), 'initial'), copied_input)
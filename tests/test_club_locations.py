@@ -0,0 +1,40 @@
+import math
+
+import pytest
+
+import allocation_core as core
+import Pathoptimize as paths
+from club_locations import UNKNOWN_DISTANCE, ClubDistanceMatrix, calculate_distance, club_buildings
+
+UNKNOWN_CLUB = 'ชมรมที่ไม่มีพิกัด'
+
+@pytest.fixture(scope='module')
+def clubs():
+    names = list(club_buildings)
+    return {'morning': names[:4] + [UNKNOWN_CLUB], 'afternoon': names[4:8]}
+
+def test_matrix_matches_pairwise_distances():
+    matrix = ClubDistanceMatrix(club_buildings)
+    for club in list(club_buildings)[:6]:
+        for other in club_buildings:
+            assert matrix.distance(club, other) == calculate_distance(club_buildings[club], club_buildings[other])
+
+def test_unknown_clubs_have_the_same_distance_everywhere(clubs):
+    route = core.WalkingRoute(clubs)
+    located = clubs['morning'][0]
+    assert math.isinf(UNKNOWN_DISTANCE)
+    assert calculate_distance('อาคารที่ไม่มี', 'อาคาร 1') == UNKNOWN_DISTANCE
+    assert paths.club_distances.distance(located, UNKNOWN_CLUB) == UNKNOWN_DISTANCE
+    assert route.distances[located][UNKNOWN_CLUB] == UNKNOWN_DISTANCE
+    assert route.unlocated == [UNKNOWN_CLUB]
+
+    assignments = {period: dict(enumerate(clubs[period][-4:], 1)) for period in core.PERIODS}
+    student = {'assignments': assignments}
+    assert paths.calculate_student_total_distance(student) == UNKNOWN_DISTANCE
+    assert route.student_distance(student) == UNKNOWN_DISTANCE
+
+def test_distance_weight_rejects_unknown_clubs(clubs):
+    with pytest.raises(ValueError, match=UNKNOWN_CLUB):
+        core.create_walking_route(clubs, distance_weight=1000)
+    located = {'morning': clubs['morning'][:4], 'afternoon': clubs['afternoon']}
+    assert core.create_walking_route(located, distance_weight=1000).unlocated == []
@@ -0,0 +1,60 @@
+import json
+
+import pandas as pd
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+import Pathoptimize as paths
+from convergence import ConvergenceTrace
+
+from helpers import quietly, snapshot, assert_same_allocation
+
+@pytest.fixture(scope='module')
+def traced_allocation(input_file):
+    trace = ConvergenceTrace('adjust_assignments', 'satisfaction')
+    result = quietly(allocation.optimize_club_allocation, input_file, trace=trace)
+    return trace, result
+
+def test_adjustment_trace_follows_the_repair(traced_allocation, dict_allocation):
+    trace, (students, time_slots, clubs) = traced_allocation
+    frame = trace.to_frame()
+    assert len(frame) == 1 + len(core.PERIODS) * core.NUM_SLOTS_PER_PERIOD
+    assert frame['iteration'].tolist() == list(range(len(frame)))
+    assert frame['moves'].iloc[0] == 0 and frame['moves'].sum() > 0
+    assert frame['seconds'].is_monotonic_increasing
+
+    last = frame.iloc[-1]
+    assert last['objective'] == core.calculate_total_satisfaction(students)
+    assert (last['over_limit'], last['missing_groups']) == core.count_violations(time_slots, clubs)
+
+    # การเก็บ trace ไม่เปลี่ยนผลการจัดสรร
+    assert_same_allocation(snapshot(students, time_slots), snapshot(*dict_allocation[:2]))
+
+@pytest.mark.parametrize('extension', ['.csv', '.json'])
+def test_trace_files_hold_every_row(traced_allocation, extension, tmp_path):
+    trace, _ = traced_allocation
+    path = str(tmp_path / f'trace{extension}')
+    quietly(trace.save, path)
+    if extension == '.json':
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        assert (saved['loop'], saved['objective']) == ('adjust_assignments', 'satisfaction')
+        assert saved['rows'] == trace.rows
+    else:
+        saved = pd.read_csv(path, encoding='utf-8-sig', keep_default_na=False)
+        pd.testing.assert_frame_equal(saved.drop(columns='period'), trace.to_frame().drop(columns='period'))
+        assert saved['period'].tolist() == [row['period'] for row in trace.rows]
+
+def test_swap_trace_ends_at_the_final_distance(dict_allocation):
+    students, _, _ = dict_allocation
+    path_students = quietly(paths.create_student_data, allocation.results_frame(students))
+    trace = ConvergenceTrace('perform_swaps', 'distance')
+    _, swaps, distance_before, distance_after = quietly(paths.perform_swaps, path_students, 5, trace)
+
+    frame = trace.to_frame()
+    assert len(frame) == 1 + len(swaps)
+    assert frame['objective'].iloc[0] == pytest.approx(distance_before)
+    assert frame['objective'].iloc[-1] == pytest.approx(distance_after)
+    assert frame['objective'].is_monotonic_decreasing
+    assert frame['benefit'].iloc[1:].tolist() == pytest.approx([swap['benefit'] for swap in swaps])
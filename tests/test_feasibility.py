@@ -0,0 +1,48 @@
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+from benchmark_allocation import scale_input
+
+from helpers import quietly
+
+@pytest.fixture(scope='module')
+def input_df(input_file):
+    return quietly(allocation.read_data, input_file)
+
+def check(df):
+    """
+    ผลของ check_feasibility และผลการจัดสรรจริงของ df (report, time_slots, clubs)
+    """
+    df = allocation.assign_groups(df.drop(columns='group', errors='ignore'))
+    clubs = allocation.get_all_clubs(df)
+    report = allocation.check_feasibility(df, clubs, allocation.count_preferences(df, clubs))
+    students = allocation.create_student_preferences(df)
+    time_slots = quietly(allocation.initial_assignment, students, clubs)
+    missing = quietly(allocation.check_group_representation, students, time_slots, clubs)
+    time_slots = quietly(allocation.adjust_assignments, students, time_slots, clubs, missing)
+    return report, time_slots, clubs
+
+def test_demand_matches_the_main_choices(input_df):
+    report, _, clubs = check(input_df)
+    assert report['feasible']
+    for period, label in [('morning', 'เช้า'), ('afternoon', 'บ่าย')]:
+        main = input_df[[f'ฐาน{label} อันดับที่ {i}' for i in range(1, 5)]].notna().sum(axis=1)
+        assert report[period]['slot_demand'] == [int((main >= slot).sum()) for slot in range(1, 5)]
+        assert report[period]['slot_supply'] == len(clubs[period]) * core.MAX_STUDENTS_PER_CLUB
+
+def test_excess_students_predict_over_limit_slots(input_df):
+    report, time_slots, clubs = check(scale_input(input_df, 1000))
+    assert not report['feasible']
+    assert report['morning']['required_limit'] == -(-1000 // len(clubs['morning']))
+    assert set(report['morning']['excess_students']) == {1, 2, 3, 4}
+    over_limit, _ = core.count_violations(time_slots, clubs)
+    assert over_limit > 0
+
+def test_short_groups_bound_the_missing_representation(input_df):
+    report, time_slots, clubs = check(input_df.iloc[:60])
+    assert not report['feasible']
+    predicted = sum(missing for period in core.PERIODS for groups in report[period]['short_groups'].values()
+                    for missing in groups.values())
+    _, missing_groups = core.count_violations(time_slots, clubs)
+    assert predicted > 0 and missing_groups >= predicted
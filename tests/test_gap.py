@@ -0,0 +1,40 @@
+import allocation_core as core
+import club_allocation_optimal as allocation
+from local_search import improve_assignments
+
+from helpers import quietly
+
+def test_gap_is_measured_against_the_ideal_bound(dict_allocation):
+    students, time_slots, clubs = dict_allocation
+    statistics = quietly(allocation.calculate_statistics, students, time_slots, clubs)
+    upper_bound = core.calculate_satisfaction_upper_bound(students)
+
+    assert statistics['bound'] == 'ideal'
+    assert statistics['upper_bound'] == upper_bound / len(students)
+    assert statistics['optimality_gap'] == core.calculate_gap(core.calculate_total_satisfaction(students), upper_bound)
+    assert not statistics['feasible']
+    assert allocation.describe_gap(statistics) == (f" (allocation violates the limits: {statistics['over_limit']} "
+                                                   f"over-limit slots, {statistics['missing_groups']} missing groups)")
+
+def test_negative_gap_is_clamped(dict_allocation):
+    students, time_slots, clubs = dict_allocation
+    total = core.calculate_total_satisfaction(students)
+    statistics = quietly(allocation.calculate_statistics, students, time_slots, clubs, upper_bound=total - 100)
+    assert statistics['gap_clamped'] and statistics['optimality_gap'] == 0.0
+    assert 'negative gap clamped to 0' in allocation.describe_gap(statistics)
+    assert core.calculate_gap(total, 0) == 0.0
+
+def test_local_search_stops_at_the_target_gap(input_file):
+    students, time_slots, clubs = quietly(allocation.optimize_club_allocation, input_file)
+    upper_bound = core.calculate_satisfaction_upper_bound(students)
+    start_gap = core.calculate_gap(core.calculate_total_satisfaction(students), upper_bound)
+    target_gap = start_gap - 0.002
+
+    summary = quietly(improve_assignments, students, time_slots, clubs, max_iterations=50000, target_gap=target_gap)
+    assert summary['iterations'] < 50000
+    assert core.calculate_gap(core.calculate_total_satisfaction(students), upper_bound) <= target_gap
+
+def test_reached_target_skips_the_search(dict_allocation):
+    students, time_slots, clubs = dict_allocation
+    summary = quietly(improve_assignments, students, time_slots, clubs, max_iterations=1000, target_gap=1.0)
+    assert summary['iterations'] == 0 and summary['gain'] == 0
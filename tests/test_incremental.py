@@ -0,0 +1,116 @@
+import sys
+
+import pandas as pd
+import pytest
+
+import club_allocation_optimal as allocation
+from incremental import DELTA_ACTION_COLUMN
+from result_io import read_results
+
+from helpers import assert_same_allocation, quietly, snapshot
+
+ADDED_IDS = ['990000001', '990000002']
+
+@pytest.fixture(scope='module')
+def delta_files(input_file, dict_allocation, tmp_path_factory):
+    """
+    ผลการจัดสรร test_250.csv ที่บันทึกแล้ว และไฟล์ delta ที่ลบนักศึกษาสองคน เปลี่ยนความต้องการช่วงเช้าของหนึ่งคน
+    (กลับลำดับทั้ง 8 อันดับ) และเพิ่มนักศึกษาใหม่สองคน คืนค่า (ไฟล์ผลครั้งก่อน, ไฟล์ delta, delta)
+    """
+    directory = tmp_path_factory.mktemp('delta')
+    students, time_slots, clubs = dict_allocation
+    previous_file = str(directory / 'previous.csv')
+    statistics = quietly(allocation.calculate_statistics, students, time_slots, clubs)
+    quietly(allocation.save_results, students, clubs, statistics, previous_file)
+
+    df = pd.read_csv(input_file, encoding='utf-8-sig')
+    removed = df.iloc[[0, 1]].assign(**{DELTA_ACTION_COLUMN: 'remove'})
+    changed = df.iloc[[2]].assign(**{DELTA_ACTION_COLUMN: 'change'})
+    columns = [f'ฐานเช้า อันดับที่ {i}' for i in range(1, 9)]
+    changed[columns] = changed[columns].to_numpy()[:, ::-1]
+    added = df.iloc[[3, 4]].assign(**{DELTA_ACTION_COLUMN: 'add'})
+    added['รหัสนักศึกษา'] = [int(student_id) for student_id in ADDED_IDS]
+    delta = pd.concat([removed, changed, added], ignore_index=True)
+    delta_file = str(directory / 'delta.csv')
+    delta.to_csv(delta_file, index=False)
+    return previous_file, delta_file, delta
+
+@pytest.fixture(scope='module')
+def reallocated(delta_files):
+    previous_file, delta_file, _ = delta_files
+    return quietly(allocation.reallocate_incremental, previous_file, delta_file)
+
+def test_delta_adds_removes_and_changes_students(dict_allocation, delta_files, reallocated):
+    students, _, _ = dict_allocation
+    _, _, delta = delta_files
+    new_students, _, _ = reallocated
+    actions = dict(zip(delta['รหัสนักศึกษา'].astype(str), delta[DELTA_ACTION_COLUMN]))
+
+    removed = {student_id for student_id, action in actions.items() if action == 'remove'}
+    assert set(new_students) == (set(students) - removed) | set(ADDED_IDS)
+
+    changed_id = next(student_id for student_id, action in actions.items() if action == 'change')
+    expected_main = list(reversed(students[changed_id]['preferences']['morning']['backup']))
+    assert new_students[changed_id]['preferences']['morning']['main'] == expected_main
+
+    for student_id in ADDED_IDS:
+        for period in allocation.PERIODS:
+            assignments = list(new_students[student_id]['assignments'][period].values())
+            assert len(assignments) == len(new_students[student_id]['preferences'][period]['main'])
+            assert len(set(assignments)) == len(assignments)
+
+def test_delta_keeps_the_index_consistent(reallocated):
+    students, time_slots, clubs = reallocated
+    expected = {}
+    for student_id in students:
+        student = students[student_id]
+        for period in allocation.PERIODS:
+            for slot, club in student['assignments'][period].items():
+                expected.setdefault((period, slot, club), {})[student_id] = student['group']
+    for period in allocation.PERIODS:
+        for slot in time_slots[period]:
+            for club in clubs[period]:
+                assert dict(time_slots[period][slot][club]) == expected.get((period, slot, club), {})
+
+def test_delta_only_moves_students_it_records(dict_allocation, delta_files, reallocated):
+    students, time_slots, clubs = dict_allocation
+    _, _, delta = delta_files
+    new_students, new_time_slots, new_clubs = reallocated
+    in_delta = set(delta['รหัสนักศึกษา'].astype(str))
+
+    for student_id in set(students) - in_delta:
+        for period in allocation.PERIODS:
+            before = students[student_id]['assignments'][period]
+            after = dict(new_students[student_id]['assignments'][period])
+            moved_slots = sum(1 for slot in before if after.get(slot) != before[slot])
+            assert new_students[student_id]['changes'][period] - students[student_id]['changes'][period] >= moved_slots
+
+    over_limit, missing = allocation.count_violations(time_slots, clubs)
+    new_over_limit, new_missing = allocation.count_violations(new_time_slots, new_clubs)
+    assert new_over_limit <= over_limit
+    assert new_missing <= missing
+
+def test_delta_is_deterministic(delta_files, reallocated):
+    previous_file, delta_file, _ = delta_files
+    again = quietly(allocation.reallocate_incremental, previous_file, delta_file)
+    assert_same_allocation(snapshot(*again[:2]), snapshot(*reallocated[:2]))
+
+@pytest.mark.parametrize('option', [['--engine', 'numpy'], ['--initial-strategy', 'balanced'],
+                                    ['--distance-weight', '1000'], ['--local-search', '--search-iterations', '10']])
+def test_delta_rejects_allocation_options(delta_files, option, monkeypatch, capsys):
+    previous_file, delta_file, _ = delta_files
+    monkeypatch.setattr(sys, 'argv', ['club_allocation_optimal.py', '--delta', delta_file,
+                                      '--previous', previous_file, *option])
+    with pytest.raises(SystemExit) as error:
+        allocation.main()
+    assert error.value.code == 2
+    assert option[0] in capsys.readouterr().err
+
+def test_delta_cli_writes_the_reallocation(delta_files, reallocated, tmp_path, monkeypatch):
+    previous_file, delta_file, _ = delta_files
+    output_file = str(tmp_path / 'updated.csv')
+    monkeypatch.setattr(sys, 'argv', ['club_allocation_optimal.py', '--delta', delta_file, '--previous', previous_file,
+                                      '--output', output_file, '--bound', 'ideal', '--compact'])
+    quietly(allocation.main)
+    students, _, _ = reallocated
+    assert len(read_results(output_file)) == len(students)
@@ -0,0 +1,56 @@
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+
+from helpers import quietly
+
+@pytest.fixture(scope='module')
+def prepared(input_file):
+    """
+    ข้อมูลก่อนจัดสรรของ test_250.csv (df, clubs, จำนวนผู้เลือกแต่ละชมรม)
+    """
+    df = allocation.assign_groups(quietly(allocation.read_data, input_file))
+    clubs = allocation.get_all_clubs(df)
+    return df, clubs, allocation.count_preferences(df, clubs)
+
+def allocate(prepared, strategy):
+    """
+    จัดสรรเบื้องต้นด้วย strategy แล้วปรับปรุง คืนค่า (students, ขนาดชมรมหลังจัดสรรเบื้องต้น, time_slots)
+    """
+    df, clubs, club_counts = prepared
+    students = allocation.create_student_preferences(df)
+    time_slots = quietly(allocation.initial_assignment, students, clubs, strategy=strategy, club_counts=club_counts)
+    sizes = {(period, slot, club): time_slots.size(period, slot, club)
+             for period in core.PERIODS for slot in range(1, core.NUM_SLOTS_PER_PERIOD + 1) for club in clubs[period]}
+    missing = quietly(allocation.check_group_representation, students, time_slots, clubs)
+    time_slots = quietly(allocation.adjust_assignments, students, time_slots, clubs, missing)
+    return students, sizes, time_slots
+
+def test_balanced_slots_keep_every_main_choice(prepared):
+    df, clubs, club_counts = prepared
+    students = allocation.create_student_preferences(df)
+    quietly(allocation.initial_assignment, students, clubs, strategy='balanced', club_counts=club_counts)
+    for student in students.values():
+        for period in core.PERIODS:
+            main = student['preferences'][period]['main'][:core.NUM_SLOTS_PER_PERIOD]
+            assert sorted(student['assignments'][period].values()) == sorted(main)
+
+def test_balanced_start_needs_fewer_repairs(prepared):
+    _, clubs, club_counts = prepared
+    results = {strategy: allocate(prepared, strategy) for strategy in core.INITIAL_STRATEGIES}
+    quotas = core.calculate_slot_quotas(clubs, club_counts)
+
+    rank_students, rank_sizes, rank_slots = results['rank']
+    balanced_students, balanced_sizes, balanced_slots = results['balanced']
+    over_quota = lambda sizes: sum(size > quotas[period][club] for (period, _, club), size in sizes.items())
+    assert over_quota(balanced_sizes) < over_quota(rank_sizes)
+
+    changes = lambda students: sum(sum(student['changes'].values()) for student in students.values())
+    assert changes(balanced_students) < changes(rank_students)
+    assert core.count_violations(balanced_slots, clubs) <= core.count_violations(rank_slots, clubs)
+
+def test_unknown_strategy_is_rejected(prepared):
+    df, clubs, _ = prepared
+    with pytest.raises(ValueError, match='Unknown initial assignment strategy'):
+        allocation.initial_assignment(allocation.create_student_preferences(df), clubs, strategy='random')
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+from local_search import improve_assignments
+
+from helpers import quietly
+
+@pytest.fixture(scope='module')
+def improved(input_file):
+    """
+    ผลการจัดสรร test_250.csv ก่อนและหลังการค้นหาเฉพาะที่ (คะแนนรวมและจำนวนที่ผิดเงื่อนไขก่อนค้นหา, ผลสรุป, ผลการจัดสรร)
+    """
+    students, time_slots, clubs = quietly(allocation.optimize_club_allocation, input_file)
+    before = (core.calculate_total_satisfaction(students), core.count_violations(time_slots, clubs))
+    summary = quietly(improve_assignments, students, time_slots, clubs, max_iterations=5000)
+    return before, summary, (students, time_slots, clubs)
+
+def test_search_gain_matches_total_satisfaction(improved):
+    (total, _), summary, (students, _, _) = improved
+    assert summary['gain'] > 0
+    assert core.calculate_total_satisfaction(students) == total + summary['gain']
+
+def test_search_keeps_constraints_and_index(improved):
+    (_, violations), _, (students, time_slots, clubs) = improved
+    assert core.count_violations(time_slots, clubs) <= violations
+    for period in core.PERIODS:
+        for slot in range(1, core.NUM_SLOTS_PER_PERIOD + 1):
+            for club in clubs[period]:
+                for student_id in time_slots[period][slot][club]:
+                    assert students[student_id]['assignments'][period][slot] == club
+
+def test_move_delta_matches_rescoring_the_period(dict_allocation):
+    students, _, clubs = dict_allocation
+    rng = random.Random(0)
+    for student in rng.sample(list(students.values()), 50):
+        for period in core.PERIODS:
+            # ตรวจทั้งการจัดสรรจริงและการจัดสรรที่ได้ชมรมเดียวกันสองช่วงเวลา (ย้ายออกจากชมรมซ้ำ)
+            duplicated = {**student['assignments'][period], 2: student['assignments'][period][1]}
+            for assignments in (student['assignments'][period], duplicated):
+                view = {**student, 'assignments': {period: assignments}}
+                for slot in assignments:
+                    for club in clubs[period]:
+                        expected = (core.calculate_period_satisfaction(view, period, {**assignments, slot: club})
+                                    - core.calculate_period_satisfaction(view, period))
+                        assert core.calculate_move_delta(view, period, slot, club) == expected
@@ -0,0 +1,66 @@
+import random
+
+import pandas as pd
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+import milp_solver
+
+from helpers import quietly
+
+pytest.importorskip('scipy')
+
+NUM_STUDENTS = 100  # 10 คนต่อกลุ่ม มากกว่าจำนวนชมรม จึงจัดตัวแทนทุกกลุ่มในทุกชมรมได้
+NUM_CLUBS = 8
+
+@pytest.fixture(scope='module')
+def small_input(tmp_path_factory):
+    """
+    ไฟล์ข้อมูลนักศึกษา 100 คน ชมรมละ 8 ชมรมต่อคาบ โดยชมรมลำดับต้นถูกเลือกเป็นอันดับต้นบ่อยกว่า
+    (ความต้องการกระจุกตัว greedy จึงไม่ได้คำตอบที่ดีที่สุด)
+    """
+    rng = random.Random(0)
+    rows = []
+    for index in range(NUM_STUDENTS):
+        row = {'รหัสนักศึกษา': 680710000 + index, 'ชื่อ นามสกุล': ''}
+        for label, prefix in (('ฐานเช้า', 'M'), ('ฐานบ่าย', 'A')):
+            clubs = [f'{prefix}{number}' for number in range(1, NUM_CLUBS + 1)]
+            ranked = sorted(clubs, key=lambda club: rng.random() * int(club[1:]))
+            row.update({f'{label} อันดับที่ {rank}': club for rank, club in enumerate(ranked, 1)})
+        rows.append(row)
+    path = tmp_path_factory.mktemp('milp') / 'small.csv'
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+@pytest.fixture(scope='module')
+def milp_allocation(small_input):
+    return quietly(allocation.optimize_club_allocation, small_input, solver='milp')
+
+def test_milp_is_feasible_and_beats_greedy(small_input, milp_allocation):
+    students, time_slots, clubs = milp_allocation
+    assert core.count_violations(time_slots, clubs) == (0, 0)
+    for student in students.values():
+        for period in core.PERIODS:
+            assignments = student['assignments'][period]
+            assert len(assignments) == core.NUM_SLOTS_PER_PERIOD
+            assert len(set(assignments.values())) == core.NUM_SLOTS_PER_PERIOD
+
+    greedy_students, _, _ = quietly(allocation.optimize_club_allocation, small_input)
+    assert core.calculate_total_satisfaction(students) > core.calculate_total_satisfaction(greedy_students)
+
+def test_milp_is_optimal_within_the_lp_bound(milp_allocation):
+    students, _, clubs = milp_allocation
+    total = core.calculate_total_satisfaction(students)
+    lp_bound = quietly(milp_solver.calculate_lp_upper_bound, students, clubs)
+    assert total <= lp_bound <= core.calculate_satisfaction_upper_bound(students)
+    assert core.calculate_gap(total, lp_bound) <= 1e-3
+
+def test_lp_bound_respects_the_time_limit(milp_allocation):
+    students, time_slots, clubs = milp_allocation
+    assert quietly(milp_solver.calculate_lp_upper_bound, students, clubs, time_limit=1e-6) is None
+
+    statistics = quietly(allocation.calculate_statistics, students, time_slots, clubs, bound='lp', time_limit=1e-6)
+    assert statistics['bound'] == 'ideal'
+    assert 'lp bound not solved' in allocation.describe_gap(statistics, 'lp')
+    assert quietly(allocation.calculate_statistics, students, time_slots, clubs, bound='lp')['bound'] == 'lp'
@@ -0,0 +1,51 @@
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+from benchmark_allocation import legacy_resolve_overcrowding, skew_demand
+
+from helpers import quietly
+
+@pytest.fixture(scope='module')
+def skewed_input(input_file):
+    """
+    test_250.csv ที่ชมรมหนึ่งเป็นอันดับ 1 ของช่วงเช้าสำหรับทุกคน (df, clubs, ชมรมนั้น)
+    """
+    df, club = skew_demand(quietly(allocation.read_data, input_file))
+    df = allocation.assign_groups(df)
+    return df, allocation.get_all_clubs(df), club
+
+def resolve_all(df, clubs, resolve):
+    """
+    จัดสรรเบื้องต้นแล้วแก้ทุกชมรมที่เกินขีดจำกัดด้วย resolve คืนค่า (students, time_slots, จำนวนการย้าย)
+    """
+    students = allocation.create_student_preferences(df)
+    time_slots = quietly(allocation.initial_assignment, students, clubs)
+    moves = 0
+    for period in core.PERIODS:
+        for slot in range(1, core.NUM_SLOTS_PER_PERIOD + 1):
+            for club in clubs[period]:
+                moves += resolve(students, time_slots, clubs, period, slot, club)
+    return students, time_slots, moves
+
+def test_eviction_queue_matches_the_rescoring_loop(skewed_input):
+    df, clubs, club = skewed_input
+    students, time_slots, moves = resolve_all(df, clubs, core.resolve_overcrowding)
+    legacy_students, _, legacy_moves = resolve_all(df, clubs, legacy_resolve_overcrowding)
+
+    assert moves == legacy_moves > 0
+    for student_id, student in students.items():
+        assert student['assignments'] == legacy_students[student_id]['assignments']
+    assert time_slots.size('morning', 1, club) == time_slots.capacity
+
+def test_overcrowding_keeps_the_last_member_of_each_group(skewed_input):
+    df, clubs, club = skewed_input
+    students = allocation.create_student_preferences(df)
+    time_slots = quietly(allocation.initial_assignment, students, clubs)
+    groups_before = {group for group in time_slots['morning'][1][club].values()}
+
+    core.resolve_overcrowding(students, time_slots, clubs, 'morning', 1, club)
+    assert set(time_slots['morning'][1][club].values()) == groups_before
+    for other in clubs['morning']:
+        if other != club:
+            assert time_slots.size('morning', 1, other) <= time_slots.capacity
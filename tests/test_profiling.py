@@ -0,0 +1,65 @@
+import json
+import tracemalloc
+
+import pytest
+
+import club_allocation_optimal as allocation
+import profiling
+from profiling import profile_stage, profiled, record, start_profiling, stop_profiling
+
+from helpers import quietly
+
+@profiled
+def inner(size):
+    data = bytearray(size)
+    record(items=size)
+    return len(data)
+
+@profiled
+def outer():
+    with profile_stage('setup'):
+        record(rows=2)
+    return inner(1 << 20) + inner(1 << 10)
+
+@pytest.fixture
+def stop_active():
+    """
+    หยุดการวัดที่ค้างอยู่ถ้าการทดสอบล้มเหลวก่อน stop_profiling
+    """
+    yield
+    profiling.active = None
+    tracemalloc.stop()
+
+def test_profiling_is_a_no_op_when_off():
+    assert profiling.active is None
+    assert outer() == (1 << 20) + (1 << 10)
+    assert stop_profiling() is None
+
+def test_nested_stages_are_aggregated(stop_active, tmp_path, capsys):
+    start_profiling()
+    outer()
+    output_file = tmp_path / 'profile.json'
+    report = stop_profiling(str(output_file), input_file='synthetic')
+    assert profiling.active is None
+    assert 'Profile report saved' in capsys.readouterr().out
+
+    stages = {stage['path']: stage for stage in report['stages']}
+    assert list(stages) == ['outer', 'outer/setup', 'outer/inner']
+    assert stages['outer/inner']['calls'] == 2
+    assert stages['outer/inner']['items'] == (1 << 20) + (1 << 10)
+    assert stages['outer/setup']['rows'] == 2
+    assert stages['outer/inner']['peak_memory_bytes'] >= 1 << 20
+    assert stages['outer']['peak_memory_bytes'] >= stages['outer/inner']['peak_memory_bytes']
+    assert stages['outer']['wall_seconds'] >= stages['outer/inner']['wall_seconds']
+    assert report['input_file'] == 'synthetic' and report['version'] == profiling.PROFILE_VERSION
+    assert json.loads(output_file.read_text(encoding='utf-8')) == report
+
+def test_allocation_stages_are_profiled(stop_active, input_file):
+    start_profiling(trace_memory=False)
+    quietly(allocation.optimize_club_allocation, input_file)
+    report = stop_profiling()
+    stages = {stage['path']: stage for stage in report['stages']}
+    assert stages['optimize_club_allocation']['calls'] == 1
+    assert stages['optimize_club_allocation/read_data']['rows'] == 250
+    assert all(stage['peak_memory_bytes'] == 0 for stage in report['stages'])
+    assert not report['trace_memory']
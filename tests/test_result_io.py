@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+import club_allocation_optimal as allocation
+from result_io import GROUP_HEADER_PREFIX, read_results, result_format, write_results
+
+CHANGE_COLUMNS = ['การเปลี่ยนแปลงชมรมเช้า', 'การเปลี่ยนแปลงชมรมบ่าย']
+
+@pytest.fixture(scope='module')
+def frame(dict_allocation):
+    students, _, _ = dict_allocation
+    return allocation.results_frame(students)
+
+@pytest.mark.parametrize('group_headers', [True, False])
+def test_csv_round_trip(frame, group_headers, tmp_path):
+    path = str(tmp_path / 'results.csv')
+    write_results(frame, path, group_headers=group_headers)
+    raw = pd.read_csv(path, encoding='utf-8-sig', dtype=str)
+    assert raw['รหัสนักศึกษา'].str.startswith(GROUP_HEADER_PREFIX).any() == group_headers
+
+    # CSV ไม่เก็บชนิดข้อมูล จึงแปลงกลุ่มและจำนวนการเปลี่ยนแปลงกลับก่อนเทียบ
+    read = read_results(path).astype({'กลุ่ม': str, **{column: int for column in CHANGE_COLUMNS}})
+    pd.testing.assert_frame_equal(read, frame, check_dtype=False)
+
+@pytest.mark.parametrize('extension', ['.parquet', '.feather'])
+def test_columnar_round_trip(frame, extension, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / f'results{extension}')
+    write_results(frame, path)
+    pd.testing.assert_frame_equal(read_results(path), frame)
+
+def test_result_format_follows_the_extension():
+    assert result_format('results.txt') == 'csv'
+    assert result_format('results.csv', 'csv') == 'csv'
+    with pytest.raises(ValueError, match='Unknown result format'):
+        result_format('results.csv', 'xlsx')
@@ -0,0 +1,38 @@
+from collections import Counter
+
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+from benchmark_allocation import legacy_calculate_satisfaction_score
+
+from helpers import quietly
+
+def assert_counters_match_assignments(students):
+    for student in students.values():
+        for period in core.PERIODS:
+            assert student['assigned_clubs'][period] == Counter(student['assignments'][period].values())
+
+@pytest.fixture(scope='module')
+def searched_allocation(input_file):
+    """
+    ผลการจัดสรร test_250.csv ที่ปรับปรุงด้วยการค้นหาเฉพาะที่ (ย้ายและสลับชมรมหลายพันครั้ง)
+    """
+    return quietly(allocation.optimize_club_allocation, input_file, local_search=True, search_iterations=5000)
+
+def test_score_matches_list_lookups_for_every_club_and_slot(dict_allocation):
+    students, _, clubs = dict_allocation
+    for student in students.values():
+        for period in core.PERIODS:
+            for club in clubs[period]:
+                for slot in range(1, core.NUM_SLOTS_PER_PERIOD + 1):
+                    assert (core.calculate_satisfaction_score(student, club, period, slot)
+                            == legacy_calculate_satisfaction_score(student, club, period, slot))
+
+def test_assigned_club_counters_follow_the_allocation(dict_allocation, searched_allocation):
+    assert_counters_match_assignments(dict_allocation[0])
+    assert_counters_match_assignments(searched_allocation[0])
+
+def test_compact_students_rebuild_the_counters(input_file):
+    store, _, _ = quietly(allocation.optimize_club_allocation, input_file, compact=True)
+    assert_counters_match_assignments(store.to_students())
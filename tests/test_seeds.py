@@ -0,0 +1,53 @@
+import sys
+
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+
+from helpers import quietly, snapshot, assert_same_allocation
+
+SEEDS = [3, 1, 2]
+
+@pytest.fixture(scope='module')
+def prepared(input_file):
+    """
+    ข้อมูลก่อนจัดสรรของ test_250.csv (ฟังก์ชันที่สร้าง students ใหม่ทุกครั้ง, clubs)
+    """
+    df = allocation.assign_groups(quietly(allocation.read_data, input_file))
+    return (lambda: allocation.create_student_preferences(df)), allocation.get_all_clubs(df)
+
+def test_seed_metrics_match_the_statistics_of_its_allocation(prepared):
+    new_students, clubs = prepared
+    students = new_students()
+    upper_bound = core.calculate_satisfaction_upper_bound(students)
+    _, metrics, _, time_slots = allocation.allocate_seed(students, clubs, 1, upper_bound=upper_bound)
+
+    statistics = quietly(allocation.calculate_statistics, students, time_slots, clubs)
+    for name in ('over_limit', 'missing_groups', 'average_satisfaction', 'optimality_gap'):
+        assert metrics[name] == statistics[name]
+
+def test_seeds_keep_the_best_seed_and_are_reproducible(prepared):
+    new_students, clubs = prepared
+    seed_metrics = {seed: allocation.allocate_seed(new_students(), clubs, seed)[1] for seed in SEEDS}
+    best_seed = min(SEEDS, key=lambda seed: (seed_metrics[seed]['over_limit'], seed_metrics[seed]['missing_groups'],
+                                             -seed_metrics[seed]['average_satisfaction']))
+
+    runs = []
+    for _ in range(2):
+        students = new_students()
+        time_slots = quietly(allocation.allocate_with_seeds, students, clubs, SEEDS, workers=2)
+        runs.append(snapshot(students, time_slots))
+    assert_same_allocation(*runs)
+
+    expected = new_students()
+    _, _, _, time_slots = allocation.allocate_seed(expected, clubs, best_seed)
+    assert_same_allocation(runs[0], snapshot(expected, time_slots))
+
+@pytest.mark.parametrize('option', [['--seeds', '1', '2'], ['--parallel'], ['--delta', 'delta.csv']])
+def test_trace_is_rejected_where_it_is_not_recorded(option, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['club_allocation_optimal.py', '--trace', 'trace.csv', *option])
+    with pytest.raises(SystemExit) as error:
+        allocation.main()
+    assert error.value.code == 2
+    assert '--trace' in capsys.readouterr().err
@@ -0,0 +1,47 @@
+import pytest
+
+import allocation_core as core
+import club_allocation_optimal as allocation
+import sharding
+
+from helpers import quietly
+
+@pytest.fixture(scope='module')
+def grouped_input(input_file):
+    df = quietly(allocation.read_data, input_file)
+    return allocation.assign_groups(df)
+
+def test_partition_covers_every_student_once(grouped_input):
+    partition = sharding.partition_students(grouped_input, 3)
+    student_ids = [student_id for shard in partition for student_id in shard]
+    assert sorted(student_ids) == sorted(set(grouped_input['รหัสนักศึกษา'].astype(str)))
+    assert max(map(len, partition)) - min(map(len, partition)) <= core.NUM_GROUPS
+
+def test_split_capacity_adds_up_to_the_club_limit():
+    shares = sharding.split_capacity([120, 130, 5])
+    assert sum(shares) == core.MAX_STUDENTS_PER_CLUB
+    assert shares[0] <= shares[1] and shares[2] <= 1
+
+def test_small_shards_are_rejected_unless_fallback_is_allowed(grouped_input, capsys):
+    with pytest.raises(ValueError, match='--allow-unsharded-fallback'):
+        sharding.plan_shards(grouped_input, 2)
+    with pytest.raises(ValueError, match='Only one shard'):
+        sharding.plan_shards(grouped_input, 1)
+
+    assert sharding.plan_shards(grouped_input, 2, allow_fallback=True) is None
+    assert 'allocating without shards' in capsys.readouterr().out
+
+def test_sharded_allocation_is_complete_and_within_limits(grouped_input):
+    partition = sharding.plan_shards(grouped_input, 2, min_students=100)
+    clubs = allocation.get_all_clubs(grouped_input)
+    students = allocation.create_student_preferences(grouped_input)
+    time_slots = quietly(sharding.allocate_in_shards, students, clubs, partition, workers=2)
+
+    over_limit, _ = core.count_violations(time_slots, clubs)
+    assert over_limit == 0
+    for student_id, student in students.items():
+        for period in core.PERIODS:
+            assignments = student['assignments'][period]
+            assert sorted(assignments) == list(range(1, core.NUM_SLOTS_PER_PERIOD + 1))
+            for slot, club in assignments.items():
+                assert student_id in time_slots[period][slot][club]
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+import club_allocation_optimal as allocation
+from benchmark_allocation import legacy_calculate_statistics
+from student_store import StudentStore
+
+from helpers import quietly
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_statistics_match_per_student_calculation(dict_allocation, compact):
+    students, time_slots, clubs = dict_allocation
+    if compact:
+        students = StudentStore.from_students(students, rank_scorer=allocation.build_rank_scores)
+    statistics = quietly(allocation.calculate_statistics, students, time_slots, clubs)
+    change_counts, club_sizes, group_representation, scores = legacy_calculate_statistics(students, time_slots, clubs)
+
+    assert statistics['total_students'] == len(students)
+    assert statistics['change_counts'] == change_counts
+    assert statistics['club_sizes'] == club_sizes
+    assert statistics['group_representation'] == group_representation
+    assert [entry['score'] for entry in statistics['satisfaction_scores']] == scores
+    assert statistics['average_satisfaction'] == sum(scores) / len(scores)
+    assert (statistics['over_limit'], statistics['missing_groups']) == allocation.count_violations(time_slots, clubs)
+    assert 0 <= statistics['optimality_gap'] < 1
+
+def test_size_report_from_statistics_matches_counting_time_slots(dict_allocation, tmp_path):
+    students, time_slots, clubs = dict_allocation
+    statistics = quietly(allocation.calculate_statistics, students, time_slots, clubs)
+    counted = quietly(allocation.generate_club_size_report, time_slots, clubs, str(tmp_path / 'counted.csv'))
+    reused = quietly(allocation.generate_club_size_report, time_slots, clubs, str(tmp_path / 'reused.csv'), statistics)
+
+    report = pd.read_csv(reused, encoding='utf-8-sig')
+    assert report.equals(pd.read_csv(counted, encoding='utf-8-sig'))
+    sizes = pd.to_numeric(report['จำนวนนักศึกษา'], errors='coerce').dropna()
+    assert sizes.sum() == len(students) * allocation.NUM_SLOTS_PER_PERIOD * len(allocation.PERIODS)
@@ -0,0 +1,34 @@
+import pytest
+
+import club_allocation_optimal as allocation
+from student_store import StudentStore
+
+from helpers import assert_same_allocation, quietly, snapshot
+
+@pytest.mark.parametrize('engine', allocation.SCORING_ENGINES)
+def test_compact_allocation_matches_dict(input_file, engine):
+    expected = quietly(allocation.optimize_club_allocation, input_file, engine=engine)
+    actual = quietly(allocation.optimize_club_allocation, input_file, engine=engine, compact=True)
+
+    assert isinstance(actual[0], StudentStore)
+    assert_same_allocation(snapshot(*actual[:2]), snapshot(*expected[:2]))
+    expected_statistics = quietly(allocation.calculate_statistics, *expected)
+    actual_statistics = quietly(allocation.calculate_statistics, *actual)
+    assert actual_statistics['average_satisfaction'] == expected_statistics['average_satisfaction']
+    assert actual_statistics['change_counts'] == expected_statistics['change_counts']
+
+def test_store_round_trips_dict_students(dict_allocation):
+    students, _, _ = dict_allocation
+    store = StudentStore.from_students(students, rank_scorer=allocation.build_rank_scores)
+
+    for student_id, student in store.to_students().items():
+        original = students[student_id]
+        assert student['group'] == original['group']
+        assert student['preferences'] == original['preferences']
+        assert student['assignments'] == original['assignments']
+        assert student['changes'] == original['changes']
+        assert student['rank_scores'] == original['rank_scores']
+
+def test_store_rejects_duplicate_ids():
+    with pytest.raises(ValueError):
+        StudentStore(['1', '2', '1'], [0, 1, 0])
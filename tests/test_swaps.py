@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+import club_allocation_optimal as allocation
+import Pathoptimize as paths
+from benchmark_allocation import legacy_find_best_swaps
+
+from helpers import quietly
+
+@pytest.fixture(scope='module')
+def path_students(dict_allocation):
+    """
+    ข้อมูลนักศึกษาของ Pathoptimize จากผลการจัดสรร test_250.csv
+    """
+    students, _, _ = dict_allocation
+    return quietly(paths.create_student_data, allocation.results_frame(students))
+
+@pytest.fixture(scope='module')
+def legacy_swaps(path_students):
+    return legacy_find_best_swaps(path_students)
+
+def test_find_best_swaps_matches_all_pairs_search(path_students, legacy_swaps):
+    expected, possible, valid, beneficial = legacy_swaps
+    counts = {}
+    swaps = paths.find_best_swaps(path_students, counts)
+
+    assert expected
+    assert swaps == expected
+    assert (counts['possible'], counts['valid'], counts['beneficial']) == (possible, valid, beneficial)
+
+def test_find_best_swaps_limit_keeps_the_best(path_students, legacy_swaps):
+    expected, _, _, _ = legacy_swaps
+    assert paths.find_best_swaps(path_students, limit=1) == expected[:1]
+    assert paths.find_best_swaps(path_students, limit=10) == expected[:10]
+
+def test_compact_students_find_the_same_swaps(dict_allocation, legacy_swaps):
+    students, _, _ = dict_allocation
+    expected, _, _, _ = legacy_swaps
+    compact = quietly(paths.create_student_data, allocation.results_frame(students), compact=True)
+    assert paths.find_best_swaps(compact) == expected
+
+@pytest.fixture(scope='module')
+def repeated_students():
+    """
+    นักศึกษา 120 คนที่ได้การจัดสรรซ้ำกันจากแบบ 6 แบบ (ลายเซ็นน้อย ผลประโยชน์เท่ากันหลายคู่)
+    """
+    rng = random.Random(7)
+    clubs = list(paths.club_buildings)[:8]
+    patterns = [(rng.sample(clubs, 4), rng.sample(clubs, 4)) for _ in range(6)]
+    students = {}
+    for index in range(120):
+        morning, afternoon = rng.choice(patterns)
+        students[f'S{index:03d}'] = {'assignments': {'morning': dict(zip(range(1, 5), morning)),
+                                                     'afternoon': dict(zip(range(1, 5), afternoon))}}
+    return students
+
+def test_limit_search_matches_all_pairs_search_with_ties(repeated_students):
+    expected, _, _, _ = legacy_find_best_swaps(repeated_students)
+    assert expected
+    for limit in (1, 5, 50, len(expected) + 1):
+        assert paths.find_best_swaps(repeated_students, limit=limit) == expected[:limit]
+
+def test_swap_partner_only_needs_distinct_clubs():
+    student1 = {'assignments': {'morning': {1: 'ART', 2: 'CHORUS', 3: 'DEVIL', 4: 'MUAN'}}}
+    student2 = {'assignments': {'morning': {1: 'เทนนิส', 2: 'วิ่ง', 3: 'ฟุตบอล', 4: 'เปตอง'}}}
+    duplicate = {'assignments': {'morning': {1: 'DEVIL', 2: 'วิ่ง', 3: 'ฟุตบอล', 4: 'เปตอง'}}}
+    assert paths.is_valid_slot_swap(student1, student2, 'morning', 1, 2, None)
+    assert not paths.is_valid_slot_swap(student1, duplicate, 'morning', 1, 2, None)